@@ -97,7 +97,7 @@ class OpenShotApp(QApplication):
 
             log.debug("Command line: %s", self.args)
 
-            from classes import settings, project_data, updates, sentry
+            from classes import settings, project_data, updates, sentry, dispatch_profiler
             import openshot
 
             # Re-route stdout and stderr to logger
@@ -130,8 +130,12 @@ class OpenShotApp(QApplication):
         self.settings.load()
         self.project = project_data.ProjectDataStore()
         self.updates = updates.UpdateManager()
+        self.updates.history_byte_limit = int(self.settings.get("history-memory-limit") or 0) * 1024 * 1024
+        if self.settings.get("enable-dispatch-profiler"):
+            dispatch_profiler.profiler.enable(True, self.settings.get("dispatch-warning-threshold"))
         # It is important that the project is the first listener if the key gets update
         self.updates.add_listener(self.project)
+        self.updates.add_listener(self.project.journal)
         self.updates.reset()
 
         # Set location of OpenShot program (for libopenshot)
@@ -324,6 +328,11 @@ class OpenShotApp(QApplication):
         except Exception:
             self.log.error("Couldn't save user settings on exit.", exc_info=1)
 
+        # Save dispatch profile (if profiling)
+        from classes.dispatch_profiler import profiler
+        if profiler.enabled:
+            profiler.dump()
+
 
 @atexit.register
 def onLogTheEnd():
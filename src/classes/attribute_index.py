@@ -0,0 +1,95 @@
+"""
+ @file
+ @brief This file contains an index of project data objects by attribute value
+ @author Jonathan Thomas <jonathan@openshot.org>
+
+ @section LICENSE
+
+ Copyright (c) 2008-2024 OpenShot Studios, LLC
+ (http://www.openshotstudios.com). This file is part of
+ OpenShot Video Editor (http://www.openshot.org), an open-source project
+ dedicated to delivering high quality video editing and animation solutions
+ to the world.
+
+ OpenShot Video Editor is free software: you can redistribute it and/or modify
+ it under the terms of the GNU General Public License as published by
+ the Free Software Foundation, either version 3 of the License, or
+ (at your option) any later version.
+
+ OpenShot Video Editor is distributed in the hope that it will be useful,
+ but WITHOUT ANY WARRANTY; without even the implied warranty of
+ MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+ GNU General Public License for more details.
+
+ You should have received a copy of the GNU General Public License
+ along with OpenShot Library.  If not, see <http://www.gnu.org/licenses/>.
+ """
+
+
+# Index keys of objects without the attribute, and objects with an unhashable value (i.e. a dict)
+MISSING = object()
+UNHASHABLE = object()
+
+
+class AttributeIndex:
+    """ Index of the objects in a top-level collection (i.e. files) by the value of an attribute (i.e. path).
+    The index is updated as objects are added, replaced, and removed from the project data. """
+
+    def __init__(self, items, attribute):
+        self.items = items  # Indexed list of project data
+        self.attribute = attribute  # Indexed attribute name
+        self.size = 0  # Number of items in list (when it was last updated)
+        self.values = {}  # Objects with each value: {value: {id: object}}
+        self.objects = {}  # Value of indexed objects: {id: value}
+
+        for item in items:
+            self.add(item)
+
+    def get_value(self, item):
+        """ Get the index key of an object """
+        if self.attribute not in item:
+            return MISSING
+        value = item[self.attribute]
+        try:
+            hash(value)
+        except TypeError:
+            return UNHASHABLE
+        return value
+
+    def is_current(self, items):
+        """ Is the index up to date for this list (i.e. the list wasn't replaced or resized) """
+        return items is self.items and len(items) == self.size
+
+    def add(self, item):
+        """ Add an object to the index """
+        self.size += 1
+        if not isinstance(item, dict) or "id" not in item:
+            return
+        self.remove_id(item["id"])
+        value = self.get_value(item)
+        self.values.setdefault(value, {})[item["id"]] = item
+        self.objects[item["id"]] = value
+
+    def remove(self, item):
+        """ Remove an object from the index """
+        self.size -= 1
+        if isinstance(item, dict) and "id" in item:
+            self.remove_id(item["id"])
+
+    def remove_id(self, item_id):
+        """ Remove an object from the index (by id) """
+        if item_id not in self.objects:
+            return
+        value = self.objects.pop(item_id)
+        objects = self.values[value]
+        objects.pop(item_id, None)
+        if not objects:
+            del self.values[value]
+
+    def query(self, value):
+        """ Find all objects which could match a value (like the filters of QueryObject, objects
+        without the attribute match any value). Objects with unhashable values must be compared. """
+        found = []
+        for key in (value, MISSING, UNHASHABLE):
+            found.extend(self.values.get(key, {}).values())
+        return found
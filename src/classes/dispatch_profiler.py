@@ -0,0 +1,130 @@
+"""
+ @file
+ @brief This file contains an opt-in profiler of UpdateManager dispatches (used to find slow listeners)
+ @author Jonathan Thomas <jonathan@openshot.org>
+
+ @section LICENSE
+
+ Copyright (c) 2008-2024 OpenShot Studios, LLC
+ (http://www.openshotstudios.com). This file is part of
+ OpenShot Video Editor (http://www.openshot.org), an open-source project
+ dedicated to delivering high quality video editing and animation solutions
+ to the world.
+
+ OpenShot Video Editor is free software: you can redistribute it and/or modify
+ it under the terms of the GNU General Public License as published by
+ the Free Software Foundation, either version 3 of the License, or
+ (at your option) any later version.
+
+ OpenShot Video Editor is distributed in the hope that it will be useful,
+ but WITHOUT ANY WARRANTY; without even the implied warranty of
+ MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+ GNU General Public License for more details.
+
+ You should have received a copy of the GNU General Public License
+ along with OpenShot Library.  If not, see <http://www.gnu.org/licenses/>.
+ """
+
+import json
+import os
+import time
+from collections import deque
+
+from classes import info
+from classes.logger import log
+
+# Upper bound (in milliseconds) of each histogram bucket (the last bucket contains all slower samples)
+HISTOGRAM_BUCKETS_MS = [0.1, 0.5, 1.0, 2.0, 5.0, 10.0, 20.0, 50.0, 100.0, 200.0, 500.0, 1000.0]
+
+
+class DispatchProfiler:
+    """ Record the time spent dispatching UpdateActions: per listener, per action type, per key prefix,
+    and the time spent serializing actions to JSON. Only the most recent samples of each are kept
+    (a rolling histogram), which can be dumped to a JSON file in the user folder. """
+
+    def __init__(self, max_samples=1000):
+        self.enabled = False
+        self.warning_threshold = 0.1  # Log a warning when a dispatch takes longer (in seconds)
+        self.max_samples = max_samples  # Number of samples kept for each category and name
+        self.samples = {}  # {category: {name: deque of durations (in seconds)}}
+
+    def enable(self, enabled=True, warning_threshold_ms=None):
+        """ Start (or stop) profiling, and set the warning threshold (in milliseconds) """
+        self.enabled = bool(enabled)
+        if warning_threshold_ms is not None:
+            self.warning_threshold = float(warning_threshold_ms) / 1000.0
+        log.info("Dispatch profiler %s", "enabled" if self.enabled else "disabled")
+
+    def reset(self):
+        """ Remove all samples """
+        self.samples.clear()
+
+    def record(self, category, name, duration):
+        """ Add a sample (in seconds) for a category (i.e. "listener") and name (i.e. "TimelineSync") """
+        names = self.samples.setdefault(category, {})
+        if name not in names:
+            names[name] = deque(maxlen=self.max_samples)
+        names[name].append(duration)
+
+    def record_dispatch(self, action, duration, listener_times):
+        """ Add the samples of a dispatched action, and log a warning if it was slow """
+        key_prefix = str(action.key[0]).lower() if action.key else action.type
+        self.record("action_type", action.type, duration)
+        self.record("key_prefix", key_prefix, duration)
+        for listener_name, listener_duration in listener_times:
+            self.record("listener", listener_name, listener_duration)
+
+        if duration > self.warning_threshold:
+            slowest = sorted(listener_times, key=lambda item: item[1], reverse=True)[:3]
+            log.warning("Slow dispatch of '%s' action (key: %s): %.1f ms (%s)",
+                        action.type, key_prefix, duration * 1000.0,
+                        ", ".join("%s: %.1f ms" % (name, d * 1000.0) for name, d in slowest))
+
+    @staticmethod
+    def get_histogram(durations):
+        """ Get the summary and histogram of a list of durations (in seconds) """
+        counts = [0] * (len(HISTOGRAM_BUCKETS_MS) + 1)
+        for duration in durations:
+            duration_ms = duration * 1000.0
+            bucket = 0
+            while bucket < len(HISTOGRAM_BUCKETS_MS) and duration_ms > HISTOGRAM_BUCKETS_MS[bucket]:
+                bucket += 1
+            counts[bucket] += 1
+
+        total_ms = sum(durations) * 1000.0
+        return {
+            "count": len(durations),
+            "total_ms": round(total_ms, 3),
+            "mean_ms": round(total_ms / len(durations), 3) if durations else 0.0,
+            "max_ms": round(max(durations) * 1000.0, 3) if durations else 0.0,
+            "histogram": counts,
+        }
+
+    def get_data(self):
+        """ Get the histograms of all samples (as a JSON serializable dictionary) """
+        return {
+            "buckets_ms": HISTOGRAM_BUCKETS_MS + [None],
+            "categories": {
+                category: {name: self.get_histogram(list(durations)) for name, durations in names.items()}
+                for category, names in self.samples.items()
+            },
+        }
+
+    def dump(self, file_path=None):
+        """ Write the histograms to a JSON file (in the user folder by default), and return its path """
+        if not file_path:
+            file_path = os.path.join(info.USER_PATH, "dispatch-profile.json")
+        data = self.get_data()
+        data["time"] = time.strftime("%Y-%m-%d %H:%M:%S")
+        try:
+            with open(file_path, "w", encoding="utf-8") as f:
+                json.dump(data, f, indent=2)
+        except OSError:
+            log.warning("Unable to write dispatch profile: %s", file_path, exc_info=1)
+            return None
+        log.info("Saved dispatch profile: %s", file_path)
+        return file_path
+
+
+# Profiler used by the UpdateManager (disabled until enabled in the preferences)
+profiler = DispatchProfiler()
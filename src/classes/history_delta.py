@@ -0,0 +1,96 @@
+"""
+ @file
+ @brief This file contains functions to compare and patch project data (used by the undo/redo history)
+ @author Jonathan Thomas <jonathan@openshot.org>
+
+ @section LICENSE
+
+ Copyright (c) 2008-2024 OpenShot Studios, LLC
+ (http://www.openshotstudios.com). This file is part of
+ OpenShot Video Editor (http://www.openshot.org), an open-source project
+ dedicated to delivering high quality video editing and animation solutions
+ to the world.
+
+ OpenShot Video Editor is free software: you can redistribute it and/or modify
+ it under the terms of the GNU General Public License as published by
+ the Free Software Foundation, either version 3 of the License, or
+ (at your option) any later version.
+
+ OpenShot Video Editor is distributed in the hope that it will be useful,
+ but WITHOUT ANY WARRANTY; without even the implied warranty of
+ MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+ GNU General Public License for more details.
+
+ You should have received a copy of the GNU General Public License
+ along with OpenShot Library.  If not, see <http://www.gnu.org/licenses/>.
+ """
+
+from classes.logger import log
+
+
+def get_delta(old, new):
+    """ Get the list of changes between two JSON values. Each change is a dictionary with the path
+    to the changed value (keys and list indexes), and its "old" and "new" values (a missing
+    value means the key was added or removed). Values shared by both sides are not compared. """
+    delta = []
+    _add_changes(delta, [], old, new)
+    return delta
+
+
+def _add_changes(delta, path, old, new):
+    """ Add the changes between two values (found at path) to a delta """
+    if old is new:
+        return
+
+    if isinstance(old, dict) and isinstance(new, dict):
+        for key, old_value in old.items():
+            if key in new:
+                _add_changes(delta, path + [key], old_value, new[key])
+            else:
+                delta.append({"path": path + [key], "old": old_value})
+        for key, new_value in new.items():
+            if key not in old:
+                delta.append({"path": path + [key], "new": new_value})
+
+    elif isinstance(old, list) and isinstance(new, list) and len(old) == len(new):
+        for index in range(len(old)):
+            _add_changes(delta, path + [index], old[index], new[index])
+
+    elif type(old) is not type(new) or old != new:
+        delta.append({"path": path, "old": old, "new": new})
+
+
+def apply_delta(value, delta, side="new"):
+    """ Apply a delta to a value, and return the "new" (or "old") value. The original value is not
+    modified: only the containers along the path of each change are copied. """
+    for change in delta:
+        value = _apply_change(value, change.get("path", []), change, side)
+    return value
+
+
+def _apply_change(value, path, change, side):
+    """ Apply one change to a value (path is relative to the value) """
+    if not path:
+        return change.get(side)
+
+    key = path[0]
+    if isinstance(value, dict) and isinstance(key, str):
+        new_value = dict(value)
+        if len(path) > 1:
+            if key not in value:
+                log.debug("Skipping history change of missing key: %s", change.get("path"))
+                return value
+            new_value[key] = _apply_change(value[key], path[1:], change, side)
+        elif side in change:
+            new_value[key] = change[side]
+        else:
+            new_value.pop(key, None)
+        return new_value
+
+    if isinstance(value, list) and isinstance(key, int) and key < len(value):
+        new_value = list(value)
+        new_value[key] = _apply_change(value[key], path[1:], change, side)
+        return new_value
+
+    log.debug("Skipping history change which doesn't match project data: %s", change.get("path"))
+    return value
@@ -99,6 +99,9 @@ def import_xml():
             track.data = {"number": track_number, "y": 0, "label": "XML Import %s" % track_index, "lock": is_locked}
             track.save()
 
+            # Clips are saved after the track is complete (as a single batch of inserts)
+            track_clips = []
+
             # Loop through clips
             for clip_element in clips_on_track:
                 # Get clip path
@@ -190,8 +193,12 @@ def import_xml():
                                 }
                             )
 
-                # Save clip
-                clip.save()
+                # Save clip (when the track is complete)
+                track_clips.append(clip)
+
+            with app.updates.batch():
+                for clip in track_clips:
+                    clip.save()
 
             # Update the preview and reselect current frame in properties
             app.window.refreshFrameSignal.emit()
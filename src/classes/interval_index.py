@@ -0,0 +1,134 @@
+"""
+ @file
+ @brief This file contains an index of timeline objects by layer and time range
+ @author Jonathan Thomas <jonathan@openshot.org>
+
+ @section LICENSE
+
+ Copyright (c) 2008-2024 OpenShot Studios, LLC
+ (http://www.openshotstudios.com). This file is part of
+ OpenShot Video Editor (http://www.openshot.org), an open-source project
+ dedicated to delivering high quality video editing and animation solutions
+ to the world.
+
+ OpenShot Video Editor is free software: you can redistribute it and/or modify
+ it under the terms of the GNU General Public License as published by
+ the Free Software Foundation, either version 3 of the License, or
+ (at your option) any later version.
+
+ OpenShot Video Editor is distributed in the hope that it will be useful,
+ but WITHOUT ANY WARRANTY; without even the implied warranty of
+ MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+ GNU General Public License for more details.
+
+ You should have received a copy of the GNU General Public License
+ along with OpenShot Library.  If not, see <http://www.gnu.org/licenses/>.
+ """
+
+
+from bisect import bisect_left, bisect_right, insort
+
+# Extra margin (in seconds) when searching for objects which start before a time range,
+# so rounding errors (in object durations) never exclude an intersecting object.
+SEARCH_MARGIN = 0.000001
+
+
+class LayerIntervals:
+    """ Time ranges of the objects on a single layer, sorted by position """
+
+    def __init__(self):
+        self.entries = []  # Sorted list of (position, end position, id)
+        self.max_duration = 0.0  # Longest duration of any object (ever) added to this layer
+
+    def add(self, entry):
+        """ Add a (position, end position, id) entry """
+        insort(self.entries, entry)
+        self.max_duration = max(self.max_duration, entry[1] - entry[0])
+
+    def remove(self, entry):
+        """ Remove a (position, end position, id) entry """
+        entry_index = bisect_left(self.entries, entry)
+        if entry_index < len(self.entries) and self.entries[entry_index] == entry:
+            del self.entries[entry_index]
+
+    def query(self, start, end):
+        """ Find the ids of all objects intersecting a time range. Only objects which start
+        less than max_duration before the range are checked. """
+        first_index = bisect_left(self.entries, (start - self.max_duration - SEARCH_MARGIN,))
+        last_index = bisect_right(self.entries, (end, float("inf")))
+        return [entry[2] for entry in self.entries[first_index:last_index] if entry[1] >= start]
+
+
+class IntervalIndex:
+    """ Index of the objects in a top-level collection (i.e. clips, effects) by layer and time range.
+    The index is updated as objects are added, replaced, and removed from the project data. """
+
+    def __init__(self, items):
+        self.items = items  # Indexed list of project data
+        self.size = 0  # Number of items in list (when it was last updated)
+        self.layers = {}  # Intervals of each layer: {layer: LayerIntervals}
+        self.objects = {}  # Indexed objects: {id: (layer, entry, object)}
+
+        for item in items:
+            self.add(item)
+
+    @staticmethod
+    def get_entry(item):
+        """ Get the (position, end position, id) entry of an object. The end position
+        matches the 'intersect' filter: position + (end - start) """
+        position = item.get("position", 0)
+        end_position = position + (item.get("end", 0) - item.get("start", 0))
+        return position, end_position, item["id"]
+
+    @staticmethod
+    def matches(item, start, end, layer=None):
+        """ Check if an object intersects a time range [start, end], on a layer (or any layer) """
+        if not isinstance(item, dict) or "id" not in item:
+            return False
+        if layer is not None and item.get("layer", layer) != layer:
+            return False
+        position, end_position, item_id = IntervalIndex.get_entry(item)
+        return position <= end and end_position >= start
+
+    def is_current(self, items):
+        """ Is the index up to date for this list (i.e. the list wasn't replaced or resized) """
+        return items is self.items and len(items) == self.size
+
+    def add(self, item):
+        """ Add an object to the index """
+        self.size += 1
+        if not isinstance(item, dict) or "id" not in item:
+            return
+        self.remove_id(item["id"])
+        layer = item.get("layer")
+        if isinstance(layer, (dict, list)):
+            # Invalid layer (can't be indexed), check it like a missing layer
+            layer = None
+        entry = self.get_entry(item)
+        self.layers.setdefault(layer, LayerIntervals()).add(entry)
+        self.objects[item["id"]] = (layer, entry, item)
+
+    def remove(self, item):
+        """ Remove an object from the index """
+        self.size -= 1
+        if isinstance(item, dict) and "id" in item:
+            self.remove_id(item["id"])
+
+    def remove_id(self, item_id):
+        """ Remove an object from the index (by id) """
+        layer, entry, item = self.objects.pop(item_id, (None, None, None))
+        if entry:
+            self.layers[layer].remove(entry)
+
+    def query(self, start, end, layer=None):
+        """ Find all objects which intersect a time range [start, end], on a layer (or all layers).
+        Objects without a layer match any layer (like the 'layer' filter). """
+        if layer is None:
+            layers = self.layers.values()
+        else:
+            layers = [self.layers[key] for key in (layer, None) if key in self.layers]
+
+        found = []
+        for intervals in layers:
+            found.extend(self.objects[item_id][2] for item_id in intervals.query(start, end))
+        return found
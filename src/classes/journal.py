@@ -0,0 +1,245 @@
+"""
+ @file
+ @brief This file contains an append-only journal of project changes (used for incremental saves)
+ @author Jonathan Thomas <jonathan@openshot.org>
+
+ @section LICENSE
+
+ Copyright (c) 2008-2024 OpenShot Studios, LLC
+ (http://www.openshotstudios.com). This file is part of
+ OpenShot Video Editor (http://www.openshot.org), an open-source project
+ dedicated to delivering high quality video editing and animation solutions
+ to the world.
+
+ OpenShot Video Editor is free software: you can redistribute it and/or modify
+ it under the terms of the GNU General Public License as published by
+ the Free Software Foundation, either version 3 of the License, or
+ (at your option) any later version.
+
+ OpenShot Video Editor is distributed in the hope that it will be useful,
+ but WITHOUT ANY WARRANTY; without even the implied warranty of
+ MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+ GNU General Public License for more details.
+
+ You should have received a copy of the GNU General Public License
+ along with OpenShot Library.  If not, see <http://www.gnu.org/licenses/>.
+ """
+
+import json
+import os
+
+from classes.logger import log
+from classes.updates import UpdateInterface
+
+# Version of the journal file format
+JOURNAL_VERSION = 1
+
+# Project keys which can't be journaled: changing them rescales the whole project (i.e. a new FPS
+# converts the positions and keyframes of all clips and effects), which replaying can't reproduce
+SNAPSHOT_KEYS = ("fps", "profile", "width", "height", "display_ratio", "pixel_ratio")
+
+
+class ProjectJournal(UpdateInterface):
+    """ Append-only journal of UpdateActions, stored next to a project file (*.osp.journal).
+    Each action is kept in memory as it happens, and appended to the journal when write()
+    is called (i.e. on autosave). A full save of the project (snapshot) truncates the journal.
+    When a project is loaded, the journal is replayed on top of the snapshot. """
+
+    def __init__(self):
+        self.project_path = None  # Project file this journal belongs to (None when inactive)
+        self.pending = []  # Actions not yet written to the journal: (type, key, values)
+        self.pending_history = None  # Latest history values (only the last one is needed)
+        self.action_count = 0  # Number of actions written since the last snapshot
+        self.requires_snapshot = False  # Project data changed in a way the journal can't record
+        self.committed = False  # Has the snapshot been written (and the journal file created)
+
+    @staticmethod
+    def get_path(project_path):
+        """ Get the journal path of a project file """
+        return "%s.journal" % project_path
+
+    @staticmethod
+    def get_signature(project_path):
+        """ Get the signature of a project file (used to match a journal to its snapshot) """
+        try:
+            stat = os.stat(project_path)
+            return {"size": stat.st_size, "mtime": stat.st_mtime_ns}
+        except OSError:
+            return None
+
+    def is_active(self, project_path=None):
+        """ Is the journal recording changes (optionally, for a specific project file) """
+        if not self.project_path:
+            return False
+        return project_path is None or os.path.abspath(project_path) == self.project_path
+
+    def start(self, project_path):
+        """ Start recording changes made after a snapshot of the project was taken. Changes are
+        kept in memory, until the snapshot is written to disk (see commit). """
+        self.stop()
+        self.project_path = os.path.abspath(project_path)
+
+    def commit(self, project_path):
+        """ Create a new (empty) journal file for a project file, after its snapshot is written """
+        if not self.is_active(project_path):
+            return
+        journal_path = self.get_path(project_path)
+        try:
+            with open(journal_path, "w", encoding="utf-8", newline="\n") as f:
+                header = {"journal": JOURNAL_VERSION,
+                          "snapshot": self.get_signature(project_path)}
+                f.write(json.dumps(header) + "\n")
+        except OSError:
+            log.warning("Unable to create project journal %s", journal_path, exc_info=1)
+            self.stop()
+            return
+        self.committed = True
+        log.debug("Started project journal: %s", journal_path)
+
+    def resume(self, project_path, action_count):
+        """ Continue recording into an existing journal (after it was replayed) """
+        self.stop()
+        self.project_path = os.path.abspath(project_path)
+        self.action_count = action_count
+        self.committed = True
+
+    def stop(self):
+        """ Stop recording changes (the journal file is kept) """
+        self.project_path = None
+        self.pending.clear()
+        self.pending_history = None
+        self.action_count = 0
+        self.requires_snapshot = False
+        self.committed = False
+
+    def remove(self, project_path):
+        """ Stop recording, and delete the journal of a project file (if any) """
+        if self.is_active(project_path):
+            self.stop()
+        journal_path = self.get_path(project_path)
+        if os.path.exists(journal_path):
+            try:
+                os.unlink(journal_path)
+                log.debug("Removed project journal: %s", journal_path)
+            except OSError:
+                log.warning("Unable to remove project journal %s", journal_path, exc_info=1)
+
+    def needs_snapshot(self, compact_limit):
+        """ Should the project be fully saved (and the journal compacted) """
+        if not self.committed or self.requires_snapshot:
+            return True
+        return (self.action_count + len(self.pending)) >= compact_limit
+
+    @staticmethod
+    def is_snapshot_key(key):
+        """ Does a change of this key require a snapshot (see SNAPSHOT_KEYS) """
+        return bool(key) and len(key) == 1 and key[0] in SNAPSHOT_KEYS
+
+    def changed(self, action):
+        """ This method is invoked by the UpdateManager each time a change happens (i.e UpdateInterface) """
+        if not self.project_path:
+            return
+
+        if action.type == "load":
+            # Entire project was replaced, which can only be saved as a snapshot
+            self.requires_snapshot = True
+        elif self.is_snapshot_key(action.key):
+            # Profile or FPS changed (the project was rescaled), which can only be saved as a snapshot
+            self.requires_snapshot = True
+        elif action.key and action.key[0] == "history":
+            # Only the most recent history is needed
+            self.pending_history = action.values
+        else:
+            # Keep a reference to the action values (project data is never modified in place)
+            self.pending.append((action.type, action.key, action.values))
+
+    def write(self):
+        """ Append all pending actions to the journal, and return the number of actions written """
+        if not self.project_path or not self.committed or self.requires_snapshot:
+            # Nothing to append to (or the changes can only be saved as a snapshot)
+            return 0
+
+        entries = [{"type": action_type, "key": key, "value": values}
+                   for action_type, key, values in self.pending]
+        if self.pending_history is not None:
+            entries.append({"type": "update", "key": ["history"], "value": self.pending_history})
+        if not entries:
+            return 0
+
+        journal_path = self.get_path(self.project_path)
+        with open(journal_path, "a", encoding="utf-8", newline="\n") as f:
+            for entry in entries:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+        self.action_count += len(self.pending)
+        self.pending.clear()
+        self.pending_history = None
+        log.debug("Wrote %s actions to project journal: %s", len(entries), journal_path)
+        return len(entries)
+
+    @staticmethod
+    def truncate(journal_path, size):
+        """ Remove the end of a journal (after the last valid action) """
+        try:
+            os.truncate(journal_path, size)
+        except OSError:
+            log.warning("Unable to truncate project journal %s", journal_path, exc_info=1)
+
+    def replay(self, project_path, project):
+        """ Apply the journal of a project file (if any) to the project data.
+        Return the number of actions applied, or None if no valid journal was found. """
+        journal_path = self.get_path(project_path)
+        if not os.path.exists(journal_path):
+            return None
+
+        try:
+            with open(journal_path, "r", encoding="utf-8", newline="") as f:
+                lines = f.readlines()
+        except OSError:
+            log.warning("Unable to read project journal %s", journal_path, exc_info=1)
+            return None
+
+        # Verify journal matches the snapshot
+        try:
+            header = json.loads(lines[0]) if lines else {}
+        except ValueError:
+            header = {}
+        if header.get("journal") != JOURNAL_VERSION \
+                or header.get("snapshot") != self.get_signature(project_path):
+            log.warning("Ignoring project journal which doesn't match its project file: %s", journal_path)
+            return None
+
+        action_count = 0
+        valid_size = len(lines[0].encode("utf-8"))
+        for line_number, line in enumerate(lines[1:], start=2):
+            try:
+                entry = json.loads(line, strict=False)
+            except ValueError:
+                # Incomplete entry (i.e. interrupted write), remove the rest of the journal
+                log.warning("Stopped replaying project journal %s at line %s", journal_path, line_number)
+                self.truncate(journal_path, valid_size)
+                break
+            if self.is_snapshot_key(entry.get("key")):
+                # Profile change (which can't be replayed): the following actions use a rescaled
+                # timebase, so remove the rest of the journal (the project is recovered as it was
+                # before the change)
+                log.warning("Stopped replaying project journal %s at line %s (profile change)",
+                            journal_path, line_number)
+                self.truncate(journal_path, valid_size)
+                break
+            valid_size += len(line.encode("utf-8"))
+
+            action_type = entry.get("type")
+            if action_type == "insert":
+                project._set(entry.get("key"), entry.get("value"), add=True)
+            elif action_type == "update":
+                project._set(entry.get("key"), entry.get("value"))
+            elif action_type == "delete":
+                project._set(entry.get("key"), remove=True)
+            if entry.get("key") != ["history"]:
+                action_count += 1
+
+        log.info("Replayed %s actions from project journal: %s", action_count, journal_path)
+        return action_count
@@ -32,17 +32,28 @@ import json
 import copy
 import os
 import re
+import shutil
+import tempfile
 
 from classes.assets import get_assets_path
 from classes.logger import log
 from classes import info
 from classes.app import get_app
 
-# Compiled path regex
-path_regex = re.compile(r'"(image|path|protobuf_data_path|lut_path)"\s*:\s*"(.*?)"')
+# Keys which contain file paths (converted to/from relative paths)
+PATH_KEYS = {"image", "path", "protobuf_data_path", "lut_path"}
 path_context = {}
 
 
+def copy_data(value):
+    """ Deep copy JSON-compatible data (dicts, lists, and scalar values), without serializing it """
+    if isinstance(value, dict):
+        return {key: copy_data(item) for key, item in value.items()}
+    elif isinstance(value, (list, tuple)):
+        return [copy_data(item) for item in value]
+    return value
+
+
 class JsonDataStore:
     """ This class which allows getting/setting of key/value settings, and loading and saving to json files.
     Internal storage of a dictionary. Uses json module to serialize and deserialize from json to dictionary.
@@ -81,10 +92,10 @@ class JsonDataStore:
                     user_values[item["setting"].lower()] = item["value"]
 
             # Settings data
-            return json.loads(json.dumps(user_values.get(key, None)))
+            return copy_data(user_values.get(key, None))
         else:
             # Project data (i.e dictionary)
-            return json.loads(json.dumps(self._data.get(key, None)))
+            return copy_data(self._data.get(key, None))
 
     def set(self, key, value):
         """ Store value in key """
@@ -190,10 +201,11 @@ class JsonDataStore:
                     log.info(msg_log.format(subs_count, file_path))
 
             # Process JSON data
+            data = json.loads(contents)
             if path_mode == "absolute":
                 # Convert any paths to absolute
-                contents = self.convert_paths_to_absolute(file_path, contents)
-            return json.loads(contents)
+                data = self.convert_paths_to_absolute(file_path, data)
+            return data
         except RuntimeError as ex:
             log.error(str(ex))
             raise
@@ -203,170 +215,202 @@ class JsonDataStore:
             raise Exception(msg) from ex
         raise Exception("Unknown error (should be unreachable)")
 
-    def write_to_file(self, file_path, data, path_mode="ignore", previous_path=None):
-        """ Save JSON settings to a file """
+    def write_to_file(self, file_path, data, path_mode="ignore", previous_path=None, progress=None):
+        """ Save JSON settings to a file. The file is written to a temporary file first, and then
+        renamed over the target file, so the target is never left partially written.
+        progress: optional callback, invoked with the percent complete (0 to 100). """
+        temp_path = None
         try:
-            contents = json.dumps(data, ensure_ascii=False, indent=1)
+            if progress:
+                progress(0)
             if path_mode == "relative":
                 # Convert any paths to relative
-                contents = self.convert_paths_to_relative(file_path, previous_path, contents)
-            with open(file_path, 'w', encoding='utf-8') as f:
+                data = self.convert_paths_to_relative(file_path, previous_path, data)
+            if progress:
+                progress(20)
+            contents = json.dumps(data, ensure_ascii=False, indent=1)
+            if progress:
+                progress(60)
+
+            # Write to a temp file (in the same folder), and atomically replace the target file
+            folder_path, file_name = os.path.split(os.path.abspath(file_path))
+            fd, temp_path = tempfile.mkstemp(prefix=".%s." % file_name, suffix=".tmp", dir=folder_path)
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
                 f.write(contents)
+                f.flush()
+                os.fsync(f.fileno())
+            if os.path.exists(file_path):
+                shutil.copymode(file_path, temp_path)
+            os.replace(temp_path, file_path)
+            temp_path = None
+            if progress:
+                progress(100)
         except Exception as ex:
             msg = "Couldn't save {} file:\n{}\n{}".format(self.data_type, file_path, ex)
             log.error(msg)
             raise ex
+        finally:
+            if temp_path and os.path.exists(temp_path):
+                # Remove incomplete temp file
+                os.unlink(temp_path)
+
+    def set_path_context(self, file_path, previous_path=None):
+        """ Set the project folders, used when converting paths for a project file """
+        path_context["new_project_folder"] = os.path.dirname(file_path)
+        path_context["new_project_assets"] = get_assets_path(file_path, create_paths=False)
+        path_context["existing_project_folder"] = os.path.dirname(file_path)
+        path_context["existing_project_assets"] = get_assets_path(file_path, create_paths=False)
+        if previous_path and file_path != previous_path:
+            path_context["existing_project_folder"] = os.path.dirname(previous_path)
+            path_context["existing_project_assets"] = get_assets_path(previous_path, create_paths=False)
+
+    def convert_path_values(self, data, convert):
+        """ Convert the value of every path key (i.e. path, image) found in the data.
+        The data is not modified: objects with converted paths are copied (along with
+        their parents), and all other objects are shared with the original data. """
+        if isinstance(data, dict):
+            new_data = None
+            for key, value in data.items():
+                if key in PATH_KEYS and isinstance(value, str):
+                    new_value = convert(value)
+                elif isinstance(value, (dict, list)):
+                    new_value = self.convert_path_values(value, convert)
+                else:
+                    continue
+                if new_value is not value:
+                    if new_data is None:
+                        new_data = dict(data)
+                    new_data[key] = new_value
+            return data if new_data is None else new_data
+
+        elif isinstance(data, list):
+            new_data = None
+            for index, value in enumerate(data):
+                if isinstance(value, (dict, list)):
+                    new_value = self.convert_path_values(value, convert)
+                    if new_value is not value:
+                        if new_data is None:
+                            new_data = list(data)
+                        new_data[index] = new_value
+            return data if new_data is None else new_data
 
-    def replace_string_to_absolute(self, match):
-        """Replace matched string for converting paths to relative paths"""
-        key = match.groups(0)[0]
-        path = match.groups(0)[1]
-
-        # Convert escaped path back into python str.
-        # Some characters, such as backslashes and quotes
-        # are escaped during the JSON dumps() conversion.
-        #   /Videos/quote \\"/  instead of  /Videos/quote "/
-        path = json.loads('"%s"' % path)
+        return data
 
+    def get_absolute_path(self, path, folders):
+        """ Convert a path (relative to the project folder) to an absolute path.
+        folders: dict of folders already converted for this project """
         # Find absolute path of file (if needed)
         if "@transitions" in path:
-            new_path = path.replace("@transitions", os.path.join(info.PATH, "transitions"))
-            new_path = json.dumps(new_path, ensure_ascii=False)
-            return '"%s": %s' % (key, new_path)
+            return path.replace("@transitions", os.path.join(info.PATH, "transitions"))
 
         elif "@colors" in path:
-            new_path = path.replace("@colors", os.path.join(info.COLORS_PATH))
-            new_path = json.dumps(new_path, ensure_ascii=False)
-            return '"%s": %s' % (key, new_path)
+            return path.replace("@colors", os.path.join(info.COLORS_PATH))
 
         elif "@emojis" in path:
-            new_path = path.replace("@emojis", os.path.join(info.PATH, "emojis", "color", "svg"))
-            new_path = json.dumps(new_path, ensure_ascii=False)
-            return '"%s": %s' % (key, new_path)
+            return path.replace("@emojis", os.path.join(info.PATH, "emojis", "color", "svg"))
 
         elif "@assets" in path:
-            new_path = path.replace("@assets", path_context["new_project_assets"])
-            new_path = json.dumps(new_path, ensure_ascii=False)
-            return '"%s": %s' % (key, new_path)
+            return path.replace("@assets", path_context["new_project_assets"])
 
-        else:
-            # Convert path to the correct relative path
-            new_path = os.path.abspath(os.path.join(path_context.get("new_project_folder", ""), path))
-            new_path = json.dumps(new_path, ensure_ascii=False)
-            return '"%s": %s' % (key, new_path)
+        folder_path, file_name = os.path.split(path)
+        if file_name in ("", os.curdir, os.pardir):
+            # Path doesn't end with a file name, convert the entire path
+            return os.path.abspath(os.path.join(path_context.get("new_project_folder", ""), path))
+
+        # Convert folder to the correct absolute path (once per folder)
+        abs_folder = folders.get(folder_path)
+        if abs_folder is None:
+            abs_folder = os.path.abspath(os.path.join(path_context.get("new_project_folder", ""), folder_path))
+            folders[folder_path] = abs_folder
+        return os.path.join(abs_folder, file_name)
 
     def convert_paths_to_absolute(self, file_path, data):
-        """ Convert all paths to absolute using regex """
+        """ Convert all paths to absolute, and return the converted data """
         try:
             # Get project folder
-            path_context["new_project_folder"] = os.path.dirname(file_path)
-            path_context["existing_project_folder"] = os.path.dirname(file_path)
-            path_context["new_project_assets"] = get_assets_path(file_path, create_paths=False)
-            path_context["existing_project_assets"] = get_assets_path(file_path, create_paths=False)
+            self.set_path_context(file_path)
 
-            # Optimized regex replacement
-            data = re.sub(path_regex, self.replace_string_to_absolute, data)
+            folders = {}
+            data = self.convert_path_values(data, lambda path: self.get_absolute_path(path, folders))
 
         except Exception:
             log.error("Error while converting relative paths to absolute paths", exc_info=1)
 
         return data
 
-    def replace_string_to_relative(self, match):
-        """Replace matched string for converting paths to relative paths"""
-        key = match.groups(0)[0]
-        path = match.groups(0)[1]
-
-        # Convert escaped path back into python str.
-        # Some characters, such as backslashes and quotes
-        # are escaped during the JSON dumps() conversion.
-        #   /Videos/quote \\"/  instead of  /Videos/quote "/
-        path = json.loads('"%s"' % path)
-
-        # Split path into folder and file
-        folder_path, file_path = os.path.split(os.path.abspath(path))
-
+    def get_relative_folder(self, folder_path, file_win_drive):
+        """ Convert an absolute folder to a folder relative to the project (or an @ folder).
+        Returns the new folder, and the path separator to replace with / """
         # Determine if thumbnail path is found
         if info.THUMBNAIL_PATH in folder_path:
-            log.debug("Generating relative thumbnail path to %s in %s",
-                      file_path, folder_path)
-            new_path = os.path.join("thumbnail", file_path).replace("\\", "/")
-            new_path = json.dumps(new_path, ensure_ascii=False)
-            return '"%s": %s' % (key, new_path)
+            log.debug("Generating relative thumbnail path in %s", folder_path)
+            return "thumbnail", "\\"
 
         # Determine if @transitions path is found
         elif os.path.join(info.PATH, "transitions") in folder_path:
-            log.debug("Generating relative @transitions path for %s in %s",
-                      file_path, folder_path)
+            log.debug("Generating relative @transitions path in %s", folder_path)
             folder_path, category_path = os.path.split(folder_path)
 
             # Convert path to @transitions/ path
-            new_path = os.path.join("@transitions", category_path, file_path).replace("\\", "/")
-            new_path = json.dumps(new_path, ensure_ascii=False)
-            return '"%s": %s' % (key, new_path)
+            return os.path.join("@transitions", category_path), "\\"
 
         # Determine if @colors path is found
         elif info.COLORS_PATH in folder_path:
-            rel = os.path.relpath(os.path.join(folder_path, file_path), info.COLORS_PATH)
-            path = json.dumps(f"@colors/{rel.replace(os.sep, '/')}", ensure_ascii=False)
-            return f'"{key}": {path}'
+            rel = os.path.relpath(folder_path, info.COLORS_PATH)
+            if rel == os.curdir:
+                return "@colors", os.sep
+            return os.path.join("@colors", rel), os.sep
 
         # Determine if @emojis path is found
         elif os.path.join(info.PATH, "emojis") in folder_path:
-            log.debug("Generating relative @emojis path for %s in %s",
-                      file_path, folder_path)
-            new_path = os.path.join("@emojis", file_path).replace("\\", "/")
-            new_path = json.dumps(new_path, ensure_ascii=False)
-            return '"%s": %s' % (key, new_path)
+            log.debug("Generating relative @emojis path in %s", folder_path)
+            return "@emojis", "\\"
 
         # Determine if @assets path is found
         elif path_context["new_project_assets"] in folder_path:
-            log.debug("Replacing path to %s in %s", file_path, folder_path)
-            folder_path = folder_path.replace(path_context["new_project_assets"], "@assets")
+            log.debug("Replacing path in %s", folder_path)
 
             # Convert path to @assets/ path
-            new_path = os.path.join(folder_path, file_path).replace("\\", "/")
-            new_path = json.dumps(new_path, ensure_ascii=False)
-            return '"%s": %s' % (key, new_path)
-
-        # Find absolute path of file (if needed)
+            return folder_path.replace(path_context["new_project_assets"], "@assets"), "\\"
+
+        # Determine windows drives that the project and file are on
+        project_win_drive = os.path.splitdrive(path_context.get("new_project_folder", ""))[0]
+        if file_win_drive != project_win_drive:
+            log.debug("Drive mismatch, not making path relative: %s", folder_path)
+            # If the file is on different drive. Don't abbreviate the path.
+            return folder_path, "\\"
+
+        # Convert path to the correct relative path (based on the existing folder)
+        log.debug("Generating new relative path for %s", folder_path)
+        return os.path.relpath(folder_path, path_context.get("new_project_folder", "")), "\\"
+
+    def get_relative_path(self, path, folders):
+        """ Convert an absolute path to a path relative to the project folder.
+        folders: dict of folders already converted for this project """
+        folder_path, file_name = os.path.split(path)
+        if file_name in ("", os.curdir, os.pardir):
+            # Path doesn't end with a file name, convert the entire path
+            folder_path, file_name = os.path.split(os.path.abspath(path))
+            new_folder, separator = self.get_relative_folder(folder_path, os.path.splitdrive(path)[0])
         else:
-            # Convert path to the correct relative path (based on the existing folder)
-            orig_abs_path = os.path.abspath(path)
-
-            # Determine windows drives that the project and file are on
-            project_win_drive = os.path.splitdrive(path_context.get("new_project_folder", ""))[0]
-            file_win_drive = os.path.splitdrive(path)[0]
-            if file_win_drive != project_win_drive:
-                log.debug("Drive mismatch, not making path relative: %s", orig_abs_path)
-                # If the file is on different drive. Don't abbreviate the path.
-                clean_path = orig_abs_path.replace("\\", "/")
-                clean_path = json.dumps(clean_path, ensure_ascii=False)
-                return f"\"{key}\": {clean_path}"
-
-            # Remove file from abs path
-            orig_abs_folder = os.path.dirname(orig_abs_path)
-
-            log.debug("Generating new relative path for %s", orig_abs_path)
-            new_rel_path_folder = os.path.relpath(orig_abs_folder, path_context.get("new_project_folder", ""))
-            new_rel_path = os.path.join(new_rel_path_folder, file_path).replace("\\", "/")
-            new_rel_path = json.dumps(new_rel_path, ensure_ascii=False)
-            return '"%s": %s' % (key, new_rel_path)
+            # Convert folder (once per folder)
+            new_folder = folders.get(folder_path)
+            if new_folder is None:
+                new_folder = self.get_relative_folder(
+                    os.path.abspath(folder_path), os.path.splitdrive(folder_path)[0])
+                folders[folder_path] = new_folder
+            new_folder, separator = new_folder
+        return os.path.join(new_folder, file_name).replace(separator, "/")
 
     def convert_paths_to_relative(self, file_path, previous_path, data):
-        """ Convert all paths relative to this filepath """
+        """ Convert all paths relative to this filepath, and return the converted data
+        (the original data is not modified) """
         try:
             # Get project folder
-            path_context["new_project_folder"] = os.path.dirname(file_path)
-            path_context["new_project_assets"] = get_assets_path(file_path, create_paths=False)
-            path_context["existing_project_folder"] = os.path.dirname(file_path)
-            path_context["existing_project_assets"] = get_assets_path(file_path, create_paths=False)
-            if previous_path and file_path != previous_path:
-                path_context["existing_project_folder"] = os.path.dirname(previous_path)
-                path_context["existing_project_assets"] = get_assets_path(previous_path, create_paths=False)
-
-            # Optimized regex replacement
-            data = re.sub(path_regex, self.replace_string_to_relative, data)
+            self.set_path_context(file_path, previous_path)
+
+            folders = {}
+            data = self.convert_path_values(data, lambda path: self.get_relative_path(path, folders))
 
         except Exception:
             log.error("Error while converting absolute paths to relative paths", exc_info=1)
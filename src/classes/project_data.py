@@ -37,10 +37,14 @@ import json
 from classes import info
 from classes.app import get_app
 from classes.image_types import get_media_type
-from classes.json_data import JsonDataStore
+from classes.json_data import JsonDataStore, copy_data
+from classes.journal import ProjectJournal
+from classes.interval_index import IntervalIndex
+from classes.attribute_index import AttributeIndex
 from classes.logger import log
 from classes.updates import UpdateInterface
 from classes.assets import get_assets_path
+from classes.waveform_store import has_waveform
 from windows.views.find_file import find_missing_file
 from classes.convert_framerate import change_profile
 
@@ -63,6 +67,21 @@ class ProjectDataStore(JsonDataStore, UpdateInterface):
         # Track changes after save
         self.has_unsaved_changes = False
 
+        # Index of top-level collections (i.e. clips, effects, files), used to resolve
+        # {"id": ...} key parts without scanning. Format: {"clips": (list, {id: (position, object)})}
+        self._id_index = {}
+
+        # Index of timeline objects by layer and time range (built when first queried)
+        # Format: {"clips": IntervalIndex}
+        self._interval_index = {}
+
+        # Index of objects by attribute value (built when first queried)
+        # Format: {("files", "path"): AttributeIndex}
+        self._attribute_index = {}
+
+        # Append-only journal of changes (for incremental saves)
+        self.journal = ProjectJournal()
+
         # Load default project data on creation
         self.new()
 
@@ -71,7 +90,8 @@ class ProjectDataStore(JsonDataStore, UpdateInterface):
         return self.has_unsaved_changes
 
     def get(self, key):
-        """Get copied value of a given key in data store"""
+        """Get value of a given key in data store. This is a reference to the project data, which
+        must be treated as read-only (use json_data.copy_data() to get a modifiable copy)."""
 
         # Verify key is valid type
         if not key:
@@ -95,6 +115,14 @@ class ProjectDataStore(JsonDataStore, UpdateInterface):
             # If key_part is a dictionary and obj is a list or dict, each key is tested as a property of the items in the current object
             # in the project data structure, and the first match is returned.
             if isinstance(key_part, dict) and isinstance(obj, list):
+                # Resolve top-level {"id": ...} key parts using the id index
+                if key_index == 1 and self._is_id_key(key_part):
+                    item_index = self._find_index_by_id(key[0], obj, key_part.get("id"))
+                    if item_index is None:
+                        return None
+                    obj = obj[item_index]
+                    continue
+
                 # Overall status of finding a matching sub-object
                 found = False
                 # Loop through each item in object to find match
@@ -148,12 +176,13 @@ class ProjectDataStore(JsonDataStore, UpdateInterface):
         raise RuntimeError("ProjectDataStore.set() is not allowed. Changes must route through UpdateManager.")
 
     def _set(self, key, values=None, add=False, remove=False):
-        """ Store setting, but adding isn't allowed. All possible settings must be in default settings file. """
+        """ Store setting, but adding isn't allowed. All possible settings must be in default settings file.
+        Objects stored below the top-level collections are never modified in place (copy-on-write), so
+        previously returned values remain valid snapshots and can be kept without copying them. """
 
         log.debug(
             "_set key: %s, values: %s, add: %s, remove: %s",
             key, values, add, remove)
-        parent, my_key = None, ""
 
         # Verify key is valid type
         if not isinstance(key, list):
@@ -166,6 +195,9 @@ class ProjectDataStore(JsonDataStore, UpdateInterface):
         # Get reference to internal data structure
         obj = self._data
 
+        # List of (container, key) pairs from the root to the matching item
+        path = []
+
         # Iterate through key list finding sub-objects either by name or by an object match criteria such as {"id":"ADB34"}.
         for key_index in range(len(key)):
             key_part = key[key_index]
@@ -180,25 +212,35 @@ class ProjectDataStore(JsonDataStore, UpdateInterface):
             if isinstance(key_part, dict) and isinstance(obj, list):
                 # Overall status of finding a matching sub-object
                 found = False
-                # Loop through each item in object to find match
-                for item_index in range(len(obj)):
-                    item = obj[item_index]
-                    # True until something disqualifies this as a match
-                    match = True
-                    # Check each key in key_part dictionary and if not found to be equal as a property in item, move on to next item in list
-                    for subkey in key_part.keys():
-                        # Get each key in dictionary (i.e. "id", "layer", etc...)
-                        subkey = subkey.lower()
-                        # If object is missing the key or the values differ, then it doesn't match.
-                        if not (subkey in item and item[subkey] == key_part[subkey]):
-                            match = False
-                            break
-                    # If matched, set key_part to index of list or dict and stop loop
-                    if match:
+
+                # Resolve top-level {"id": ...} key parts using the id index
+                if key_index == 1 and self._is_id_key(key_part):
+                    item_index = self._find_index_by_id(key[0], obj, key_part.get("id"))
+                    if item_index is not None:
                         found = True
-                        obj = item
-                        my_key = item_index
-                        break
+                        path.append((obj, item_index))
+                        obj = obj[item_index]
+
+                else:
+                    # Loop through each item in object to find match
+                    for item_index in range(len(obj)):
+                        item = obj[item_index]
+                        # True until something disqualifies this as a match
+                        match = True
+                        # Check each key in key_part dictionary and if not found to be equal as a property in item, move on to next item in list
+                        for subkey in key_part.keys():
+                            # Get each key in dictionary (i.e. "id", "layer", etc...)
+                            subkey = subkey.lower()
+                            # If object is missing the key or the values differ, then it doesn't match.
+                            if not (subkey in item and item[subkey] == key_part[subkey]):
+                                match = False
+                                break
+                        # If matched, set key_part to index of list or dict and stop loop
+                        if match:
+                            found = True
+                            path.append((obj, item_index))
+                            obj = item
+                            break
                 # No match found, return None
                 if not found:
                     return None
@@ -220,42 +262,73 @@ class ProjectDataStore(JsonDataStore, UpdateInterface):
                     return None
 
                 # Get sub-object based on part key as new object, continue to next part
+                path.append((obj, key_part))
                 obj = obj[key_part]
-                my_key = key_part
-
-
-            # Set parent to the last set obj (if not final iteration)
-            if key_index < (len(key) - 1) or key_index == 0:
-                parent = obj
 
-
-        # After processing each key, we've found object and parent, return former value/s on update
-        ret = json.loads(json.dumps(obj))
-
-        # Apply the correct action to the found item
+        # Apply the correct action to the found item. The former value is
+        # replaced (not modified), so it can be returned without a copy.
         if remove:
-            del parent[my_key]
-
-        else:
-
-            # Add or Full Update
-            # For adds to list perform an insert to index or the end if not specified
-            if add and isinstance(parent, list):
-                parent.append(values)
-
-            # Otherwise, set the given index
-            elif isinstance(values, dict):
-                # Update existing dictionary value
-                obj.update(values)
-
+            ret = obj
+            self._write_path(path, None, remove=True)
+
+        elif add and isinstance(obj, list):
+            # Nothing is replaced when adding to a list
+            ret = None
+            if len(path) == 1:
+                # Append to top-level collection, and index the new item
+                obj.append(values)
+                self._add_to_index(key[0], obj)
+                self._update_query_indexes(key[0], obj, None, values)
             else:
+                self._write_path(path, obj + [values])
 
-                # Update root string
-                self._data[my_key] = values
+        elif isinstance(values, dict) and isinstance(obj, dict):
+            # Update existing dictionary value
+            ret = obj
+            new_obj = dict(obj)
+            new_obj.update(values)
+            self._write_path(path, new_obj)
+
+        else:
+            # Replace value
+            ret = obj
+            self._write_path(path, values)
 
         # Return the previous value to the matching item (used for history tracking)
         return ret
 
+    def _write_path(self, path, value, remove=False):
+        """Store a value at the end of a path of (container, key) pairs. The root data and
+        top-level collections are modified in place, all other containers are copied."""
+        for path_index in range(len(path) - 1, -1, -1):
+            container, container_key = path[path_index]
+            in_place = path_index == 0 or (path_index == 1 and isinstance(container, list))
+            if not in_place:
+                container = copy.copy(container)
+
+            previous = container[container_key]
+            if remove:
+                del container[container_key]
+            else:
+                container[container_key] = value
+
+            if in_place:
+                # Keep id index of top-level collections up to date
+                if path_index == 1:
+                    collection = path[0][1]
+                    if remove:
+                        removed_id = previous.get("id") if isinstance(previous, dict) else None
+                        self._remove_from_index(collection, container, container_key, removed_id)
+                        self._update_query_indexes(collection, container, previous, None)
+                    else:
+                        self._replace_in_index(collection, container, container_key)
+                        self._update_query_indexes(collection, container, previous, value)
+                break
+
+            # Store copied container in its parent
+            value = container
+            remove = False
+
     # Load default project data
     def new(self):
         """ Try to load default project settings file, will raise error on failure """
@@ -281,6 +354,9 @@ class ProjectDataStore(JsonDataStore, UpdateInterface):
         self.current_filepath = None
         self.has_unsaved_changes = False
 
+        # Stop recording changes for the previous project (if any)
+        self.journal.stop()
+
         # Reset info paths back to their default/initial values
         info.reset_userdirs()
 
@@ -376,6 +452,7 @@ class ProjectDataStore(JsonDataStore, UpdateInterface):
         """ Load project from file """
 
         self.new()
+        journal_count = None
 
         if file_path:
             log.info("Loading project file: %s", file_path)
@@ -394,7 +471,7 @@ class ProjectDataStore(JsonDataStore, UpdateInterface):
                 # If project has waveforms, enable removing waveforms
                 get_app().window.actionClearWaveformData.setEnabled(False)
                 for file in project_data["files"]:
-                    if file.get("ui",{}).get("audio_data", []):
+                    if has_waveform(file):
                         get_app().window.actionClearWaveformData.setEnabled(True)
                         break
 
@@ -419,6 +496,7 @@ class ProjectDataStore(JsonDataStore, UpdateInterface):
                 info.TITLE_PATH = os.path.join(get_assets_path(self.current_filepath), "title")
                 info.BLENDER_PATH = os.path.join(get_assets_path(self.current_filepath), "blender")
                 info.PROTOBUF_DATA_PATH = os.path.join(get_assets_path(self.current_filepath), "protobuf_data")
+                info.WAVEFORM_PATH = os.path.join(get_assets_path(self.current_filepath), "waveform")
 
             # Clear needs save flag
             self.has_unsaved_changes = False
@@ -426,12 +504,12 @@ class ProjectDataStore(JsonDataStore, UpdateInterface):
             # Check if paths are all valid
             self.check_if_paths_are_valid()
 
-            # Clear old thumbnails
-            openshot_thumbnails = info.get_default_path("THUMBNAIL_PATH")
-            if os.path.exists(openshot_thumbnails) and clear_thumbnails:
-                # Clear thumbnails
-                shutil.rmtree(openshot_thumbnails, True)
-                os.mkdir(openshot_thumbnails)
+            # Clear old thumbnails and waveforms
+            if clear_thumbnails:
+                for temp_dir in [info.get_default_path("THUMBNAIL_PATH"), info.get_default_path("WAVEFORM_PATH")]:
+                    if os.path.exists(temp_dir):
+                        shutil.rmtree(temp_dir, True)
+                        os.mkdir(temp_dir)
 
             # Add to recent files setting
             self.add_to_recent_files(file_path)
@@ -449,9 +527,16 @@ class ProjectDataStore(JsonDataStore, UpdateInterface):
             # Apply default audio playback settings to this data structure
             self.apply_default_audio_settings()
 
+            # Apply any changes journaled since the project was last saved
+            journal_count = self.journal.replay(file_path, self)
+
         # Get app, and distribute all project data through update manager
         get_app().updates.load(self._data)
 
+        # Continue recording changes into the existing journal (if any)
+        if file_path and journal_count is not None:
+            self.journal.resume(file_path, journal_count)
+
     def rescale_keyframes(self, scale_factor):
         """Adjust all keyframe coordinates from previous FPS to new FPS (using a scale factor)
            and return scaled project data without modifing the current project."""
@@ -867,6 +952,14 @@ class ProjectDataStore(JsonDataStore, UpdateInterface):
 
     def save(self, file_path, backup_only=False):
         """ Save project file to disk """
+        previous_path = self.current_filepath
+        snapshot = self.prepare_save(file_path, backup_only)
+        self.write_snapshot(file_path, snapshot, backup_only, previous_path)
+        self.finish_save(file_path, backup_only)
+
+    def prepare_save(self, file_path, backup_only=False):
+        """ Prepare the project data for saving, and return a snapshot of it. This must be called
+        on the main thread, but the snapshot can then be written on any thread (see write_snapshot). """
         import openshot
 
         log.info("Saving project file: %s", file_path)
@@ -880,14 +973,50 @@ class ProjectDataStore(JsonDataStore, UpdateInterface):
         self._data["version"] = {"openshot-qt": info.VERSION,
                                  "libopenshot": openshot.OPENSHOT_VERSION_FULL}
 
-        # Try to save project settings file, will raise error on failure
-        self.write_to_file(
-            file_path,
-            self._data,
-            path_mode="ignore" if backup_only else "relative",
-            previous_path=self.current_filepath if not backup_only else None)
+        if not backup_only:
+            # Any changes after this point are not part of the snapshot
+            self.has_unsaved_changes = False
+
+            # Record changes made after this snapshot into a new journal (if enabled)
+            if get_app().get_settings().get("enable-project-journal"):
+                self.journal.start(file_path)
+            else:
+                self.journal.stop()
+
+        return self.snapshot()
+
+    def snapshot(self):
+        """ Get a consistent snapshot of the project data, which remains unchanged by later updates.
+        Objects below the top-level collections are never modified in place (see _set), so only
+        the root dictionary and the top-level collections need to be copied. """
+        return {key: list(value) if isinstance(value, list) else value
+                for key, value in self._data.items()}
 
+    def write_snapshot(self, file_path, snapshot, backup_only=False, previous_path=None, progress=None):
+        """ Serialize and write a snapshot of the project data to disk (safe to call on any thread) """
+        try:
+            # Try to save project settings file, will raise error on failure
+            self.write_to_file(
+                file_path,
+                snapshot,
+                path_mode="ignore" if backup_only else "relative",
+                previous_path=previous_path if not backup_only else None,
+                progress=progress)
+        except Exception:
+            if not backup_only:
+                # Snapshot was not saved
+                self.has_unsaved_changes = True
+            raise
+
+    def finish_save(self, file_path, backup_only=False):
+        """ Update the project state after a snapshot was successfully written (on the main thread) """
         if not backup_only:
+            # Start writing the journal for this snapshot (or remove the outdated one)
+            if self.journal.is_active(file_path):
+                self.journal.commit(file_path)
+            else:
+                self.journal.remove(file_path)
+
             # On success, save current filepath
             self.current_filepath = file_path
 
@@ -895,9 +1024,9 @@ class ProjectDataStore(JsonDataStore, UpdateInterface):
             info.THUMBNAIL_PATH = os.path.join(get_assets_path(self.current_filepath), "thumbnail")
             info.TITLE_PATH = os.path.join(get_assets_path(self.current_filepath), "title")
             info.BLENDER_PATH = os.path.join(get_assets_path(self.current_filepath), "blender")
+            info.WAVEFORM_PATH = os.path.join(get_assets_path(self.current_filepath), "waveform")
 
             self.add_to_recent_files(file_path)
-            self.has_unsaved_changes = False
 
     def move_temp_paths_to_project_folder(self, file_path, previous_path=None):
         """ Move all temp files (such as Thumbnails, Titles, and Blender animations) to the project asset folder. """
@@ -908,11 +1037,12 @@ class ProjectDataStore(JsonDataStore, UpdateInterface):
             target_title_path = os.path.join(asset_path, "title")
             target_blender_path = os.path.join(asset_path, "blender")
             target_protobuf_path = os.path.join(asset_path, "protobuf_data")
+            target_waveform_path = os.path.join(asset_path, "waveform")
 
             # Create any missing target paths
             try:
                 for target_dir in [asset_path, target_thumb_path, target_title_path,
-                                   target_blender_path, target_protobuf_path]:
+                                   target_blender_path, target_protobuf_path, target_waveform_path]:
                     if not os.path.exists(target_dir):
                         os.mkdir(target_dir)
             except OSError:
@@ -926,6 +1056,7 @@ class ProjectDataStore(JsonDataStore, UpdateInterface):
                 info.TITLE_PATH = os.path.join(previous_asset_path, "title")
                 info.BLENDER_PATH = os.path.join(previous_asset_path, "blender")
                 info.PROTOBUF_DATA_PATH = os.path.join(previous_asset_path, "protobuf_data")
+                info.WAVEFORM_PATH = os.path.join(previous_asset_path, "waveform")
 
             # Track assets we copy/update
             copied = []
@@ -959,8 +1090,19 @@ class ProjectDataStore(JsonDataStore, UpdateInterface):
                 if not os.path.exists(target_protobuf_filepath):
                     shutil.copy2(working_protobuf_path, target_protobuf_filepath)
 
-            # Copy any necessary assets for File records
-            for file in self._data["files"]:
+            # Copy all waveform files (if not found in target asset folder)
+            if os.path.exists(info.WAVEFORM_PATH):
+                for waveform_path in os.listdir(info.WAVEFORM_PATH):
+                    working_waveform_path = os.path.join(info.WAVEFORM_PATH, waveform_path)
+                    target_waveform_filepath = os.path.join(target_waveform_path, waveform_path)
+                    if not os.path.exists(target_waveform_filepath):
+                        shutil.copy2(working_waveform_path, target_waveform_filepath)
+
+            # Copy any necessary assets for File records. Changed files and clips are replaced by
+            # copies (their dicts may be shared with the undo history, so they are not modified in place).
+            files = self._data["files"]
+            for index, file in enumerate(files):
+                file = files[index] = dict(file)
                 path = file["path"]
                 file_id = file["id"]
 
@@ -997,7 +1139,9 @@ class ProjectDataStore(JsonDataStore, UpdateInterface):
                     log.info("Set file %s path to %s", file_id, new_asset_path)
 
             # Copy all Clip thumbnails and update reader paths
-            for clip in self._data["clips"]:
+            clips = self._data["clips"]
+            for index, clip in enumerate(clips):
+                clip = clips[index] = dict(clip)
                 file_id = clip["file_id"]
                 clip_id = clip["id"]
 
@@ -1008,22 +1152,29 @@ class ProjectDataStore(JsonDataStore, UpdateInterface):
                 # Update paths to files stored in our working space or old path structure
                 # (should have already been copied during previous File stage)
                 if file_id and file_id in reader_paths:
-                    clip["reader"]["path"] = reader_paths[file_id]
+                    clip["reader"] = dict(clip["reader"], path=reader_paths[file_id])
                     log.info("Updated clip %s path for file %s", clip_id, file_id)
 
                 log.info("Checking effects in clip %s path for protobuf files" % clip_id)
+                effects = []
                 for effect in clip.get("effects", []):
                     if "protobuf_data_path" in effect:
                         old_protobuf_path = effect["protobuf_data_path"]
                         old_protobuf_dir, protobuf_name = os.path.split(old_protobuf_path)
                         if old_protobuf_dir != target_protobuf_path:
-                            effect["protobuf_data_path"] = os.path.join(target_protobuf_path, protobuf_name)
+                            effect = dict(effect, protobuf_data_path=os.path.join(target_protobuf_path, protobuf_name))
                             log.info("Copied protobuf %s to %s", old_protobuf_path, target_protobuf_path)
+                    effects.append(effect)
+                if "effects" in clip:
+                    clip["effects"] = effects
 
         except Exception:
             log.error(
                 "Error while moving temp paths to project assets folder %s",
                 asset_path, exc_info=1)
+        finally:
+            # Files and clips were replaced
+            self._clear_query_indexes()
 
     def add_to_recent_files(self, file_path):
         """ Add this project to the recent files list """
@@ -1098,6 +1249,9 @@ class ProjectDataStore(JsonDataStore, UpdateInterface):
                     log.info('Removed missing clip: %s', file_name_with_ext)
                     self._data["clips"].remove(clip)
 
+        # Paths were modified in place
+        self._clear_query_indexes()
+
     def changed(self, action):
         """ This method is invoked by the UpdateManager each time a change happens (i.e UpdateInterface) """
         if action.type == "insert":
@@ -1123,6 +1277,11 @@ class ProjectDataStore(JsonDataStore, UpdateInterface):
                     old_fps_float = float(old_vals["num"]) / float(old_vals["den"])
                     fps_factor = float(new_fps_float / old_fps_float)
 
+                    # Copy affected collections, since the following changes modify objects in place
+                    # (and previously returned project data, such as snapshots, must not change)
+                    for collection in ["clips", "effects", "files"]:
+                        self._data[collection] = copy_data(self._data.get(collection, []))
+
                     if fps_factor != 1.0:
                         log.info(f"Convert {old_fps_float} FPS to {new_fps_float} FPS (profile: {profile.ShortName()})")
                         # Snap to new FPS grid (start, end, duration)
@@ -1161,7 +1320,170 @@ class ProjectDataStore(JsonDataStore, UpdateInterface):
 
         elif action.type == "load":
             # Don't track unsaved changes when loading a project
-            pass
+            # Rebuild all id indexes (the entire data structure was replaced)
+            self._id_index.clear()
+            self._clear_query_indexes()
+
+    def _is_id_key(self, key_part):
+        """Check if a key part only matches on the "id" attribute (i.e. {"id": "ADB34"})"""
+        return len(key_part) == 1 and "id" in key_part
+
+    def _build_index(self, collection, items):
+        """Index all items of a top-level collection by id, and return the index"""
+        positions = {}
+        for item_index, item in enumerate(items):
+            if isinstance(item, dict) and "id" in item and item["id"] not in positions:
+                positions[item["id"]] = (item_index, item)
+        self._id_index[collection] = (items, positions, len(items))
+        return positions
+
+    def _get_index(self, collection, items):
+        """Get the id index of a top-level collection (rebuilding it if the list was replaced)"""
+        indexed_items, positions, length = self._id_index.get(collection, (None, None, 0))
+        if indexed_items is not items or length != len(items):
+            # List was replaced (or items were added or removed directly)
+            positions = self._build_index(collection, items)
+        return positions
+
+    def _find_index_by_id(self, collection, items, item_id):
+        """Find the list position of an item in a top-level collection by id (or None)"""
+        positions = self._get_index(collection, items)
+        item_index, item = positions.get(item_id, (None, None))
+
+        # Verify indexed entry is still valid (the list may have been modified directly)
+        if item_index is not None and item_index < len(items) \
+                and items[item_index] is item and item.get("id") == item_id:
+            return item_index
+
+        if item_index is None:
+            # Id not found (the index is up to date)
+            return None
+
+        # Indexed item doesn't match (the list was modified directly), rebuild once and retry
+        positions = self._build_index(collection, items)
+        item_index, item = positions.get(item_id, (None, None))
+        return item_index
+
+    def _add_to_index(self, collection, items):
+        """Add the last appended item of a top-level collection to the id index"""
+        indexed_items, positions, length = self._id_index.get(collection, (None, None, 0))
+        if indexed_items is not items or length != len(items) - 1:
+            # Not indexed (or stale), index all items
+            self._build_index(collection, items)
+            return
+        item = items[-1]
+        if isinstance(item, dict) and "id" in item and item["id"] not in positions:
+            positions[item["id"]] = (len(items) - 1, item)
+        self._id_index[collection] = (items, positions, len(items))
+
+    def _replace_in_index(self, collection, items, item_index):
+        """Update the id index of a top-level collection after an item is replaced"""
+        indexed_items, positions, length = self._id_index.get(collection, (None, None, 0))
+        item = items[item_index]
+        if indexed_items is items and isinstance(item, dict) and "id" in item:
+            positions[item["id"]] = (item_index, item)
+
+    def _remove_from_index(self, collection, items, removed_index, removed_id):
+        """Update the id index of a top-level collection after an item is removed"""
+        indexed_items, positions, length = self._id_index.get(collection, (None, None, 0))
+        if indexed_items is not items or length != len(items) + 1:
+            # Not indexed yet (or stale), nothing to update
+            self._id_index.pop(collection, None)
+            return
+
+        # Remove deleted id, and shift the positions of all following items
+        positions.pop(removed_id, None)
+        for item_index in range(removed_index, len(items)):
+            item = items[item_index]
+            if isinstance(item, dict) and "id" in item:
+                positions[item["id"]] = (item_index, item)
+        self._id_index[collection] = (items, positions, len(items))
+
+    def _update_query_indexes(self, collection, items, old_item, new_item):
+        """Update the interval and attribute indexes of a top-level collection after an item is
+        added, replaced, or removed"""
+        indexes = [self._interval_index.get(collection)]
+        indexes.extend(index for (index_collection, attribute), index in self._attribute_index.items()
+                       if index_collection == collection)
+        for index in indexes:
+            if not index or index.items is not items:
+                # Not indexed (or the list was replaced), nothing to update
+                continue
+            if old_item is not None:
+                index.remove(old_item)
+            if new_item is not None:
+                index.add(new_item)
+
+    def _clear_query_indexes(self):
+        """Clear the interval and attribute indexes (needed when project data is modified in place)"""
+        self._interval_index.clear()
+        self._attribute_index.clear()
+
+    def _sort_indexed_items(self, collection, items, found):
+        """Sort objects found using an index into project order. Returns None if any object
+        is no longer in the list (i.e. the list was modified directly, and the index is stale)"""
+        item_indexes = []
+        for item in found:
+            item_index = self._find_index_by_id(collection, items, item["id"])
+            if item_index is None or items[item_index] is not item:
+                return None
+            item_indexes.append(item_index)
+        return [items[item_index] for item_index in sorted(item_indexes)]
+
+    def find_intersecting(self, collection, start, end=None, layer=None):
+        """Find all objects of a top-level collection (i.e. clips) which intersect a time range
+        [start, end] (in seconds), on a layer (or all layers). Objects are returned in project order,
+        and must not be modified (see get())."""
+        items = self._data.get(collection)
+        if not isinstance(items, list):
+            return []
+        if end is None:
+            end = start
+
+        for attempt in range(2):
+            index = self._interval_index.get(collection)
+            if not index or not index.is_current(items):
+                index = IntervalIndex(items)
+                self._interval_index[collection] = index
+
+            found = self._sort_indexed_items(collection, items, index.query(start, end, layer))
+            if found is not None:
+                return found
+
+            # Index is stale, rebuild once and retry
+            self._interval_index.pop(collection, None)
+
+        # Index can't be used (i.e. duplicate ids), check every object
+        return [item for item in items if IntervalIndex.matches(item, start, end, layer)]
+
+    def find_by(self, collection, attribute, value):
+        """Find the objects of a top-level collection (i.e. files) which may have an attribute value
+        (i.e. path). Objects without the attribute are included, and must be checked by the caller.
+        Objects are returned in project order, and must not be modified (see get())."""
+        items = self._data.get(collection)
+        if not isinstance(items, list):
+            return []
+        try:
+            hash(value)
+        except TypeError:
+            # Unhashable values can't be indexed
+            return list(items)
+
+        for attempt in range(2):
+            index = self._attribute_index.get((collection, attribute))
+            if not index or not index.is_current(items):
+                index = AttributeIndex(items, attribute)
+                self._attribute_index[(collection, attribute)] = index
+
+            found = self._sort_indexed_items(collection, items, index.query(value))
+            if found is not None:
+                return found
+
+            # Index is stale, rebuild once and retry
+            self._attribute_index.pop((collection, attribute), None)
+
+        # Index can't be used (i.e. duplicate ids)
+        return list(items)
 
     # Utility methods
     def generate_id(self, digits=10):
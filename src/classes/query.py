@@ -32,20 +32,52 @@ import openshot
 
 from classes import info
 from classes.app import get_app
+from classes.json_data import copy_data
 
 
 class QueryObject:
     """ This class allows one or more project data objects to be queried """
+    indexed_attributes = []  # Derived classes can list attributes to index (used by filter)
 
     def __init__(self):
         """ Constructor """
 
         self.id = None  # Unique ID of object
         self.key = None  # Key path to object in project data
-        self.data = None  # Data dictionary of object
+        self._data = None  # Data dictionary of object (copied from snapshot when first accessed)
+        self._snapshot = None  # Read-only project data of object (not copied)
         self.parent = None  # Only used with effects (who belong to clips)
         self.type = "insert"  # Type of operation needed to save
 
+    @property
+    def data(self):
+        """ Data dictionary of object (a modifiable copy of the project data) """
+        if self._data is None and self._snapshot is not None:
+            # Copy-on-access: only copy project data when it is needed
+            self._data = copy_data(self._snapshot)
+            self._snapshot = None
+        return self._data
+
+    @data.setter
+    def data(self, value):
+        self._data = value
+        self._snapshot = None
+
+    @property
+    def snapshot(self):
+        """ Read-only data dictionary of object (no copy). This must not be modified. """
+        if self._data is not None:
+            return self._data
+        return self._snapshot
+
+    def _release_data(self):
+        """ Hand the data dictionary over to the project data store (which never modifies it).
+        The next access of self.data will create a new copy. """
+        if self._data is not None:
+            self._snapshot = self._data
+            self._data = None
+        return self._snapshot
+
     def save(self, OBJECT_TYPE):
         """ Save the object back to the project data store """
 
@@ -56,15 +88,15 @@ class QueryObject:
             self.id = get_app().project.generate_id()
 
             # save id in data (if attribute found)
-            self.data["id"] = json.loads(json.dumps(self.id))
+            self.data["id"] = self.id
 
             # Set key (if needed)
             if not self.key:
-                self.key = json.loads(json.dumps(OBJECT_TYPE.object_key))
+                self.key = list(OBJECT_TYPE.object_key)
                 self.key.append({"id": self.id})
 
             # Insert into project data
-            get_app().updates.insert(json.loads(json.dumps(OBJECT_TYPE.object_key)), json.loads(json.dumps(self.data)))
+            get_app().updates.insert(list(OBJECT_TYPE.object_key), self._release_data())
 
             # Mark record as 'update' now... so another call to this method won't insert it again
             self.type = "update"
@@ -72,7 +104,7 @@ class QueryObject:
         elif self.id and self.type == "update":
 
             # Update existing project data
-            get_app().updates.update(self.key, self.data)
+            get_app().updates.update(self.key, self._release_data())
 
     def delete(self, OBJECT_TYPE):
         """ Delete the object from the project data store """
@@ -91,8 +123,38 @@ class QueryObject:
     def filter(OBJECT_TYPE, **kwargs):
         """ Take any arguments given as filters, and find a list of matching objects """
 
-        # Get a list of all objects of this type
-        parent = get_app().project.get(OBJECT_TYPE.object_key)
+        # Find the first indexed attribute used as a filter (if any)
+        attribute = next((key for key in OBJECT_TYPE.indexed_attributes if key in kwargs), None)
+
+        if "intersect" in kwargs:
+            # Only check objects which intersect the position (using the interval index)
+            parent = get_app().project.find_intersecting(
+                OBJECT_TYPE.object_name, kwargs["intersect"], layer=kwargs.get("layer"))
+        elif isinstance(kwargs.get("id"), str):
+            # Find object by id (using the id index)
+            child = get_app().project.get([OBJECT_TYPE.object_name, {"id": kwargs["id"]}])
+            parent = [child] if child else []
+        elif attribute:
+            # Only check objects which may match the attribute (using an attribute index)
+            parent = get_app().project.find_by(OBJECT_TYPE.object_name, attribute, kwargs[attribute])
+        else:
+            # Get a list of all objects of this type
+            parent = get_app().project.get(OBJECT_TYPE.object_key)
+
+        return QueryObject.match(OBJECT_TYPE, parent, **kwargs)
+
+    def filter_range(OBJECT_TYPE, start, end, **kwargs):
+        """ Find a list of objects which intersect a time range [start, end] (in seconds), and match
+        any other arguments given as filters (i.e. layer) """
+
+        # Get a list of intersecting objects (using the interval index)
+        parent = get_app().project.find_intersecting(
+            OBJECT_TYPE.object_name, start, end, layer=kwargs.get("layer"))
+
+        return QueryObject.match(OBJECT_TYPE, parent, **kwargs)
+
+    def match(OBJECT_TYPE, parent, **kwargs):
+        """ Find a list of matching objects, from a list of project data objects """
 
         if not parent:
             return []
@@ -127,7 +189,7 @@ class QueryObject:
                 object = OBJECT_TYPE()
                 object.id = child["id"]
                 object.key = [OBJECT_TYPE.object_name, {"id": object.id}]
-                object.data = json.loads(json.dumps(child))  # copy of object
+                object._snapshot = child  # copied when data is first accessed
                 object.type = "update"
                 matching_objects.append(object)
 
@@ -150,6 +212,7 @@ class Clip(QueryObject):
     """ This class allows Clips to be queried, updated, and deleted from the project data. """
     object_name = "clips"  # Derived classes should define this
     object_key = [object_name]  # Derived classes should define this also
+    indexed_attributes = ["layer", "file_id"]  # Attributes indexed for faster filters
 
     def save(self):
         """ Save the object back to the project data store """
@@ -167,6 +230,11 @@ class Clip(QueryObject):
         """ Take any arguments given as filters, and find the first matching object """
         return QueryObject.get(Clip, **kwargs)
 
+    def filter_range(start, end, **kwargs):
+        """ Find a list of objects which intersect a time range [start, end] (in seconds), and match
+        any other arguments given as filters (i.e. layer) """
+        return QueryObject.filter_range(Clip, start, end, **kwargs)
+
     def title(self):
         """ Get the translated display title of this item """
         path = self.data.get("reader", {}).get("path")
@@ -176,6 +244,7 @@ class Transition(QueryObject):
     """ This class allows Transitions (i.e. timeline effects) to be queried, updated, and deleted from the project data. """
     object_name = "effects"  # Derived classes should define this
     object_key = [object_name]  # Derived classes should define this also
+    indexed_attributes = ["layer"]  # Attributes indexed for faster filters
 
     def save(self):
         """ Save the object back to the project data store """
@@ -193,6 +262,11 @@ class Transition(QueryObject):
         """ Take any arguments given as filters, and find the first matching object """
         return QueryObject.get(Transition, **kwargs)
 
+    def filter_range(start, end, **kwargs):
+        """ Find a list of objects which intersect a time range [start, end] (in seconds), and match
+        any other arguments given as filters (i.e. layer) """
+        return QueryObject.filter_range(Transition, start, end, **kwargs)
+
     def title(self):
         """ Get the translated display title of this item """
         path = self.data.get("reader", {}).get("path")
@@ -219,6 +293,7 @@ class File(QueryObject):
     """ This class allows Files to be queried, updated, and deleted from the project data. """
     object_name = "files"  # Derived classes should define this
     object_key = [object_name]  # Derived classes should define this also
+    indexed_attributes = ["path"]  # Attributes indexed for faster filters
 
     def save(self):
         """ Save the object back to the project data store """
@@ -312,6 +387,7 @@ class Track(QueryObject):
     """ This class allows Tracks to be queried, updated, and deleted from the project data. """
     object_name = "layers"  # Derived classes should define this
     object_key = [object_name]  # Derived classes should define this also
+    indexed_attributes = ["number"]  # Attributes indexed for faster filters
 
     def save(self):
         """ Save the object back to the project data store """
@@ -375,7 +451,7 @@ class Effect(QueryObject):
                             object = Effect()
                             object.id = child["id"]
                             object.key = ["clips", {"id": clip["id"]}, "effects", {"id": object.id}]
-                            object.data = json.loads(json.dumps(child))
+                            object._snapshot = child  # copied when data is first accessed
                             object.type = "update"
                             object.parent = clip
                             matching_objects.append(object)
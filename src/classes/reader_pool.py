@@ -0,0 +1,169 @@
+"""
+ @file
+ @brief This file contains a pool of open libopenshot readers (used to generate thumbnails)
+ @author Jonathan Thomas <jonathan@openshot.org>
+
+ @section LICENSE
+
+ Copyright (c) 2008-2024 OpenShot Studios, LLC
+ (http://www.openshotstudios.com). This file is part of
+ OpenShot Video Editor (http://www.openshot.org), an open-source project
+ dedicated to delivering high quality video editing and animation solutions
+ to the world.
+
+ OpenShot Video Editor is free software: you can redistribute it and/or modify
+ it under the terms of the GNU General Public License as published by
+ the Free Software Foundation, either version 3 of the License, or
+ (at your option) any later version.
+
+ OpenShot Video Editor is distributed in the hope that it will be useful,
+ but WITHOUT ANY WARRANTY; without even the implied warranty of
+ MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+ GNU General Public License for more details.
+
+ You should have received a copy of the GNU General Public License
+ along with OpenShot Library.  If not, see <http://www.gnu.org/licenses/>.
+ """
+
+import os
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from threading import Lock
+
+import openshot
+
+from classes.logger import log
+
+
+class PooledReader:
+    """ An open reader (and the clip which owns it), used by one thread at a time """
+
+    def __init__(self, file_path, signature):
+        self.file_path = file_path
+        self.signature = signature  # Size and modification time of the file, when opened
+        self.clip = None
+        self.reader = None
+        self.lock = Lock()  # Held while the reader is in use (or being closed)
+        self.closed = False
+        self.last_used = time.monotonic()
+        self.requests = 0
+        self.hits = 0  # Requests which reused the open reader
+
+    def open(self):
+        """ Open the reader (raises RuntimeError if the file is missing or not supported) """
+        self.clip = openshot.Clip(self.file_path)
+        self.reader = self.clip.Reader()
+        self.reader.Open()
+
+    def close(self):
+        """ Close the reader (waits for it to be released) """
+        with self.lock:
+            if self.closed:
+                return
+            self.closed = True
+            if self.reader:
+                self.reader.Close()
+            if self.clip:
+                self.clip.Close()
+            self.reader = None
+            self.clip = None
+        log.debug("Closed thumbnail reader for %s: %s requests, %.0f%% reused",
+                  self.file_path, self.requests, 100.0 * self.hits / max(self.requests, 1))
+
+
+class ReaderPool:
+    """ Least recently used pool of open readers, keyed by file path. Thumbnails of the same file
+    reuse its reader (and decoder state), instead of opening the file each time. Readers are
+    closed when idle for too long, when too many are open, or when their file changes. """
+
+    def __init__(self, max_open=8, idle_timeout=60.0):
+        self.max_open = max_open
+        self.idle_timeout = idle_timeout  # In seconds
+        self.entries = OrderedDict()  # {file_path: PooledReader}, least recently used first
+        self.lock = Lock()
+
+    @staticmethod
+    def get_signature(file_path):
+        """ Get the size and modification time of a file (or None if not found) """
+        try:
+            stat = os.stat(file_path)
+            return stat.st_size, stat.st_mtime_ns
+        except OSError:
+            return None
+
+    @contextmanager
+    def reader(self, file_path):
+        """ Use the open reader of a file (the reader is opened if needed) """
+        entry = self.checkout(file_path)
+        try:
+            yield entry.reader
+        finally:
+            entry.last_used = time.monotonic()
+            entry.lock.release()
+
+    def checkout(self, file_path):
+        """ Get the entry of a file, with its lock acquired and its reader open """
+        signature = self.get_signature(file_path)
+        while True:
+            closing = []
+            with self.lock:
+                entry = self.entries.get(file_path)
+                if entry and entry.signature != signature:
+                    # File changed since it was opened
+                    closing.append(self.entries.pop(file_path))
+                    entry = None
+                if entry:
+                    entry.hits += 1
+                else:
+                    entry = PooledReader(file_path, signature)
+                    self.entries[file_path] = entry
+                entry.requests += 1
+                self.entries.move_to_end(file_path)
+
+                # Close the least recently used readers (which are not in use)
+                for lru_entry in list(self.entries.values()):
+                    if len(self.entries) <= self.max_open:
+                        break
+                    if lru_entry is not entry and not lru_entry.lock.locked():
+                        closing.append(self.entries.pop(lru_entry.file_path))
+
+            for closing_entry in closing:
+                closing_entry.close()
+
+            entry.lock.acquire()
+            if entry.closed:
+                # Closed by another thread before it could be used, try again
+                entry.lock.release()
+                continue
+
+            if not entry.reader:
+                try:
+                    entry.open()
+                except Exception:
+                    entry.closed = True
+                    entry.lock.release()
+                    with self.lock:
+                        if self.entries.get(file_path) is entry:
+                            self.entries.pop(file_path)
+                    raise
+            return entry
+
+    def close_idle(self):
+        """ Close the readers which have not been used recently """
+        now = time.monotonic()
+        with self.lock:
+            idle = [entry for entry in self.entries.values()
+                    if not entry.lock.locked() and now - entry.last_used > self.idle_timeout]
+            for entry in idle:
+                self.entries.pop(entry.file_path)
+        for entry in idle:
+            entry.close()
+
+    def close_all(self):
+        """ Close all readers """
+        with self.lock:
+            entries = list(self.entries.values())
+            self.entries.clear()
+        for entry in entries:
+            entry.close()
@@ -25,20 +25,30 @@
  along with OpenShot Library.  If not, see <http://www.gnu.org/licenses/>.
  """
 
+import hashlib
+import json
 import os
 import re
-import openshot
+import queue
 import socket
-import time
 import shutil
-from requests import get
-from threading import Thread
+import tempfile
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import partial
+from threading import Thread, Lock
 from classes import info
 from classes.query import File
 from classes.logger import log
 from classes.app import get_app
+from classes.reader_pool import ReaderPool
+from classes.thumbnail_cache import ThumbnailCache, THUMBNAIL_FORMATS, get_content_type
+from classes.waveform_store import read_waveform_bytes
 from http.server import BaseHTTPRequestHandler, HTTPServer
-from socketserver import ThreadingMixIn
+from urllib.parse import parse_qs
+
+from PyQt5.QtCore import QObject, Qt, pyqtSignal
+from PyQt5.QtGui import QImage, QImageWriter, QPainter
 
 # Regex for parsing URLs: (examples)
 #  http://127.0.0.1:33723/thumbnails/9ATJTBQ71V/1/path/no-cache/
@@ -48,54 +58,148 @@ from socketserver import ThreadingMixIn
 #  http://127.0.0.1:33723/thumbnails/9ATJTBQ71V/1
 REGEX_THUMBNAIL_URL = re.compile(r"/thumbnails/(?P<file_id>.+?)/(?P<file_frame>\d+)/*(?P<only_path>path)?/*(?P<no_cache>no-cache)?")
 
+# Regex for parsing waveform URLs: (examples)
+#  http://127.0.0.1:33723/waveforms/9ATJTBQ71V-all
+#  http://127.0.0.1:33723/waveforms/clip-9ATJTBQ71V?v=1a2b3c4d
+REGEX_WAVEFORM_URL = re.compile(r"/waveforms/(?P<waveform_id>[A-Za-z0-9_-]+)/?(\?.*)?$")
 
-def GetThumbPath(file_id, thumbnail_frame, clear_cache=False):
-    """Get thumbnail path by invoking HTTP thumbnail request"""
-
-    # Clear thumb cache (if requested)
-    thumb_cache = ""
-    if clear_cache:
-        thumb_cache = "no-cache/"
-
-    # Connect to thumbnail server and get image
-    thumb_server_details = get_app().window.http_server_thread.server_address
-    thumb_address = "http://%s:%s/thumbnails/%s/%s/path/%s" % (
-        thumb_server_details[0],
-        thumb_server_details[1],
-        file_id,
-        thumbnail_frame,
-        thumb_cache)
-    r = get(thumb_address)
-    if r.ok:
-        # Update thumbnail path to real one
-        return r.text
-    else:
-        return ''
+# Regex for parsing filmstrip URLs: (examples)
+#  http://127.0.0.1:33723/filmstrips/9ATJTBQ71V/?frames=1,25,49&tile=68x38
+#  http://127.0.0.1:33723/filmstrips/9ATJTBQ71V/?start=1&step=24&count=20&tile=136x76
+REGEX_FILMSTRIP_URL = re.compile(r"/filmstrips/(?P<file_id>[^/?]+)/?(\?(?P<query>.*))?$")
 
+# Limits of filmstrip requests: number of frames, tile size and sprite sheet width (in pixels)
+FILMSTRIP_MAX_FRAMES = 240
+FILMSTRIP_MAX_TILE_SIZE = 512
+FILMSTRIP_MAX_WIDTH = 8192
+
+# Number of threads handling thumbnail requests, and number of requests which can wait for them
+THUMBNAIL_WORKERS = max(2, min(4, os.cpu_count() or 1))
+THUMBNAIL_QUEUE_SIZE = 512
+
+# Thumbnails being generated: {thumbnail path: Future}
+thumbnail_generations = {}
+thumbnail_generations_lock = Lock()
+
+# Open readers of recently used files (shared by the worker threads)
+reader_pool = ReaderPool(max_open=8, idle_timeout=60.0)
+
+# Thumbnails shared by all projects
+thumbnail_cache = ThumbnailCache()
+
+# Thumbnail formats which Qt can write (checked when first needed)
+writable_formats = None
 
-def GenerateThumbnail(file_path, thumb_path, thumbnail_frame, width, height, mask, overlay):
-    """Create thumbnail image, and check for rotate metadata (if any)"""
-    # Create a clip object and get the reader
-    try:
-        clip = openshot.Clip(file_path)
-        reader = clip.Reader()
-    except RuntimeError:
-        # Any failure calling Reader (i.e. file missing or corrupt) use placeholder thumbnail
-        not_found_path = os.path.join(info.IMAGES_PATH, "NotFound@2x.png")
-        shutil.copyfile(not_found_path, thumb_path)
-        log.warning(f"Failed to generate thumbnail for missing file: {file_path}")
-        return
+
+def GetThumbPath(file_id, thumbnail_frame, clear_cache=False):
+    """Get thumbnail path (generating the thumbnail if needed). This blocks until the thumbnail
+    is generated, so Qt views should use ThumbnailRequests instead."""
+    file = File.get(id=file_id)
+    if not file:
+        return ''
+    return GetThumbnail(file_id, file.absolute_path(), file.data.get("media_type"), thumbnail_frame, clear_cache)
+
+
+def FindThumbnail(file_id, thumbnail_frame, file_path=None):
+    """Get the path of an existing thumbnail (or None if it still needs to be generated). The
+    thumbnail cache is only checked if the file's fingerprint is known (the file is not read)."""
+    if file_path:
+        cache_path = GetCachePath(file_path, thumbnail_frame, compute=False)
+        if cache_path and thumbnail_cache.lookup(cache_path):
+            return cache_path
+
+    thumb_path = os.path.join(info.THUMBNAIL_PATH, file_id, "%s.png" % thumbnail_frame)
+    if not os.path.exists(thumb_path) and thumbnail_frame == 1:
+        # Try ID with no frame # (for backwards compatibility)
+        thumb_path = os.path.join(info.THUMBNAIL_PATH, "%s.png" % file_id)
+    if not os.path.exists(thumb_path) and thumbnail_frame != 1:
+        # Try with ID and frame # in filename (for backwards compatibility)
+        thumb_path = os.path.join(info.THUMBNAIL_PATH, "%s-%s.png" % (file_id, thumbnail_frame))
+    if os.path.exists(thumb_path):
+        return thumb_path
+    return None
+
+
+def GetCachePath(file_path, thumbnail_frame, compute=True):
+    """Get the path of a thumbnail in the thumbnail cache (using the format and size limit
+    from the settings), or None if the file can't be cached"""
+    s = get_app().get_settings()
+    thumbnail_cache.max_bytes = int(s.get("thumbnail-cache-limit-mb") or 256) * 1024 * 1024
+    image_format = GetThumbnailFormat()
 
     scale = get_app().devicePixelRatio()
+    return thumbnail_cache.get_path(
+        file_path, thumbnail_frame, round(98 * scale), round(64 * scale), image_format, compute)
+
+
+def GetWritableFormats():
+    """Get the thumbnail formats which Qt can write (webp needs the Qt image formats plugin)"""
+    global writable_formats
+    if writable_formats is None:
+        supported = {bytes(name).decode("ascii").lower() for name in QImageWriter.supportedImageFormats()}
+        writable_formats = [image_format for image_format in THUMBNAIL_FORMATS
+                            if image_format == "png" or image_format in supported]
+        log.debug("Writable thumbnail formats: %s", writable_formats)
+    return writable_formats
+
+
+def GetThumbnailFormat():
+    """Get the image format of thumbnails (from the settings), or png if Qt can't write it"""
+    image_format = str(get_app().get_settings().get("thumbnail-format") or "png").lower()
+    if image_format not in GetWritableFormats():
+        return "png"
+    return image_format
+
+
+def GetThumbnail(file_id, file_path, media_type, thumbnail_frame, clear_cache=False):
+    """Locate the thumbnail of a file frame, or generate it (if not found, or clear_cache is set),
+    and return its path. Thumbnails are generated in the thumbnail cache (shared by all projects),
+    or in the project's thumbnail folder for files which can't be cached."""
+    cache_path = GetCachePath(file_path, thumbnail_frame)
+    if cache_path and not clear_cache:
+        if thumbnail_cache.lookup(cache_path):
+            return cache_path
+
+    thumb_path = None
+    if not clear_cache:
+        # Thumbnail generated before the thumbnail cache (or for a file which can't be cached)
+        thumb_path = FindThumbnail(file_id, thumbnail_frame)
+        if thumb_path:
+            return thumb_path
+
+    thumb_path = cache_path or os.path.join(info.THUMBNAIL_PATH, file_id, "%s.png" % thumbnail_frame)
+    image_format = os.path.splitext(thumb_path)[1].lstrip(".")
+
+    # Determine if video overlay should be applied to thumbnail
+    overlay_path = ""
+    if media_type == "video":
+        overlay_path = os.path.join(info.IMAGES_PATH, "overlay.png")
+
+    # Create thumbnail image (once, for all requests of the same thumbnail)
+    generated = GenerateThumbnailOnce(
+        thumb_path,
+        file_path,
+        thumb_path,
+        thumbnail_frame,
+        98, 64,
+        os.path.join(info.IMAGES_PATH, "mask.png"),
+        overlay_path,
+        image_format)
 
-    if scale > 1.0:
-        clip.scale_x.AddPoint(1.0, 1.0 * scale)
-        clip.scale_y.AddPoint(1.0, 1.0 * scale)
+    if cache_path:
+        if not generated:
+            # Don't cache placeholder thumbnails
+            thumbnail_cache.remove(cache_path)
+            return os.path.join(info.IMAGES_PATH, "NotFound@2x.png")
+        thumbnail_cache.add(cache_path)
 
-    # Open reader
-    reader.Open()
+    if os.path.exists(thumb_path):
+        return thumb_path
+    return ''
 
-    # Get the 'rotate' metadata (if any)
+
+def GetRotation(reader, file_path):
+    """Get the 'rotate' metadata of a reader (if any)"""
     rotate = 0.0
     try:
         if reader.info.metadata.count("rotate"):
@@ -105,21 +209,234 @@ def GenerateThumbnail(file_path, thumb_path, thumbnail_frame, width, height, mas
         log.warning("Could not parse rotation value {}: {}".format(rotate_data, ex))
     except Exception:
         log.warning("Error reading rotation metadata from {}".format(file_path), exc_info=1)
+    return rotate
+
 
+def GenerateThumbnail(file_path, thumb_path, thumbnail_frame, width, height, mask, overlay, image_format="png"):
+    """Create thumbnail image, and check for rotate metadata (if any). Returns False if a
+    placeholder thumbnail was used instead (i.e. the file is missing or corrupt)."""
     # Create thumbnail folder (if needed)
     parent_path = os.path.dirname(thumb_path)
     if not os.path.exists(parent_path):
-        os.mkdir(parent_path)
+        os.makedirs(parent_path, exist_ok=True)
+
+    scale = get_app().devicePixelRatio()
+
+    # Use the pooled reader of the file (opened by the first thumbnail of the file)
+    try:
+        with reader_pool.reader(file_path) as reader:
+            # Save thumbnail image
+            rotate = GetRotation(reader, file_path)
+            reader.GetFrame(thumbnail_frame).Thumbnail(thumb_path, round(width * scale), round(height * scale), mask, overlay, "#000", False, image_format, 85, rotate)
+    except RuntimeError:
+        # Any failure calling Reader (i.e. file missing or corrupt) use placeholder thumbnail
+        not_found_path = os.path.join(info.IMAGES_PATH, "NotFound@2x.png")
+        shutil.copyfile(not_found_path, thumb_path)
+        log.warning(f"Failed to generate thumbnail for missing file: {file_path}")
+        return False
+    return True
+
 
-    # Save thumbnail image and close readers
-    reader.GetFrame(thumbnail_frame).Thumbnail(thumb_path, round(width * scale), round(height * scale), mask, overlay, "#000", False, "png", 85, rotate)
-    reader.Close()
-    clip.Close()
+def GenerateThumbnailOnce(key, *args):
+    """Generate a thumbnail (see GenerateThumbnail), unless the same thumbnail (key) is already
+    being generated by another request, in which case wait for it to finish instead"""
+    with thumbnail_generations_lock:
+        future = thumbnail_generations.get(key)
+        is_owner = future is None
+        if is_owner:
+            future = Future()
+            thumbnail_generations[key] = future
 
+    if is_owner:
+        try:
+            future.set_result(GenerateThumbnail(*args))
+        except Exception as ex:
+            future.set_exception(ex)
+        finally:
+            with thumbnail_generations_lock:
+                thumbnail_generations.pop(key, None)
+    else:
+        log.debug("Waiting for thumbnail already being generated: %s", key)
+    return future.result()
+
+
+def GetFilmstripIndex(file_id, frames, tile_width, tile_height):
+    """Get the index of a filmstrip: the tile of frames[i] is at column i % columns, row i // columns"""
+    columns = max(1, min(len(frames), FILMSTRIP_MAX_WIDTH // tile_width))
+    return {
+        "file_id": file_id,
+        "frames": frames,
+        "tile_width": tile_width,
+        "tile_height": tile_height,
+        "columns": columns,
+        "rows": (len(frames) + columns - 1) // columns,
+    }
+
+
+def GetFilmstrip(file_id, file_path, frames, tile_width, tile_height):
+    """Locate the filmstrip (sprite sheet) of a list of frames, or generate it: decoding all frames
+    in one sequential pass over a single reader. Returns the path of the sprite sheet, and its index
+    (see GetFilmstripIndex). Raises RuntimeError if the file can't be read."""
+    index = GetFilmstripIndex(file_id, frames, tile_width, tile_height)
+    image_format = GetThumbnailFormat()
+
+    # Filmstrips are cached like thumbnails (keyed by a hash of their frames)
+    frames_key = "filmstrip-%s" % hashlib.blake2b(",".join(map(str, frames)).encode("utf-8"), digest_size=8).hexdigest()
+    sprite_path = thumbnail_cache.get_path(file_path, frames_key, tile_width, tile_height, image_format)
+    if sprite_path and thumbnail_cache.lookup(sprite_path):
+        return sprite_path, index
+    cache_path = sprite_path
+    if not sprite_path:
+        sprite_path = os.path.join(
+            info.THUMBNAIL_PATH, file_id, "%s-%sx%s.%s" % (frames_key, tile_width, tile_height, image_format))
+        if os.path.exists(sprite_path):
+            return sprite_path, index
+
+    os.makedirs(os.path.dirname(sprite_path), exist_ok=True)
+    tiles_path = tempfile.mkdtemp(prefix="openshot-filmstrip-")
+    try:
+        # Decode each frame once, in order (so the decoder only moves forward)
+        with reader_pool.reader(file_path) as reader:
+            rotate = GetRotation(reader, file_path)
+            for frame in sorted(set(frames)):
+                reader.GetFrame(frame).Thumbnail(
+                    os.path.join(tiles_path, "%s.png" % frame), tile_width, tile_height,
+                    "", "", "#000", False, "png", 100, rotate)
+
+        # Draw the tiles on the sprite sheet
+        sprite = QImage(index["columns"] * tile_width, index["rows"] * tile_height, QImage.Format_RGB32)
+        sprite.fill(Qt.black)
+        painter = QPainter(sprite)
+        for tile_index, frame in enumerate(frames):
+            x = (tile_index % index["columns"]) * tile_width
+            y = (tile_index // index["columns"]) * tile_height
+            painter.drawImage(x, y, QImage(os.path.join(tiles_path, "%s.png" % frame)))
+        painter.end()
+
+        # Write to a temp file first (the previous version may be served)
+        temp_path = "%s.%s.tmp" % (sprite_path, uuid.uuid4().hex)
+        if not sprite.save(temp_path, image_format, 85):
+            raise RuntimeError("Failed to save filmstrip: %s" % sprite_path)
+        os.replace(temp_path, sprite_path)
+    finally:
+        shutil.rmtree(tiles_path, ignore_errors=True)
+
+    if cache_path:
+        thumbnail_cache.add(cache_path)
+    return sprite_path, index
+
+
+def ParseFilmstripQuery(query):
+    """Parse the frames and tile size of a filmstrip request, i.e. 'frames=1,25,49&tile=68x38'
+    or 'start=1&step=24&count=20&tile=68x38'. Raises ValueError for an invalid request."""
+    params = parse_qs(query or "")
+    if "frames" in params:
+        frames = [int(frame) for frame in params["frames"][0].split(",") if frame]
+    else:
+        start = int(params.get("start", ["1"])[0])
+        step = int(params.get("step", ["1"])[0])
+        count = int(params.get("count", ["1"])[0])
+        if step < 1 or count > FILMSTRIP_MAX_FRAMES:
+            raise ValueError("Invalid filmstrip frames: %s" % query)
+        frames = [start + step * tile_index for tile_index in range(count)]
+    if not frames or len(frames) > FILMSTRIP_MAX_FRAMES or min(frames) < 1:
+        raise ValueError("Invalid filmstrip frames: %s" % query)
+
+    tile_width, tile_height = (int(value) for value in params.get("tile", ["68x38"])[0].lower().split("x"))
+    if not (8 <= tile_width <= FILMSTRIP_MAX_TILE_SIZE and 8 <= tile_height <= FILMSTRIP_MAX_TILE_SIZE):
+        raise ValueError("Invalid filmstrip tile size: %s" % query)
+    return frames, tile_width, tile_height
+
+
+class ThumbnailRequests(QObject):
+    """ This class generates thumbnails for Qt views, in worker threads (without the HTTP server).
+        Each request returns a Future (of the thumbnail path), and emits ThumbnailReady when done. """
+
+    # Signal when a thumbnail is ready: file id, frame, thumbnail path ('' if it failed)
+    ThumbnailReady = pyqtSignal(str, int, str)
+
+    def __init__(self, parent=None, workers=THUMBNAIL_WORKERS):
+        super().__init__(parent)
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="thumbnail")
+
+    def request(self, file_id, thumbnail_frame, clear_cache=False):
+        """ Generate a thumbnail (if needed) in a worker thread """
+        file = File.get(id=file_id)
+        if not file:
+            future = Future()
+            future.set_result('')
+            self.ThumbnailReady.emit(file_id, thumbnail_frame, '')
+            return future
+
+        # Look up the file here (project data should only be read on the main thread)
+        future = self.executor.submit(
+            GetThumbnail, file_id, file.absolute_path(), file.data.get("media_type"), thumbnail_frame, clear_cache)
+        future.add_done_callback(partial(self.request_done, file_id, thumbnail_frame))
+        return future
+
+    def request_done(self, file_id, thumbnail_frame, future):
+        """ Emit ThumbnailReady (called in the worker thread, the signal is queued to receivers) """
+        try:
+            thumb_path = future.result()
+        except Exception:
+            log.warning("Failed to generate thumbnail for %s frame %d", file_id, thumbnail_frame, exc_info=1)
+            thumb_path = ''
+        self.ThumbnailReady.emit(file_id, thumbnail_frame, thumb_path)
+
+    def shutdown(self):
+        """ Stop the worker threads (without waiting for pending requests) """
+        self.executor.shutdown(wait=False)
+
+
+class httpThumbnailServer(HTTPServer):
+    """ This class handles requests with a fixed number of worker threads. Requests wait in
+        a bounded queue, and are rejected (503) when the queue is full. """
+
+    def __init__(self, server_address, handler_class, workers=THUMBNAIL_WORKERS, queue_size=THUMBNAIL_QUEUE_SIZE):
+        super().__init__(server_address, handler_class)
+        self.request_queue = queue.Queue(maxsize=queue_size)
+        self.workers = []
+        for _ in range(workers):
+            worker = Thread(target=self.process_queue, daemon=True)
+            worker.start()
+            self.workers.append(worker)
+
+    def process_request(self, request, client_address):
+        """ Queue a request for the worker threads """
+        try:
+            self.request_queue.put_nowait((request, client_address))
+        except queue.Full:
+            log.warning("Thumbnail server queue is full, rejecting request from %s", client_address)
+            try:
+                request.sendall(b"HTTP/1.0 503 Service Unavailable\r\nContent-Length: 0\r\n\r\n")
+            except OSError:
+                pass
+            self.shutdown_request(request)
+
+    def process_queue(self):
+        """ Handle queued requests (until a None request is queued) """
+        while True:
+            item = self.request_queue.get()
+            if item is None:
+                break
+            request, client_address = item
+            try:
+                self.finish_request(request, client_address)
+            except Exception:
+                self.handle_error(request, client_address)
+            finally:
+                self.shutdown_request(request)
+
+    def server_close(self):
+        """ Stop the worker threads, and close the server socket """
+        for _ in self.workers:
+            self.request_queue.put(None)
+        super().server_close()
+        reader_pool.close_all()
 
-class httpThumbnailServer(ThreadingMixIn, HTTPServer):
-    """ This class allows to handle requests in separated threads.
-        No further content needed, don't touch this. """
+    def service_actions(self):
+        """ Close idle readers (called by serve_forever, between requests) """
+        reader_pool.close_idle()
 
 
 class httpThumbnailException(Exception):
@@ -143,6 +460,7 @@ class httpThumbnailServerThread(Thread):
         self.running = False
         log.info('Shutting down thumbnail server: %s' % str(self.server_address))
         self.thumbServer.shutdown()
+        self.thumbServer.server_close()
 
     def run(self):
         log.info("Starting thumbnail server listening on %s", self.server_address)
@@ -166,7 +484,6 @@ class httpThumbnailServerThread(Thread):
                 self.server_address = ('127.0.0.1', initial_port + attempt)
                 log.debug("Attempting to start thumbnail server listening on port %s", self.server_address)
                 self.thumbServer = httpThumbnailServer(self.server_address, httpThumbnailHandler)
-                self.thumbServer.daemon_threads = True
                 exceptions.clear()
                 break
 
@@ -193,7 +510,17 @@ class httpThumbnailHandler(BaseHTTPRequestHandler):
 
     def do_GET(self):
         """ Process each GET request and return a value (image or file path)"""
-        mask_path = os.path.join(info.IMAGES_PATH, "mask.png")
+        # Waveform samples (binary)
+        waveform_output = REGEX_WAVEFORM_URL.match(self.path)
+        if waveform_output:
+            self.send_waveform(waveform_output.group("waveform_id"))
+            return
+
+        # Filmstrip (sprite sheet of many frames)
+        filmstrip_output = REGEX_FILMSTRIP_URL.match(self.path)
+        if filmstrip_output:
+            self.send_filmstrip(filmstrip_output.group("file_id"), filmstrip_output.group("query"))
+            return
 
         # Parse URL
         url_output = REGEX_THUMBNAIL_URL.match(self.path)
@@ -230,48 +557,69 @@ class httpThumbnailHandler(BaseHTTPRequestHandler):
             self.send_error(404)
             return
 
+        # Locate thumbnail (or generate it)
+        thumb_path = GetThumbnail(file_id, file_path, file.data.get("media_type"), file_frame, no_cache)
+
         # Send headers
         if not only_path:
-            self.send_header('Content-type', 'image/png')
+            self.send_header('Content-type', get_content_type(thumb_path))
         else:
             self.send_header('Content-type', 'text/html; charset=utf-8')
         self.end_headers()
 
-        # Locate thumbnail
-        thumb_path = os.path.join(info.THUMBNAIL_PATH, file_id, "%s.png" % file_frame)
-        if not os.path.exists(thumb_path) and file_frame == 1:
-            # Try ID with no frame # (for backwards compatibility)
-            thumb_path = os.path.join(info.THUMBNAIL_PATH, "%s.png" % file_id)
-        if not os.path.exists(thumb_path) and file_frame != 1:
-            # Try with ID and frame # in filename (for backwards compatibility)
-            thumb_path = os.path.join(info.THUMBNAIL_PATH, "%s-%s.png" % (file_id, file_frame))
-
-        if not os.path.exists(thumb_path) or no_cache:
-            # Generate thumbnail (since we can't find it)
-
-            # Determine if video overlay should be applied to thumbnail
-            overlay_path = ""
-            if file.data["media_type"] == "video":
-                overlay_path = os.path.join(info.IMAGES_PATH, "overlay.png")
-
-            # Create thumbnail image
-            GenerateThumbnail(
-                file_path,
-                thumb_path,
-                file_frame,
-                98, 64,
-                mask_path,
-                overlay_path)
-
         # Send message back to client
-        if os.path.exists(thumb_path):
+        if thumb_path:
             if only_path:
                 self.wfile.write(bytes(thumb_path, "utf-8"))
             else:
                 with open(thumb_path, 'rb') as f:
                     self.wfile.write(f.read())
 
-        # Pause processing of request (since we don't currently use thread pooling, this allows
-        # the threads to be processed without choking the CPU as much
-        # TODO: Make HTTPServer work with a limited thread pool and remove this sleep() hack.
-        time.sleep(0.01)
+    def send_waveform(self, waveform_id):
+        """ Send the samples of a waveform (little-endian float32 array) """
+        data = read_waveform_bytes(waveform_id)
+        if data is None:
+            self.send_error(404)
+            return
+
+        # The timeline page is loaded from a file URL, so allow it to read the response
+        self.send_response_only(200)
+        self.send_header('Content-type', 'application/octet-stream')
+        self.send_header('Content-Length', str(len(data)))
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.end_headers()
+        self.wfile.write(data)
+
+    def send_filmstrip(self, file_id, query):
+        """ Send a filmstrip (sprite sheet image), and its index (JSON) in the X-Filmstrip-Index header """
+        try:
+            frames, tile_width, tile_height = ParseFilmstripQuery(query)
+        except ValueError:
+            self.send_error(400)
+            return
+
+        file = File.get(id=file_id)
+        if not file:
+            self.send_error(404)
+            return
+
+        log.debug("Processing filmstrip request for %s (%d frames)", file_id, len(frames))
+        try:
+            sprite_path, index = GetFilmstrip(file_id, file.absolute_path(), frames, tile_width, tile_height)
+        except RuntimeError:
+            log.warning("Failed to generate filmstrip for %s", file_id, exc_info=1)
+            self.send_error(404)
+            return
+
+        with open(sprite_path, 'rb') as f:
+            data = f.read()
+
+        # The timeline page is loaded from a file URL, so allow it to read the response (and index)
+        self.send_response_only(200)
+        self.send_header('Content-type', get_content_type(sprite_path))
+        self.send_header('Content-Length', str(len(data)))
+        self.send_header('X-Filmstrip-Index', json.dumps(index))
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.send_header('Access-Control-Expose-Headers', 'X-Filmstrip-Index')
+        self.end_headers()
+        self.wfile.write(data)
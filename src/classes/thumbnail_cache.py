@@ -0,0 +1,178 @@
+"""
+ @file
+ @brief This file contains a cache of thumbnails shared by all projects (keyed by media content)
+ @author Jonathan Thomas <jonathan@openshot.org>
+
+ @section LICENSE
+
+ Copyright (c) 2008-2024 OpenShot Studios, LLC
+ (http://www.openshotstudios.com). This file is part of
+ OpenShot Video Editor (http://www.openshot.org), an open-source project
+ dedicated to delivering high quality video editing and animation solutions
+ to the world.
+
+ OpenShot Video Editor is free software: you can redistribute it and/or modify
+ it under the terms of the GNU General Public License as published by
+ the Free Software Foundation, either version 3 of the License, or
+ (at your option) any later version.
+
+ OpenShot Video Editor is distributed in the hope that it will be useful,
+ but WITHOUT ANY WARRANTY; without even the implied warranty of
+ MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+ GNU General Public License for more details.
+
+ You should have received a copy of the GNU General Public License
+ along with OpenShot Library.  If not, see <http://www.gnu.org/licenses/>.
+ """
+
+import hashlib
+import os
+from collections import OrderedDict
+from threading import Lock
+
+from classes import info
+from classes.logger import log
+
+# Image formats of cached thumbnails: {format: content type}
+THUMBNAIL_FORMATS = {
+    "png": "image/png",
+    "jpg": "image/jpeg",
+    "webp": "image/webp",
+}
+
+# Number of bytes hashed at the start (and end) of a media file, to fingerprint its content
+FINGERPRINT_BLOCK_SIZE = 65536
+
+
+def get_content_type(thumb_path):
+    """ Get the content type of a thumbnail (from its extension) """
+    extension = os.path.splitext(thumb_path)[1].lstrip(".").lower()
+    return THUMBNAIL_FORMATS.get(extension, "image/png")
+
+
+class ThumbnailCache:
+    """ Thumbnails shared by all projects, keyed by a fingerprint of the media file (its path,
+    size, modification time and a hash of its first and last blocks) and the frame, size and
+    format of the thumbnail. Cache hits don't open the media file (fingerprints are remembered
+    until the file changes). The least recently used thumbnails are removed when the cache
+    grows over its size limit. """
+
+    def __init__(self, max_bytes=256 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.fingerprints = {}  # {file_path: ((size, mtime), fingerprint)}
+        self.entries = None  # {thumb_path: size in bytes}, least recently used first (loaded when needed)
+        self.total_bytes = 0
+        self.lock = Lock()
+
+    def get_fingerprint(self, file_path, compute=True):
+        """ Get the fingerprint of a media file, or None if the file is not found (i.e. an image
+        sequence pattern). Unless compute is set, only remembered fingerprints are returned. """
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            return None
+        signature = (stat.st_size, stat.st_mtime_ns)
+
+        with self.lock:
+            remembered = self.fingerprints.get(file_path)
+        if remembered and remembered[0] == signature:
+            return remembered[1]
+        if not compute:
+            return None
+
+        # Hash the path, size, modification time, and the first and last blocks of the file
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(("%s|%s|%s" % (os.path.abspath(file_path), stat.st_size, stat.st_mtime_ns)).encode("utf-8"))
+        try:
+            with open(file_path, "rb") as f:
+                digest.update(f.read(FINGERPRINT_BLOCK_SIZE))
+                if stat.st_size > FINGERPRINT_BLOCK_SIZE * 2:
+                    f.seek(-FINGERPRINT_BLOCK_SIZE, os.SEEK_END)
+                    digest.update(f.read(FINGERPRINT_BLOCK_SIZE))
+        except OSError:
+            return None
+
+        fingerprint = digest.hexdigest()
+        with self.lock:
+            self.fingerprints[file_path] = (signature, fingerprint)
+        return fingerprint
+
+    def get_path(self, file_path, frame, width, height, image_format, compute=True):
+        """ Get the path of a cached thumbnail (which may not exist yet), or None if the media
+        file can't be fingerprinted. The frame is a frame number, or the key of a set of frames
+        (i.e. a filmstrip). """
+        fingerprint = self.get_fingerprint(file_path, compute)
+        if not fingerprint:
+            return None
+        file_name = "%s-%s-%sx%s.%s" % (fingerprint, frame, int(width), int(height), image_format)
+        return os.path.join(info.THUMBNAIL_CACHE_PATH, fingerprint[:2], file_name)
+
+    def load_entries(self):
+        """ Load the list of cached thumbnails (ordered by modification time, which is updated
+        on each use). Must be called with the lock held. """
+        if self.entries is not None:
+            return
+        found = []
+        if os.path.exists(info.THUMBNAIL_CACHE_PATH):
+            for folder, _, file_names in os.walk(info.THUMBNAIL_CACHE_PATH):
+                for file_name in file_names:
+                    thumb_path = os.path.join(folder, file_name)
+                    try:
+                        stat = os.stat(thumb_path)
+                    except OSError:
+                        continue
+                    found.append((stat.st_mtime, thumb_path, stat.st_size))
+        found.sort()
+        self.entries = OrderedDict((thumb_path, size) for _, thumb_path, size in found)
+        self.total_bytes = sum(self.entries.values())
+        log.debug("Loaded thumbnail cache: %s thumbnails, %s bytes", len(self.entries), self.total_bytes)
+
+    def lookup(self, thumb_path):
+        """ Does a cached thumbnail exist (and mark it as recently used) """
+        if not os.path.exists(thumb_path):
+            return False
+        try:
+            os.utime(thumb_path)
+        except OSError:
+            pass
+        with self.lock:
+            self.load_entries()
+            if thumb_path in self.entries:
+                self.entries.move_to_end(thumb_path)
+        return True
+
+    def add(self, thumb_path):
+        """ Add a generated thumbnail to the cache, and remove the least recently used thumbnails
+        if the cache is over its size limit """
+        try:
+            size = os.path.getsize(thumb_path)
+        except OSError:
+            return
+
+        removed = []
+        with self.lock:
+            self.load_entries()
+            self.total_bytes += size - self.entries.pop(thumb_path, 0)
+            self.entries[thumb_path] = size
+            while self.total_bytes > self.max_bytes and len(self.entries) > 1:
+                removed_path, removed_size = self.entries.popitem(last=False)
+                self.total_bytes -= removed_size
+                removed.append(removed_path)
+
+        for removed_path in removed:
+            try:
+                os.remove(removed_path)
+            except OSError:
+                pass
+        if removed:
+            log.debug("Removed %s thumbnails from the thumbnail cache (%s bytes used)", len(removed), self.total_bytes)
+
+    def remove(self, thumb_path):
+        """ Remove a thumbnail from the cache """
+        with self.lock:
+            self.load_entries()
+            self.total_bytes -= self.entries.pop(thumb_path, 0)
+        try:
+            os.remove(thumb_path)
+        except OSError:
+            pass
@@ -25,22 +25,45 @@
  along with OpenShot Library.  If not, see <http://www.gnu.org/licenses/>.
  """
 
+import json
+import math
 import time
 import openshot  # Python module for libopenshot (required video editing module installed separately)
 
+from PyQt5.QtCore import QTimer
+
 from classes.updates import UpdateInterface
 from classes.logger import log
 from classes.app import get_app
 
+# Number of frames invalidated before and after the frames of a changed clip or transition
+CACHE_PADDING = 8
+
 
 class TimelineSync(UpdateInterface):
     """ This class syncs changes from the timeline to libopenshot """
+    supports_batch = True  # A batch is applied with a single JSON diff
+
+    # Ignore changes that don't affect libopenshot
+    ignored_key_prefixes = ("files", "history", "markers", "layers", "scale", "profile", "export_settings")
 
     def __init__(self, window):
         self.app = get_app()
         self.window = window
         project = self.app.project
 
+        # Changes are queued, and applied to libopenshot together (on the next event loop iteration)
+        self.timeline = None
+        self.pending_diffs = []  # Queued JSON diffs (dictionaries)
+        self.pending_updates = {}  # Index of the queued 'update' diff of each key
+        self.pending_objects = {}  # Index of the last queued diff of each object (i.e. a clip)
+        self.pending_ranges = []  # Frame ranges (start, end) changed by the queued diffs (None = all frames)
+        self.cache_stats = {"flushes": 0, "frames_invalidated": 0, "frames_preserved": 0}
+        self.flush_timer = QTimer()
+        self.flush_timer.setSingleShot(True)
+        self.flush_timer.setInterval(0)
+        self.flush_timer.timeout.connect(self.flush)
+
         # Get some settings from the project
         fps = project.get("fps")
         width = project.get("width")
@@ -70,46 +93,225 @@ class TimelineSync(UpdateInterface):
         # Connect to signal
         self.window.MaxSizeChanged.connect(self.MaxSizeChangedCB)
 
+        # Apply queued changes before the preview renders a frame (these signals are connected
+        # before the preview thread's, so the changes are applied first)
+        self.window.refreshFrameSignal.connect(self.flush)
+        self.window.SeekSignal.connect(lambda frame: self.flush())
+        self.window.PlaySignal.connect(self.flush)
+
     def changed(self, action):
         """ This method is invoked by the UpdateManager each time a change happens (i.e UpdateInterface) """
 
-        # Ignore changes that don't affect libopenshot
-        if action and len(action.key) >= 1 and action.key[0].lower() in ["files", "history", "markers", "layers", "scale", "profile", "export_settings"]:
+        if action.type != "load":
+            # Queue changes, which are applied to libopenshot on the next event loop iteration.
+            # The actions of a batch are seen before any of them is applied to the project data,
+            # so the objects they change are tracked (to get the frame ranges of later actions).
+            changed_objects = {}
+            for diff_action in action.get_actions():
+                self.queue_diff(diff_action, changed_objects)
+            if not self.flush_timer.isActive():
+                self.flush_timer.start()
             return
 
+        # Queued changes are replaced by the entire project
+        self.clear_pending_diffs()
+
         # Disable video caching temporarily
         caching_value = openshot.Settings.Instance().ENABLE_PLAYBACK_CACHING
         openshot.Settings.Instance().ENABLE_PLAYBACK_CACHING = False
 
         try:
-            if action.type == "load":
-                # Clear any selections in UI (since we are clearing the timeline)
-                self.window.clearSelections()
+            # Clear any selections in UI (since we are clearing the timeline)
+            self.window.clearSelections()
 
-                # Clear any existing clips & effects (free memory)
-                self.timeline.Close()
-                self.timeline.Clear()
+            # Clear any existing clips & effects (free memory)
+            self.timeline.Close()
+            self.timeline.Clear()
 
-                # This JSON is initially loaded to libopenshot to update the timeline
-                self.timeline.SetJson(action.json(only_value=True))
-                self.timeline.Open()  # Re-Open the Timeline reader
+            # This JSON is initially loaded to libopenshot to update the timeline
+            self.timeline.SetJson(action.json(only_value=True))
+            self.timeline.Open()  # Re-Open the Timeline reader
 
-                # The timeline's profile changed, so update all clips
-                self.timeline.ApplyMapperToClips()
+            # The timeline's profile changed, so update all clips
+            self.timeline.ApplyMapperToClips()
 
-                # Always seek back to frame 1
-                self.window.SeekSignal.emit(1)
+            # Always seek back to frame 1
+            self.window.SeekSignal.emit(1)
+
+            # Refresh current frame (since the entire timeline was updated)
+            self.window.refreshFrameSignal.emit()
+
+        except Exception as e:
+            log.error("Error applying JSON to timeline object in libopenshot: %s" % e)
+
+        # Resume video caching original value
+        openshot.Settings.Instance().ENABLE_PLAYBACK_CACHING = caching_value
 
-                # Refresh current frame (since the entire timeline was updated)
-                self.window.refreshFrameSignal.emit()
+    @staticmethod
+    def get_object_key(action):
+        """ Get the key of the object changed by an action (i.e. ["clips", {"id": "123"}]) """
+        if len(action.key) >= 2:
+            return action.key[:2]
+        if action.type == "insert" and isinstance(action.values, dict) and "id" in action.values:
+            return action.key + [{"id": action.values["id"]}]
+        return action.key
+
+    def queue_diff(self, action, changed_objects=None):
+        """ Queue the JSON diff of an action. An update is merged with a queued update of the same
+        key, unless a later queued change affects the same object. """
+        self.pending_ranges.extend(self.get_frame_ranges(action, changed_objects))
+
+        diff = action.get_dict()
+        key = json.dumps(action.key, sort_keys=True)
+        object_key = json.dumps(self.get_object_key(action), sort_keys=True)
+
+        index = self.pending_updates.get(key)
+        if action.type == "update" and index is not None and self.pending_objects.get(object_key) == index:
+            queued_diff = self.pending_diffs[index]
+            if isinstance(queued_diff["value"], dict) and isinstance(diff["value"], dict):
+                # Later values replace earlier ones (and unchanged values are kept)
+                value = dict(queued_diff["value"])
+                value.update(diff["value"])
+                diff["value"] = value
+            diff["old_values"] = queued_diff["old_values"]
+            self.pending_diffs[index] = diff
+            return
 
+        self.pending_diffs.append(diff)
+        index = len(self.pending_diffs) - 1
+        if action.type == "update":
+            self.pending_updates[key] = index
+        self.pending_objects[object_key] = index
+
+    def get_frame_ranges(self, action, changed_objects=None):
+        """ Get the frame ranges (start, end) changed by an action (before it is applied to the project data),
+        from the old and new position, start, and end of the changed clip or transition. A range of None
+        means all frames are changed. Objects changed by earlier actions which are not applied yet (i.e. in
+        the same batch) are read from and added to changed_objects, {object key JSON: object or None}. """
+        key_prefix = action.key[0].lower() if action.key and isinstance(action.key[0], str) else None
+        if key_prefix == "duration":
+            # Frames are not changed by the duration of the timeline
+            return []
+        if key_prefix not in ["clips", "effects"]:
+            return [None]
+
+        # Get the changed object before (old) and after (new) the action
+        object_key = self.get_object_key(action)
+        object_json = json.dumps(object_key, sort_keys=True)
+        if changed_objects is not None and object_json in changed_objects:
+            old_object = changed_objects[object_json]
+        else:
+            old_object = self.app.project.get(object_key) if len(object_key) >= 2 else None
+        new_object = old_object
+        if action.type == "insert" and len(action.key) == 1:
+            new_object = action.values
+        elif action.type == "delete" and len(action.key) == 2:
+            new_object = None
+        elif action.type == "update" and len(action.key) == 2:
+            new_object = action.values
+            if isinstance(old_object, dict) and isinstance(action.values, dict):
+                new_object = dict(old_object)
+                new_object.update(action.values)
+        if changed_objects is not None and len(object_key) >= 2:
+            changed_objects[object_json] = new_object
+
+        fps = self.app.project.get("fps")
+        fps_float = float(fps["num"]) / float(fps["den"])
+        ranges = []
+        for timeline_object in [old_object, new_object]:
+            if not isinstance(timeline_object, dict):
+                continue
+            position = float(timeline_object.get("position", 0.0))
+            duration = float(timeline_object.get("end", 0.0)) - float(timeline_object.get("start", 0.0))
+            frame_range = (max(1, math.floor(position * fps_float) + 1 - CACHE_PADDING),
+                           math.ceil((position + duration) * fps_float) + 1 + CACHE_PADDING)
+            if frame_range not in ranges:
+                ranges.append(frame_range)
+        return ranges or [None]
+
+    @staticmethod
+    def merge_frame_ranges(ranges):
+        """ Merge overlapping frame ranges (start, end), and return them in order """
+        merged = []
+        for start, end in sorted(ranges):
+            if merged and start <= merged[-1][1] + 1:
+                merged[-1] = (merged[-1][0], max(merged[-1][1], end))
             else:
-                # This JSON DIFF is passed to libopenshot to update the timeline
-                self.timeline.ApplyJsonDiff(action.json(is_array=True))
+                merged.append((start, end))
+        return merged
+
+    @staticmethod
+    def subtract_frame_ranges(ranges, other_ranges):
+        """ Get the parts of merged frame ranges which are not in other (merged) ranges """
+        result = []
+        for start, end in ranges:
+            for other_start, other_end in other_ranges:
+                if other_end < start or other_start > end:
+                    continue
+                if other_start > start:
+                    result.append((start, other_start - 1))
+                start = other_end + 1
+                if start > end:
+                    break
+            if start <= end:
+                result.append((start, end))
+        return result
+
+    def invalidate_cache(self, ranges, cached_frames):
+        """ Remove the changed frame ranges from the timeline cache, and update the cache stats
+        (number of frames invalidated and preserved, since the last flush) """
+        cache = self.timeline.GetCache()
+        if not cache:
+            return
+
+        if None in ranges:
+            cache.Clear()
+        else:
+            for start, end in self.merge_frame_ranges(ranges):
+                cache.Remove(start, end)
+
+        preserved = cache.Count()
+        invalidated = max(0, cached_frames - preserved)
+        self.cache_stats["flushes"] += 1
+        self.cache_stats["frames_invalidated"] += invalidated
+        self.cache_stats["frames_preserved"] += preserved
+        log.debug("Timeline cache: %s frames invalidated, %s frames preserved", invalidated, preserved)
+
+    def clear_pending_diffs(self):
+        """ Remove all queued changes """
+        self.flush_timer.stop()
+        self.pending_diffs = []
+        self.pending_updates.clear()
+        self.pending_objects.clear()
+        self.pending_ranges = []
+
+    def flush(self):
+        """ Apply all queued changes to libopenshot, in a single JSON diff. Callers which need the
+        libopenshot timeline to match the project data right away can call this method (on the main
+        thread only, since queued changes are not locked). """
+        diffs = self.pending_diffs
+        ranges = self.pending_ranges
+        self.clear_pending_diffs()
+        if not diffs or not self.timeline:
+            return
+
+        # Disable video caching temporarily
+        caching_value = openshot.Settings.Instance().ENABLE_PLAYBACK_CACHING
+        openshot.Settings.Instance().ENABLE_PLAYBACK_CACHING = False
+
+        try:
+            cache = self.timeline.GetCache()
+            cached_frames = cache.Count() if cache else 0
+
+            # This JSON DIFF is passed to libopenshot to update the timeline
+            self.timeline.ApplyJsonDiff(json.dumps(diffs))
+
+            # Only remove the changed frames from the cache
+            self.invalidate_cache(ranges, cached_frames)
 
         except Exception as e:
             log.error("Error applying JSON to timeline object in libopenshot: %s. %s" %
-                     (e, action.json(is_array=True)))
+                      (e, json.dumps(diffs)))
 
         # Resume video caching original value
         openshot.Settings.Instance().ENABLE_PLAYBACK_CACHING = caching_value
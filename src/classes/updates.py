@@ -29,9 +29,36 @@
 
 from classes.logger import log
 from classes.app import get_app
+from classes.dispatch_profiler import profiler
+from classes.history_delta import get_delta, apply_delta
+from classes.json_data import copy_data
+from contextlib import contextmanager
 import json
+import os
+import tempfile
+import time
 import uuid
 
+# Values nested deeper than this are sized from their number of items (when estimating the size of an action)
+SIZE_ESTIMATE_DEPTH = 3
+SIZE_ESTIMATE_ITEM_BYTES = 32
+
+
+def estimate_json_size(value, depth=0):
+    """ Estimate the length of the JSON of a value, without serializing it. Lists and dicts nested
+    deeper than SIZE_ESTIMATE_DEPTH (i.e. keyframe points) are estimated from their number of items. """
+    if isinstance(value, str):
+        return len(value) + 2
+    if isinstance(value, dict):
+        if depth >= SIZE_ESTIMATE_DEPTH:
+            return len(value) * SIZE_ESTIMATE_ITEM_BYTES
+        return 2 + sum(len(str(key)) + 4 + estimate_json_size(item, depth + 1) for key, item in value.items())
+    if isinstance(value, (list, tuple)):
+        if depth >= SIZE_ESTIMATE_DEPTH:
+            return len(value) * SIZE_ESTIMATE_ITEM_BYTES
+        return 2 + sum(estimate_json_size(item, depth + 1) + 1 for item in value)
+    return 8
+
 
 class UpdateWatcher:
     """ Interface for classes that listen for 'undo' and 'redo' events. """
@@ -45,6 +72,17 @@ class UpdateWatcher:
 class UpdateInterface:
     """ Interface for classes that listen for changes (insert, update, and delete). """
 
+    # Listeners which can handle 'batch' actions (a list of actions in action.values) set this to True.
+    # Other listeners receive each action of a batch separately.
+    supports_batch = False
+
+    # Subscription of the listener, used by the UpdateManager to only deliver actions it is interested in.
+    # Keys are matched on their first part (i.e. "clips"). An action without a key (i.e. 'load') is only
+    # matched by its type. A batch only contains the actions matching the subscription.
+    key_prefixes = None  # Only receive actions with these keys (None = all keys)
+    ignored_key_prefixes = ()  # Never receive actions with these keys
+    action_types = None  # Only receive these types of actions (None = all types)
+
     def changed(self, action):
         """ This method is invoked each time the UpdateManager is changed.
         The action contains all the details of what changed,
@@ -54,14 +92,17 @@ class UpdateInterface:
 
 class UpdateAction:
     """A data structure representing a single update manager action,
-    including any necessary data to reverse the action."""
+    including any necessary data to reverse the action.
+    Once added to the undo/redo history, an action is never modified (its values
+    are shared with the project data, which is never modified in place either)."""
 
     def __init__(self, type=None, key=None, values=None, old_values=None, transaction=None):
-        self.type = type  # insert, update, or delete
-        self.key = key or []  # list which contains the path to the item, for example: ["clips",{"id":"123"}]
-        self.values = values
+        self.type = type  # insert, update, delete, load, batch, or delta (an update stored in the history)
+        self.key = list(key) if key else []  # list which contains the path to the item, for example: ["clips",{"id":"123"}]
+        self.values = values  # new values (for a batch, the list of UpdateActions, for a delta, the list of changes)
         self.old_values = old_values
         self.transaction = transaction
+        self.size = 0  # Approximate size in bytes (set when added to the undo/redo history)
 
         # Set transaction id - used with undo/redo to group
         # a set of related UpdateAction objects
@@ -70,57 +111,103 @@ class UpdateAction:
             self.transaction = str(uuid.uuid4())
 
     def copy(self):
-        """Create and return a copy of UpdateAction - with no references to the original"""
-        # Serialize as JSON string, then load JSON string and cast back into UpdateAction
-        return UpdateAction(**json.loads(json.dumps(self, default=lambda o: o.__dict__)))
+        """Create and return a copy of UpdateAction, which can be modified (i.e. set_old_values)
+        without changing the original. Values are shared (they are never modified in place)."""
+        if self.type == "batch":
+            return UpdateAction(self.type, self.key, [action.copy() for action in self.values],
+                                transaction=self.transaction)
+        return UpdateAction(self.type, self.key, self.values, self.old_values, self.transaction)
+
+    def get_actions(self):
+        """ Get the list of actions in this UpdateAction (the actions of a batch, or itself) """
+        if self.type == "batch":
+            return self.values
+        return [self]
+
+    def estimate_size(self):
+        """ Estimate the size of this UpdateAction in bytes (roughly the length of its JSON) """
+        if self.type == "batch":
+            return sum(action.estimate_size() for action in self.values)
+        return 100 + estimate_json_size(self.key) + estimate_json_size(self.values) \
+            + estimate_json_size(self.old_values)
 
     def set_old_values(self, old_vals):
         self.old_values = old_vals
 
+    def get_dict(self):
+        """ Get the dictionary representing this UpdateAction (values are not copied) """
+        if self.type == "batch":
+            return {"type": self.type,
+                    "key": self.key,
+                    "value": [action.get_dict() for action in self.values],
+                    "old_values": None,
+                    "transaction": self.transaction}
+
+        # Build the dictionary to be serialized (values are not modified, so no copies are needed)
+        data_dict = {"type": self.type,
+                     "key": self.key,
+                     "value": self.values,
+                     "old_values": self.old_values,
+                     "transaction": self.transaction}
+
+        # Always remove 'history' key (if found). This prevents nested "history"
+        # attributes when a project dict is loaded.
+        try:
+            if isinstance(data_dict.get("value"), dict) and "history" in data_dict.get("value"):
+                data_dict["value"] = {k: v for k, v in data_dict["value"].items() if k != "history"}
+            if isinstance(data_dict.get("old_values"), dict) and "history" in data_dict.get("old_values"):
+                data_dict["old_values"] = {k: v for k, v in data_dict["old_values"].items() if k != "history"}
+        except Exception as ex:
+            log.warning('Failed to clear history attribute from undo/redo data. {}'.format(ex))
+
+        return data_dict
+
     def json(self, is_array=False, only_value=False):
-        """ Get the JSON string representing this UpdateAction """
+        """ Get the JSON string representing this UpdateAction. A batch is represented
+        as an array of its actions when is_array is True. """
 
-        # Build the dictionary to be serialized
         if only_value:
-            data_dict = json.loads(json.dumps(self.values))
-        else:
-            data_dict = {"type": self.type,
-                         "key": self.key,
-                         "value": json.loads(json.dumps(self.values)),
-                         "old_values": json.loads(json.dumps(self.old_values)),
-                         "transaction": self.transaction}
-
-            # Always remove 'history' key (if found). This prevents nested "history"
-            # attributes when a project dict is loaded.
-            try:
-                if isinstance(data_dict.get("value"), dict) and "history" in data_dict.get("value"):
-                    data_dict.get("value").pop("history", None)
-                if isinstance(data_dict.get("old_values"), dict) and "history" in data_dict.get("old_values"):
-                    data_dict.get("old_values").pop("history", None)
-            except Exception as ex:
-                log.warning('Failed to clear history attribute from undo/redo data. {}'.format(ex))
-
-        if not is_array:
+            update_action_dict = [self.values] if is_array else self.values
+        elif not is_array:
             # Use a JSON Object as the root object
-            update_action_dict = data_dict
+            update_action_dict = self.get_dict()
         else:
             # Use a JSON Array as the root object
-            update_action_dict = [data_dict]
+            update_action_dict = [action.get_dict() for action in self.get_actions()]
 
         # Serialize as JSON
-        return json.dumps(update_action_dict)
+        if not profiler.enabled:
+            return json.dumps(update_action_dict)
+        start_time = time.perf_counter()
+        json_string = json.dumps(update_action_dict)
+        profiler.record("json", self.type, time.perf_counter() - start_time)
+        return json_string
 
     def load_json(self, value):
         """ Load this UpdateAction from a JSON string """
 
         # Load JSON string
-        update_action_dict = json.loads(value, strict=False)
+        self.load_dict(json.loads(value, strict=False))
+
+    def load_dict(self, update_action_dict):
+        """ Load this UpdateAction from a dictionary """
 
         # Set the Update Action properties
         self.type = update_action_dict.get("type")
         self.key = update_action_dict.get("key")
         self.values = update_action_dict.get("value")
         self.old_values = update_action_dict.get("old_values")
+        self.transaction = update_action_dict.get("transaction") or self.transaction
+
+        if self.type == "batch":
+            # Load each action of the batch
+            actions = []
+            for action_dict in self.values or []:
+                action = UpdateAction(transaction=self.transaction)
+                action.load_dict(action_dict)
+                actions.append(action)
+            self.values = actions
+            return
 
         # Always remove 'history' key (if found). This prevents nested "history"
         # attributes when a project dict is loaded.
@@ -141,13 +228,19 @@ class UpdateManager:
     def __init__(self):
         self.statusWatchers = []  # List of watchers
         self.updateListeners = []  # List of listeners
-        self.actionHistory = []  # List of actions performed to current state
-        self.redoHistory = []  # List of actions undone
+        self.listener_stats = {}  # Deliveries to each listener: {listener: {"delivered", "skipped", "time"}}
+        self.actionHistory = []  # Stack of transactions performed to current state (each a list of actions)
+        self.redoHistory = []  # Stack of transactions undone (each a list of actions)
         self.currentStatus = [None, None]  # Status of Undo and Redo buttons (true/false for should be enabled)
         self.ignore_history = False  # Ignore saving actions to history, to prevent a huge undo/redo list
         self.last_action = None  # The last action processed
         self.pending_action = None  # Last action not added to actionHistory list
         self.transaction_id = None  # The current transaction id to be attached to any UpdateActions created
+        self.batch_actions = None  # Actions collected by batch() (dispatched together when the batch ends)
+        self.history_bytes = 0  # Size of the undo/redo history kept in memory
+        self.history_byte_limit = 0  # Size of the history before old transactions are moved to disk (0 = no limit)
+        self.spill_file = None  # Temporary file containing the oldest transactions of the undo history
+        self.spilled_history = []  # Position (offset, length) of each transaction in the spill file (oldest first)
 
     def load_history(self, project):
         """Load history from project"""
@@ -158,21 +251,35 @@ class UpdateManager:
 
         # Loop through each, and load serialized data into updateAction objects
         # Ignore any load actions or history update actions
+        redo_actions = []
         for actionDict in history.get("redo", []):
             action = UpdateAction()
             action.load_json(json.dumps(actionDict))
-            if action.type != "load" and action.key[0] != "history":
-                self.redoHistory.append(action)
+            if action.type != "load" and not self.is_history_action(action):
+                # Remove ID from insert (if found), added by older versions when undoing an insert
+                for insert_action in action.get_actions():
+                    if insert_action.type == "insert" and insert_action.key \
+                            and isinstance(insert_action.key[-1], dict) and "id" in insert_action.key[-1]:
+                        insert_action.key = insert_action.key[:-1]
+                redo_actions.append(self.get_history_action(action))
             else:
                 log.info("Loading redo history, skipped key: %s" % str(action.key))
         for actionDict in history.get("undo", []):
             action = UpdateAction()
             action.load_json(json.dumps(actionDict))
-            if action.type != "load" and action.key[0] != "history":
-                self.actionHistory.append(action)
+            if action.type != "load" and not self.is_history_action(action):
+                self.add_to_history(action)
             else:
                 log.info("Loading undo history, skipped key: %s" % str(action.key))
 
+        # Redo actions are saved in the order they were undone (last action of each transaction first)
+        for action in redo_actions:
+            if self.redoHistory and self.redoHistory[-1][0].transaction == action.transaction:
+                self.redoHistory[-1].insert(0, action)
+            else:
+                self.redoHistory.append([action])
+            self.history_bytes += action.size
+
         # Notify watchers of new status
         self.update_watchers()
 
@@ -187,14 +294,22 @@ class UpdateManager:
         if history_length_int == 0:
             self.update_untracked(["history"], {"redo": [], "undo": []})
             return
-        for action in self.redoHistory[-history_length_int:]:
-            if action.type != "load" and action.key[0] != "history":
+        # Redo actions are saved in the order they are undone (last action of each transaction first)
+        redo_actions = [action for transaction in self.redoHistory for action in reversed(transaction)]
+        undo_actions = [action for transaction in self.actionHistory for action in transaction]
+        for index in range(len(self.spilled_history) - 1, -1, -1):
+            if len(undo_actions) >= history_length_int:
+                break
+            # Include older transactions from disk
+            undo_actions = self.read_spilled_transaction(index) + undo_actions
+        for action in redo_actions[-history_length_int:]:
+            if action.type != "load" and not self.is_history_action(action):
                 actionDict = json.loads(action.json(), strict=False)
                 redo_list.append(actionDict)
             else:
                 log.info("Saving redo history, skipped key: %s" % str(action.key))
-        for action in self.actionHistory[-history_length_int:]:
-            if action.type != "load" and action.key[0] != "history":
+        for action in undo_actions[-history_length_int:]:
+            if action.type != "load" and not self.is_history_action(action):
                 actionDict = json.loads(action.json(), strict=False)
                 undo_list.append(actionDict)
             else:
@@ -203,11 +318,141 @@ class UpdateManager:
         # Set history data in project
         self.update_untracked(["history"], {"redo": redo_list, "undo": undo_list})
 
+    @staticmethod
+    def is_history_action(action):
+        """ Check if an action only changes the project history """
+        return bool(action.key) and action.key[0] == "history"
+
+    def add_to_history(self, action):
+        """ Add a performed action to the undo history. Actions with the same transaction id as the
+        last transaction are added to it (and undone/redone together). """
+        action = self.get_history_action(action)
+        if self.actionHistory and self.actionHistory[-1][0].transaction == action.transaction:
+            self.actionHistory[-1].append(action)
+        else:
+            self.actionHistory.append([action])
+        self.history_bytes += action.size
+        self.limit_history_size()
+
+    def get_history_action(self, action):
+        """ Get the compact form of a performed action, to store in the undo/redo history. An update
+        of an object is stored as a 'delta' action, which only contains the changed values. """
+        if action.type == "update" and isinstance(action.values, dict) and isinstance(action.old_values, dict):
+            new_values = dict(action.old_values)
+            new_values.update(action.values)
+            action = UpdateAction("delta", action.key, get_delta(action.old_values, new_values),
+                                  transaction=action.transaction)
+        action.size = action.estimate_size()
+        return action
+
+    def expand_action(self, action, undo=False):
+        """ Get a copy of an action from the history, which can be performed (or reversed, if undo is True).
+        A 'delta' action is applied to the current project data, to get the values of the update. """
+        if action.type != "delta":
+            return action.copy()
+
+        current_values = get_app().project.get(action.key)
+        if not isinstance(current_values, dict):
+            log.warning("Unable to find history key in project data: %s" % str(action.key))
+            return None
+        if undo:
+            return UpdateAction("update", action.key, current_values,
+                                apply_delta(current_values, action.values, "old"), action.transaction)
+        return UpdateAction("update", action.key, apply_delta(current_values, action.values, "new"),
+                            current_values, action.transaction)
+
+    def limit_history_size(self):
+        """ Move the oldest transactions of the undo history to disk, while the history uses more memory
+        than history_byte_limit (the last transaction is always kept in memory) """
+        if not self.history_byte_limit:
+            return
+
+        while self.history_bytes > self.history_byte_limit and len(self.actionHistory) > 1:
+            transaction = self.actionHistory[0]
+            try:
+                data = json.dumps([action.get_dict() for action in transaction]).encode("utf-8")
+            except (TypeError, ValueError):
+                log.warning("Unable to move undo history to disk, removed oldest transaction", exc_info=1)
+                self.remove_oldest_transaction()
+                continue
+
+            offset = None
+            try:
+                if not self.spill_file:
+                    self.spill_file = tempfile.TemporaryFile(prefix="openshot-history-")
+                self.spill_file.seek(0, os.SEEK_END)
+                offset = self.spill_file.tell()
+                self.spill_file.write(data)
+                self.spill_file.flush()
+            except OSError:
+                # Keep the transaction in memory (and remove anything partially written)
+                log.warning("Unable to move undo history to disk", exc_info=1)
+                if offset is not None:
+                    try:
+                        self.spill_file.truncate(offset)
+                    except OSError:
+                        pass
+                return
+
+            # Only record the transaction on disk once it was written
+            self.spilled_history.append((offset, len(data)))
+            self.remove_oldest_transaction()
+
+    def remove_oldest_transaction(self):
+        """ Remove the oldest transaction of the undo history from memory """
+        transaction = self.actionHistory.pop(0)
+        self.history_bytes -= sum(action.size for action in transaction)
+
+    def read_spilled_transaction(self, index):
+        """ Read a transaction of the undo history from disk (as a list of actions) """
+        offset, length = self.spilled_history[index]
+        try:
+            self.spill_file.seek(offset)
+            transaction = json.loads(self.spill_file.read(length).decode("utf-8"), strict=False)
+        except (OSError, ValueError):
+            log.warning("Unable to read undo history from disk", exc_info=1)
+            return []
+
+        actions = []
+        for action_dict in transaction:
+            action = UpdateAction()
+            action.load_dict(action_dict)
+            actions.append(self.get_history_action(action))
+        return actions
+
+    def restore_spilled_history(self):
+        """ Move the most recent transaction on disk back into the undo history """
+        while self.spilled_history and not self.actionHistory:
+            transaction = self.read_spilled_transaction(-1)
+            offset, _ = self.spilled_history.pop()
+            try:
+                self.spill_file.truncate(offset)
+            except OSError:
+                log.warning("Unable to truncate undo history on disk", exc_info=1)
+            if transaction:
+                self.actionHistory.append(transaction)
+                self.history_bytes += sum(action.size for action in transaction)
+
+    def clear_redo_history(self):
+        """ Remove all undone transactions """
+        for transaction in self.redoHistory:
+            self.history_bytes -= sum(action.size for action in transaction)
+        self.redoHistory.clear()
+
+    def clear_history(self):
+        """ Remove all transactions from the undo/redo history (in memory and on disk) """
+        self.actionHistory.clear()
+        self.redoHistory.clear()
+        self.history_bytes = 0
+        self.spilled_history.clear()
+        if self.spill_file:
+            self.spill_file.close()
+            self.spill_file = None
+
     def reset(self):
         """ Reset the UpdateManager, and clear all UpdateActions and History.
         This does not clear listeners and watchers. """
-        self.actionHistory.clear()
-        self.redoHistory.clear()
+        self.clear_history()
         self.pending_action = None
         self.last_action = None
 
@@ -219,6 +464,7 @@ class UpdateManager:
         if listener in self.updateListeners:
             log.info("Remove listener from UpdateManager: %s" % str(listener))
             self.updateListeners.remove(listener)
+            self.listener_stats.pop(listener, None)
 
     def add_listener(self, listener, index=-1):
         """ Add a new listener (which will invoke the changed(action) method
@@ -231,6 +477,7 @@ class UpdateManager:
             else:
                 # Insert listener at index
                 self.updateListeners.insert(index, listener)
+            self.listener_stats[listener] = {"delivered": 0, "skipped": 0, "time": 0.0}
         else:
             log.warning("Cannot add existing listener: {}".format(str(listener)))
 
@@ -246,7 +493,7 @@ class UpdateManager:
     def update_watchers(self):
         """ Notify all watchers if any 'undo' or 'redo' actions are available. """
 
-        new_status = (len(self.actionHistory) >= 1, len(self.redoHistory) >= 1)
+        new_status = (len(self.actionHistory) + len(self.spilled_history) >= 1, len(self.redoHistory) >= 1)
         if self.currentStatus[0] != new_status[0] or self.currentStatus[1] != new_status[1]:
             for watcher in self.statusWatchers:
                 watcher.updateStatusChanged(*new_status)
@@ -258,14 +505,20 @@ class UpdateManager:
     # caused by actions.
     def get_reverse_action(self, action):
         """ Convert an UpdateAction into the opposite type (i.e. 'insert' becomes an 'delete') """
-        reverse = UpdateAction(action.type, action.key, action.values)
+        if action.type == "batch":
+            # Reverse each action of the batch (in reverse order)
+            return UpdateAction("batch", action.key,
+                                [self.get_reverse_action(a) for a in reversed(action.values)],
+                                transaction=action.transaction)
+
+        reverse = UpdateAction(action.type, action.key, action.values, transaction=action.transaction)
         # On adds, setup remove
         if action.type == "insert":
             reverse.type = "delete"
 
-            # replace last part of key with ID (so the delete knows which item to delete)
+            # append ID to key (so the delete knows which item to delete)
             id = action.values["id"]
-            action.key.append({"id": id})
+            reverse.key = action.key + [{"id": id}]
 
         # On removes, setup add with old value
         elif action.type == "delete":
@@ -275,26 +528,25 @@ class UpdateManager:
                 reverse.key = reverse.key[:-1]
 
         # On updates, just swap the old and new values data
-        # Swap old and new values
-        reverse.old_values = json.loads(json.dumps(action.values))
-        reverse.values = json.loads(json.dumps(action.old_values))
+        # Swap old and new values (values are never modified in place, so no copies are needed)
+        reverse.old_values = action.values
+        reverse.values = action.old_values
 
         return reverse
 
     def undo(self):
-        """ Undo the last UpdateAction (and notify all listeners and watchers).
-            Continue until all identical transaction ids have been found. """
-        # Get all actions with the same transaction id as the last one, in reverse order
-        last_transaction = self.actionHistory[-1].transaction if self.actionHistory else None
-        last_transactions = [a for a in reversed(self.actionHistory) if a.transaction == last_transaction]
-        remove_selection = any(a.type == "insert" for a in last_transactions)
-
-        if remove_selection:
-            # Remove selections for any items about to be deleted
-            for action in last_transactions:
-                if action.type == "insert":
-                    object_id = action.values.get("id", None)
-                    get_app().window.removeSelection(object_id, None)
+        """ Undo the last transaction of UpdateActions (and notify all listeners and watchers). """
+        self.restore_spilled_history()
+        if not self.actionHistory:
+            return
+        last_transaction = self.actionHistory.pop()
+
+        # Remove selections for any items about to be deleted
+        inserted_ids = [a.values.get("id", None) for t in last_transaction
+                        for a in t.get_actions() if a.type == "insert"]
+        if inserted_ids:
+            for object_id in inserted_ids:
+                get_app().window.removeSelection(object_id, None)
 
             # Force property and selection timers to fire
             get_app().window.show_property_timer.stop()
@@ -303,21 +555,20 @@ class UpdateManager:
             get_app().window.selection_timer.timeout.emit()
             get_app().processEvents()
 
-        # Iterate each action in this transaction
-        for index, last_action in enumerate(last_transactions):
-            self.actionHistory.remove(last_action)
-
-            # Copy action
-            last_action = last_action.copy()
+        # Add transaction to redo list
+        self.redoHistory.append(last_transaction)
+        self.pending_action = None
 
-            # Add action to redo list
-            self.redoHistory.append(last_action)
-            self.pending_action = None
-            # Get reverse of last action and perform it
+        # Iterate each action in this transaction (in reverse order)
+        for index, last_action in enumerate(reversed(last_transaction)):
+            # Get reverse of last action
+            last_action = self.expand_action(last_action, undo=True)
+            if not last_action:
+                continue
             reverse = self.get_reverse_action(last_action)
 
             # Ignore updates to UI on all actions except last one
-            ignore_refresh = (index != len(last_transactions) - 1)
+            ignore_refresh = (index != len(last_transaction) - 1)
             get_app().window.IgnoreUpdates.emit(ignore_refresh, True)
 
             # Perform next undo action
@@ -327,45 +578,90 @@ class UpdateManager:
             get_app().window.verifySelections()
 
     def redo(self):
-        """ Redo the last UpdateAction (and notify all listeners and watchers).
-            Continue until all identical transaction ids have been found. """
-        # Get all actions with the same transaction id as the last one, in reverse order
-        last_transaction = self.redoHistory[-1].transaction if self.redoHistory else None
-        last_transactions = [a for a in reversed(self.redoHistory) if a.transaction == last_transaction]
-
-        # Iterate through each action in this transaction
-        for index, next_action in enumerate(last_transactions):
-            self.redoHistory.remove(next_action)
-
-            # Copy action
-            next_action = next_action.copy()
+        """ Redo the last undone transaction of UpdateActions (and notify all listeners and watchers). """
+        if not self.redoHistory:
+            return
+        next_transaction = self.redoHistory.pop()
 
-            # Remove ID from insert (if found)
-            if next_action.type == "insert" and isinstance(next_action.key[-1], dict) and "id" in next_action.key[-1]:
-                next_action.key = next_action.key[:-1]
+        # Add transaction to undo list
+        self.actionHistory.append(next_transaction)
+        self.pending_action = None
 
-            self.actionHistory.append(next_action)
-            self.pending_action = None
+        # Iterate through each action in this transaction
+        for index, next_action in enumerate(next_transaction):
+            # Copy action (so the undone action is not modified)
+            next_action = self.expand_action(next_action)
+            if not next_action:
+                continue
 
             # Ignore updates to UI on all actions except last one
-            ignore_refresh = (index != len(last_transactions) - 1)
+            ignore_refresh = (index != len(next_transaction) - 1)
             get_app().window.IgnoreUpdates.emit(ignore_refresh, True)
 
             # Perform next redo action
             self.dispatch_action(next_action)
 
+    @staticmethod
+    def is_subscribed(listener, action):
+        """ Check if a listener is interested in an action (see UpdateInterface.key_prefixes) """
+        action_types = getattr(listener, "action_types", None)
+        if action_types is not None and action.type not in action_types:
+            return False
+        if not action.key or not isinstance(action.key[0], str):
+            return True
+        key_prefix = action.key[0].lower()
+        key_prefixes = getattr(listener, "key_prefixes", None)
+        if key_prefixes is not None and key_prefix not in key_prefixes:
+            return False
+        return key_prefix not in getattr(listener, "ignored_key_prefixes", ())
+
+    def get_listener_actions(self, listener, action):
+        """ Get the list of actions to deliver to a listener (only the actions it is subscribed to).
+        A batch is split into separate actions, unless the listener supports batches. """
+        if action.type != "batch":
+            return [action] if self.is_subscribed(listener, action) else []
+
+        batch_actions = [a for a in action.values if self.is_subscribed(listener, a)]
+        if not getattr(listener, "supports_batch", False):
+            return batch_actions
+        if len(batch_actions) == len(action.values):
+            return [action]
+        if batch_actions:
+            return [UpdateAction("batch", action.key, batch_actions, transaction=action.transaction)]
+        return []
+
     # Carry out an action on all listeners
     def dispatch_action(self, action):
         """ Distribute changes to all listeners (by calling their changed() method) """
+        num_actions = len(action.values) if action.type == "batch" else 1
+        listener_times = []  # Time spent in each listener (only used when profiling)
+        dispatch_start_time = time.perf_counter()
 
         try:
             # Loop through all listeners
             for listener in self.updateListeners:
-                # Invoke change method on listener
-                listener.changed(action)
+                stats = self.listener_stats.setdefault(listener, {"delivered": 0, "skipped": 0, "time": 0.0})
+                listener_actions = self.get_listener_actions(listener, action)
+                delivered = sum(len(a.values) if a.type == "batch" else 1 for a in listener_actions)
+                stats["skipped"] += num_actions - delivered
+                if not listener_actions:
+                    continue
+
+                # Invoke change method on listener (once per action, or once per batch)
+                start_time = time.perf_counter()
+                for listener_action in listener_actions:
+                    listener.changed(listener_action)
+                listener_time = time.perf_counter() - start_time
+                stats["time"] += listener_time
+                stats["delivered"] += delivered
+                if profiler.enabled:
+                    listener_times.append((type(listener).__name__, listener_time))
 
         except Exception as ex:
             log.error("Couldn't apply '{}' to update listener: {}\n{}".format(action.type, listener, ex))
+
+        if profiler.enabled:
+            profiler.record_dispatch(action, time.perf_counter() - dispatch_start_time, listener_times)
         self.update_watchers()
 
     # Perform load action (loading all project data), clearing history for taking a new path
@@ -375,39 +671,51 @@ class UpdateManager:
 
         self.last_action = UpdateAction('load', '', values)
         if reset_history:
-            self.redoHistory.clear()
-            self.actionHistory.clear()
+            self.clear_history()
         self.pending_action = None
         self.dispatch_action(self.last_action)
 
+    def perform_action(self, action, clear_redo=True):
+        """ Distribute a new action to all listeners, and add it to the history (unless history is ignored).
+        Actions are added to the history once performed, since the history stores the changes they made. """
+        self.last_action = action
+        if self.ignore_history:
+            self.pending_action = action
+            self.dispatch_action(action)
+            return
+
+        if clear_redo:
+            self.clear_redo_history()
+        self.pending_action = None
+        self.dispatch_action(action)
+        self.add_to_history(action)
+
+        # Notify watchers of new history state
+        self.update_watchers()
+
     # Perform new actions, clearing redo history for taking a new path
     def insert(self, key, values):
         """ Insert a new UpdateAction into the UpdateManager
         (this action will then be distributed to all listeners) """
 
-        self.last_action = UpdateAction('insert', key, values, transaction=self.transaction_id)
-        if self.ignore_history:
-            self.pending_action = self.last_action
-        else:
-            self.redoHistory.clear()
-            self.pending_action = None
-            self.actionHistory.append(self.last_action)
-        self.dispatch_action(self.last_action)
+        action = UpdateAction('insert', key, values, transaction=self.transaction_id)
+        if self.batch_actions is not None:
+            self.add_to_batch(action)
+            return
+
+        self.perform_action(action)
 
     def update(self, key, values):
         """ Update the UpdateManager with an UpdateAction
         (this action will then be distributed to all listeners) """
 
-        self.last_action = UpdateAction('update', key, values, transaction=self.transaction_id)
-        if self.ignore_history:
-            self.pending_action = self.last_action
-        else:
-            if self.last_action.key and self.last_action.key[0] != "history":
-                # Clear redo history for any update except a "history" update
-                self.redoHistory.clear()
-            self.pending_action = None
-            self.actionHistory.append(self.last_action)
-        self.dispatch_action(self.last_action)
+        action = UpdateAction('update', key, values, transaction=self.transaction_id)
+        if self.batch_actions is not None:
+            self.add_to_batch(action)
+            return
+
+        # Clear redo history for any update except a "history" update
+        self.perform_action(action, clear_redo=not self.is_history_action(action))
 
     def update_untracked(self, key, values):
         """ Update the UpdateManager with an UpdateAction, without creating
@@ -415,29 +723,67 @@ class UpdateManager:
         (this action will then be distributed to all listeners) """
         previous_ignore = self.ignore_history
         previous_pending = self.pending_action
+        previous_batch = self.batch_actions
         self.ignore_history = True
+        self.batch_actions = None  # Untracked updates are never part of a batch
         self.update(key, values)
         self.ignore_history = previous_ignore
         self.pending_action = previous_pending
+        self.batch_actions = previous_batch
 
     def delete(self, key):
         """ Delete an item from the UpdateManager with an UpdateAction
         (this action will then be distributed to all listeners) """
 
-        self.last_action = UpdateAction('delete', key, transaction=self.transaction_id)
-        if self.ignore_history:
-            self.pending_action = self.last_action
-        else:
-            self.redoHistory.clear()
-            self.pending_action = None
-            self.actionHistory.append(self.last_action)
-        self.dispatch_action(self.last_action)
+        action = UpdateAction('delete', key, transaction=self.transaction_id)
+        if self.batch_actions is not None:
+            self.add_to_batch(action)
+            return
+
+        self.perform_action(action)
+
+    @contextmanager
+    def batch(self):
+        """ Collect all inserts, updates, and deletes (until the end of the 'with' block) into a single
+        'batch' action. The batch is distributed to each listener once, and undone/redone as a single
+        history entry. Project data is not changed until the batch ends. """
+        if self.batch_actions is not None:
+            # Nested batch, actions are added to the outer batch
+            yield
+            return
+
+        self.batch_actions = []
+        try:
+            yield
+        except BaseException:
+            # Discard the batch (none of its actions have changed the project yet)
+            log.warning("Discarding batch of %s actions", len(self.batch_actions))
+            self.batch_actions = None
+            raise
+        actions = self.batch_actions
+        self.batch_actions = None
+        self.apply_batch(actions)
+
+    def add_to_batch(self, action):
+        """ Add an UpdateAction to the current batch. The key and values are copied, since the
+        caller may change its data (i.e. in a loop) before the batch is applied. """
+        action.key = copy_data(action.key)
+        action.values = copy_data(action.values)
+        self.batch_actions.append(action)
+
+    def apply_batch(self, actions):
+        """ Apply a list of UpdateActions (insert, update, or delete) as a single 'batch' UpdateAction
+        (this action will then be distributed to all listeners) """
+        if not actions:
+            return
+
+        self.perform_action(UpdateAction('batch', [], list(actions), transaction=self.transaction_id))
 
     def apply_last_action_to_history(self, previous_value):
         """ Apply the last action to the history """
         if self.pending_action:
             self.pending_action.set_old_values(previous_value)
-            self.actionHistory.append(self.pending_action)
+            self.add_to_history(self.pending_action)
             self.last_action = self.pending_action
             self.pending_action = None
 
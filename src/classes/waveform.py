@@ -29,17 +29,24 @@ import threading
 from classes.app import get_app
 from classes.logger import log
 from classes.query import File, Clip
+from classes.waveform_store import (
+    get_file_waveform_id, get_clip_waveform_id, get_extraction_rate, build_pyramid,
+    save_waveform, load_waveform, get_waveform_samples
+)
 from PyQt5.QtGui import QCursor
 from PyQt5.QtCore import Qt
 import openshot
 import uuid
 
+# NumPy is optional (it speeds up mapping samples to clips)
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
 # Get settings
 s = get_app().get_settings()
 
-# resolution of audio waveform
-SAMPLES_PER_SECOND = 20
-
 
 def get_audio_data(files: dict, transaction_id=None):
     """Get a Clip object form libopenshot, and grab audio data
@@ -48,6 +55,9 @@ def get_audio_data(files: dict, transaction_id=None):
         arg1: a dict of clip_ids grouped by their file_id
     """
 
+    # Apply queued changes to the timeline (the threads look up its clips)
+    get_app().window.timeline_sync.flush()
+
     for file_id in files:
         clip_list = files[file_id]
 
@@ -69,12 +79,13 @@ def get_waveform_thread(file_id, clip_list, transaction_id):
         """
         Update the file query object with audio data (if found).
         """
-        # Ensure that UI attribute exists
         file_data = file.data
-        file_audio_data = file_data.get("ui", {}).get("audio_data", [])
-        if file_audio_data and channel == -1:
-            log.info("Audio Data already retrieved (or being retrieved).")
-            return
+
+        # Use the samples of this channel from the waveform store (if already extracted)
+        if channel != -1:
+            channel_audio_data = load_waveform(get_file_waveform_id(file.id, channel))
+            if channel_audio_data:
+                return channel_audio_data
 
         # Open file and access audio data (if audio data is found, otherwise return)
         temp_clip = openshot.Clip(file_data["path"])
@@ -85,28 +96,34 @@ def get_waveform_thread(file_id, clip_list, transaction_id):
         # Show waiting cursor
         get_app().setOverrideCursor(QCursor(Qt.WaitCursor))
 
-        # Extract audio waveform data (for all channels)
-        # Use max RMS (root mean squared) value for each sample
-        # NOTE: we also have the average RMS value calculated, although we do
-        # not use it yet
+        # Extract audio waveform data (for all channels), at the finest resolution
+        # of the pyramid which fits this duration. Use max and RMS (root mean squared)
+        # values for each sample.
+        samples_per_second = get_extraction_rate(temp_clip.Reader().info.duration)
         waveformer = openshot.AudioWaveformer(temp_clip.Reader())
-        file_audio_data = waveformer.ExtractSamples(channel, SAMPLES_PER_SECOND, True)
+        file_audio_data = waveformer.ExtractSamples(channel, samples_per_second, True)
         samples_vectors = file_audio_data.vectors()
         max_samples_vector = samples_vectors[0]  # max sample value dataset
         rms_samples_vector = samples_vectors[1]  # average RMS sample value dataset
 
+        # Build the coarser levels of the pyramid
+        levels = build_pyramid(max_samples_vector, rms_samples_vector, samples_per_second)
+
         # Clear data
         file_audio_data.clear()
 
-        # Update file with audio data (only if all channels requested)
+        # Save the samples to the waveform store
+        waveform = save_waveform(get_file_waveform_id(file.id, channel), levels)
+
+        # Update file with a reference to its waveform (only if all channels requested)
         if channel == -1:
-            get_app().window.timeline.fileAudioDataReady.emit(file.id, {"ui": {"audio_data": max_samples_vector}}, tid)
+            get_app().window.timeline.fileAudioDataReady.emit(file.id, {"ui": {"waveform": waveform}}, tid)
 
         # Restore cursor
         get_app().restoreOverrideCursor()
 
-        # Return audio sample dataset
-        return max_samples_vector
+        # Return audio sample pyramid
+        return levels
 
     # Get file query object
     file = File.get(id=file_id)
@@ -122,13 +139,12 @@ def get_waveform_thread(file_id, clip_list, transaction_id):
     else:
         tid = str(uuid.uuid4())
 
-    # If the file doesn't have audio data, generate it.
-    # A pending audio_data process will have audio_data == [-999]
-    file_audio_data = file.data.get("ui", {}).get("audio_data", [])
+    # If the file doesn't have audio data (or its waveform is missing from the store), generate it.
+    file_audio_data = get_waveform_samples(file.data)
     if not file_audio_data:
         log.debug("Generating audio data for file %s" % file.id)
-        # Save empty 'audio_data' property before we get audio samples
-        get_app().window.timeline.fileAudioDataReady.emit(file.id, {"ui": {"audio_data": None}}, tid)
+        # Save empty 'waveform' property before we get audio samples
+        get_app().window.timeline.fileAudioDataReady.emit(file.id, {"ui": {"waveform": None}}, tid)
         # Generate audio data for a specific file
         file_audio_data = getAudioData(file, tid=tid)
 
@@ -147,45 +163,86 @@ def get_waveform_thread(file_id, clip_list, transaction_id):
             continue
 
         # Check for channel mapping and filters
+        clip_file_audio_data = file_audio_data
         channel_filter = int(clip.data.get("channel_filter", {}).get("Points", [])[0].get("co", {}).get("Y", -1))
         if channel_filter != -1:
             # Some kind of filtering is happening, so we need to re-generate waveform data for this clip
-            file_audio_data = getAudioData(file, channel_filter, tid=tid)
+            clip_file_audio_data = getAudioData(file, channel_filter, tid=tid)
 
         # Get File's audio data (since it has changed)
-        if not file_audio_data:
+        if not clip_file_audio_data:
             log.info("File has no audio, so we cannot find any waveform audio data")
             continue
 
-        # Save empty 'audio_data' property before we get audio samples
-        get_app().window.timeline.clipAudioDataReady.emit(clip.id, {"ui": {"audio_data": None}}, tid)
+        # Save empty 'waveform' property before we get audio samples
+        get_app().window.timeline.clipAudioDataReady.emit(clip.id, {"ui": {"waveform": None}}, tid)
 
-        # Loop through samples from the file, applying this clip's volume curve
-        clip_audio_data = []
+        # Apply this clip's volume and time curves to each level of the file's samples
         clip_instance = get_app().window.timeline_sync.timeline.GetClip(clip.id)
         if not clip_instance:
             log.info("Clip not found, bailing out of waveform volume adjustments")
             continue
-        num_frames = clip_instance.info.video_length
-
-        # Determine best guess # of samples (based on duration)
-        # We don't want to use the len(file_audio_data) due to padding at EOF
-        # from libopenshot
-        sample_count = round(clip_instance.info.duration * SAMPLES_PER_SECOND)
-
-        # Determine sample ratio to FPS
-        sample_ratio = float(sample_count / num_frames)
-
-        # Loop through file samples and adjust time/volume values
-        # Copy adjusted samples into clip data
-        for sample_index in range(sample_count):
-            frame_num = round(sample_index / sample_ratio) + 1
-            volume = clip_instance.volume.GetValue(frame_num)
-            if clip_instance.time.GetCount() > 1:
-                # Override sample # using time curve (if set)
-                # Don't exceed array size
-                sample_index = min(round(clip_instance.time.GetValue(frame_num) * sample_ratio), sample_count - 1)
-            clip_audio_data.append(file_audio_data[sample_index] * volume)
-
-        # Save this data to the clip object
-        get_app().window.timeline.clipAudioDataReady.emit(clip.id, {"ui": {"audio_data": clip_audio_data}}, tid)
+        volumes, times = get_clip_curves(clip_instance)
+        duration = clip_instance.info.duration
+        clip_levels = {}
+        for samples_per_second, (max_samples, rms_samples) in clip_file_audio_data.items():
+            clip_levels[samples_per_second] = (
+                get_clip_samples(max_samples, samples_per_second, duration, volumes, times),
+                get_clip_samples(rms_samples, samples_per_second, duration, volumes, times))
+
+        # Save this data to the waveform store, and a reference to it in the clip object
+        waveform = save_waveform(get_clip_waveform_id(clip.id), clip_levels)
+        get_app().window.timeline.clipAudioDataReady.emit(clip.id, {"ui": {"waveform": waveform}}, tid)
+
+
+def get_clip_curves(clip_instance):
+    """Evaluate the volume and time curves of a clip once per frame (shared by all levels of its
+    waveform). Returns the lists of volumes and times, indexed by frame number (times is None if
+    the clip has no time curve)."""
+    # Samples are mapped to frames 1 to video_length + 1 (rounding the last samples up)
+    frame_nums = range(1, clip_instance.info.video_length + 2)
+    volumes = [0.0] + [clip_instance.volume.GetValue(frame_num) for frame_num in frame_nums]
+    times = None
+    if clip_instance.time.GetCount() > 1:
+        times = [0.0] + [clip_instance.time.GetValue(frame_num) for frame_num in frame_nums]
+    return volumes, times
+
+
+def get_clip_samples(file_samples, samples_per_second, duration, volumes, times):
+    """Get the samples of a clip (from the samples of its file), with the volume
+    and time curves of the clip applied (see get_clip_curves)"""
+    num_frames = len(volumes) - 2
+
+    # Determine best guess # of samples (based on duration)
+    # We don't want to use the len(file_audio_data) due to padding at EOF
+    # from libopenshot
+    sample_count = round(duration * samples_per_second)
+
+    # Determine sample ratio to FPS
+    sample_ratio = float(sample_count / num_frames)
+
+    if numpy:
+        # Map samples with array operations (numpy rounds half to even, like round())
+        sample_indexes = numpy.arange(sample_count)
+        frame_nums = numpy.rint(sample_indexes / sample_ratio).astype(numpy.int64) + 1
+        if times is not None:
+            # Override sample # using time curve (if set)
+            # Don't exceed array size
+            time_values = numpy.asarray(times, dtype=numpy.float64)[frame_nums]
+            sample_indexes = numpy.minimum(
+                numpy.rint(time_values * sample_ratio).astype(numpy.int64), sample_count - 1)
+        samples = numpy.asarray(file_samples, dtype=numpy.float64)
+        volume_values = numpy.asarray(volumes, dtype=numpy.float64)[frame_nums]
+        return (samples[sample_indexes] * volume_values).tolist()
+
+    # Loop through file samples and adjust time/volume values
+    # Copy adjusted samples into clip data
+    clip_audio_data = []
+    for sample_index in range(sample_count):
+        frame_num = round(sample_index / sample_ratio) + 1
+        if times is not None:
+            # Override sample # using time curve (if set)
+            # Don't exceed array size
+            sample_index = min(round(times[frame_num] * sample_ratio), sample_count - 1)
+        clip_audio_data.append(file_samples[sample_index] * volumes[frame_num])
+    return clip_audio_data
@@ -0,0 +1,203 @@
+"""
+ @file
+ @brief This file contains a binary store of audio waveforms (kept outside of the project data)
+ @author Jonathan Thomas <jonathan@openshot.org>
+
+ @section LICENSE
+
+ Copyright (c) 2008-2024 OpenShot Studios, LLC
+ (http://www.openshotstudios.com). This file is part of
+ OpenShot Video Editor (http://www.openshot.org), an open-source project
+ dedicated to delivering high quality video editing and animation solutions
+ to the world.
+
+ OpenShot Video Editor is free software: you can redistribute it and/or modify
+ it under the terms of the GNU General Public License as published by
+ the Free Software Foundation, either version 3 of the License, or
+ (at your option) any later version.
+
+ OpenShot Video Editor is distributed in the hope that it will be useful,
+ but WITHOUT ANY WARRANTY; without even the implied warranty of
+ MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+ GNU General Public License for more details.
+
+ You should have received a copy of the GNU General Public License
+ along with OpenShot Library.  If not, see <http://www.gnu.org/licenses/>.
+ """
+
+import math
+import mmap
+import os
+import re
+import sys
+import uuid
+from array import array
+
+from classes import info
+from classes.logger import log
+
+# Waveform samples are stored as little-endian float32 arrays (the byte order of Float32Array in JS)
+WAVEFORM_FORMAT = "float32"
+WAVEFORM_EXTENSION = ".f32"
+
+# Resolutions of the waveform pyramid (samples per second). Each level stores pairs of
+# (max, RMS) values, and levels with more than WAVEFORM_MAX_LEVEL_SAMPLES are skipped.
+WAVEFORM_LEVELS = (2, 20, 200, 2000)
+WAVEFORM_MAX_LEVEL_SAMPLES = 2000000
+
+# Resolution of legacy waveforms (audio_data lists saved in older projects)
+LEGACY_SAMPLES_PER_SECOND = 20
+
+# Valid waveform ids (used as file names, and in URLs)
+REGEX_WAVEFORM_ID = re.compile(r"^[A-Za-z0-9_-]+$")
+
+
+def get_file_waveform_id(file_id, channel=-1):
+    """ Get the waveform id of a file's samples (for all channels, or a single channel) """
+    return "%s-%s" % (file_id, "all" if channel == -1 else int(channel))
+
+
+def get_clip_waveform_id(clip_id):
+    """ Get the waveform id of a clip's samples (with its volume and time curves applied) """
+    return "clip-%s" % clip_id
+
+
+def get_level_id(waveform_id, samples_per_second):
+    """ Get the id of one level of a waveform pyramid """
+    return "%s-%s" % (waveform_id, int(samples_per_second))
+
+
+def get_waveform_path(level_id):
+    """ Get the path of a waveform level in the waveform folder (or None for an invalid id) """
+    if not level_id or not REGEX_WAVEFORM_ID.match(level_id):
+        return None
+    return os.path.join(info.WAVEFORM_PATH, level_id + WAVEFORM_EXTENSION)
+
+
+def has_waveform(data):
+    """ Does project data (i.e. a file or clip) have a waveform (stored or legacy audio_data) """
+    ui = data.get("ui") or {}
+    return bool(ui.get("waveform") or ui.get("audio_data"))
+
+
+def get_extraction_rate(duration):
+    """ Get the finest level of the pyramid which can be extracted for a duration (in seconds) """
+    for samples_per_second in sorted(WAVEFORM_LEVELS, reverse=True):
+        if duration * samples_per_second <= WAVEFORM_MAX_LEVEL_SAMPLES:
+            return samples_per_second
+    return min(WAVEFORM_LEVELS)
+
+
+def build_pyramid(max_samples, rms_samples, samples_per_second):
+    """ Build the levels of a waveform pyramid from the (max, RMS) samples of its finest level.
+    Each coarser level combines the samples of the finest level: the max of max values, and
+    the RMS of RMS values. Returns {samples per second: (max samples, RMS samples)}. """
+    levels = {samples_per_second: (list(max_samples), list(rms_samples))}
+    for level in WAVEFORM_LEVELS:
+        if level >= samples_per_second or samples_per_second % level:
+            continue
+        factor = samples_per_second // level
+        level_max = []
+        level_rms = []
+        for index in range(0, len(max_samples), factor):
+            group_rms = rms_samples[index:index + factor]
+            level_max.append(max(max_samples[index:index + factor]))
+            level_rms.append(math.sqrt(sum(value * value for value in group_rms) / len(group_rms)))
+        levels[level] = (level_max, level_rms)
+    return levels
+
+
+def save_waveform(waveform_id, levels):
+    """ Write the levels of a waveform pyramid ({samples per second: (max samples, RMS samples)})
+    to the waveform store, and return the reference to keep in the project data (a new version
+    is created each time, so the timeline reloads the samples) """
+    if not get_waveform_path(waveform_id):
+        raise ValueError("Invalid waveform id: %s" % waveform_id)
+
+    os.makedirs(info.WAVEFORM_PATH, exist_ok=True)
+    level_counts = {}
+    for samples_per_second, (max_samples, rms_samples) in levels.items():
+        # Interleave the max and RMS values of each sample
+        samples = array("f", [0.0]) * (len(max_samples) * 2)
+        samples[0::2] = array("f", max_samples)
+        samples[1::2] = array("f", rms_samples)
+        if sys.byteorder != "little":
+            samples.byteswap()
+
+        # Write to a temp file first (the previous version may be memory-mapped or served)
+        waveform_path = get_waveform_path(get_level_id(waveform_id, samples_per_second))
+        temp_path = "%s.%s.tmp" % (waveform_path, uuid.uuid4().hex)
+        with open(temp_path, "wb") as f:
+            samples.tofile(f)
+        os.replace(temp_path, waveform_path)
+        level_counts[str(samples_per_second)] = len(max_samples)
+
+    return {"id": waveform_id,
+            "format": WAVEFORM_FORMAT,
+            "channels": ["max", "rms"],
+            "levels": level_counts,
+            "version": uuid.uuid4().hex[:8]}
+
+
+def load_level(level_id):
+    """ Memory-map the samples of a waveform level, and return them as a (read-only) sequence
+    of interleaved (max, RMS) floats, or None if the level is not found """
+    waveform_path = get_waveform_path(level_id)
+    if not waveform_path or not os.path.exists(waveform_path):
+        return None
+
+    try:
+        with open(waveform_path, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return array("f")
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except OSError:
+        log.warning("Unable to read waveform %s", waveform_path, exc_info=1)
+        return None
+
+    if sys.byteorder != "little":
+        samples = array("f")
+        samples.frombytes(mapped)
+        samples.byteswap()
+        return samples
+    return memoryview(mapped).cast("f")
+
+
+def load_waveform(waveform_id, level_ids=None):
+    """ Load all levels of a waveform pyramid ({samples per second: (max samples, RMS samples)}),
+    optionally limited to some levels. Returns None if any level is missing. """
+    levels = {}
+    for samples_per_second in level_ids or WAVEFORM_LEVELS:
+        samples = load_level(get_level_id(waveform_id, samples_per_second))
+        if samples is None:
+            if level_ids:
+                return None
+            continue
+        levels[int(samples_per_second)] = (samples[0::2], samples[1::2])
+    return levels or None
+
+
+def read_waveform_bytes(level_id):
+    """ Get the raw bytes of a waveform level (little-endian float32), or None if not found """
+    waveform_path = get_waveform_path(level_id)
+    if not waveform_path or not os.path.exists(waveform_path):
+        return None
+    with open(waveform_path, "rb") as f:
+        return f.read()
+
+
+def get_waveform_samples(data):
+    """ Get the waveform pyramid of a file or clip: from the waveform store (if referenced), or
+    from the legacy audio_data list saved in older projects (a single level of max samples).
+    Returns None if no samples are found. """
+    ui = data.get("ui") or {}
+    reference = ui.get("waveform")
+    if reference:
+        levels = load_waveform(reference.get("id"), list(reference.get("levels", {})))
+        if levels:
+            return levels
+        log.info("Waveform %s not found in the waveform store", reference.get("id"))
+    audio_data = ui.get("audio_data")
+    if audio_data:
+        return {LEGACY_SAMPLES_PER_SECOND: (audio_data, audio_data)}
+    return None
@@ -0,0 +1,118 @@
+"""
+ @file
+ @brief This file contains unit tests for the ProjectJournal class
+ @author Jonathan Thomas <jonathan@openshot.org>
+
+ @section LICENSE
+
+ Copyright (c) 2008-2024 OpenShot Studios, LLC
+ (http://www.openshotstudios.com). This file is part of
+ OpenShot Video Editor (http://www.openshot.org), an open-source project
+ dedicated to delivering high quality video editing and animation solutions
+ to the world.
+
+ OpenShot Video Editor is free software: you can redistribute it and/or modify
+ it under the terms of the GNU General Public License as published by
+ the Free Software Foundation, either version 3 of the License, or
+ (at your option) any later version.
+
+ OpenShot Video Editor is distributed in the hope that it will be useful,
+ but WITHOUT ANY WARRANTY; without even the implied warranty of
+ MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+ GNU General Public License for more details.
+
+ You should have received a copy of the GNU General Public License
+ along with OpenShot Library.  If not, see <http://www.gnu.org/licenses/>.
+ """
+
+import sys
+import os
+import json
+import shutil
+import tempfile
+
+import unittest
+
+# Import parent folder (so it can find other imports)
+PATH = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+if PATH not in sys.path:
+    sys.path.append(PATH)
+
+from classes.journal import ProjectJournal, JOURNAL_VERSION
+from classes.updates import UpdateAction
+
+
+class RecordingProject:
+    """ Project data which records the changes applied by a journal replay """
+
+    def __init__(self):
+        self.changes = []
+
+    def _set(self, key, values=None, add=False, remove=False):
+        self.changes.append((key, values))
+
+
+class JournalTests(unittest.TestCase):
+    """ Unit test class for ProjectJournal class """
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.project_path = os.path.join(self.folder, "test.osp")
+        with open(self.project_path, "w") as f:
+            f.write("{}")
+
+    def tearDown(self):
+        shutil.rmtree(self.folder, ignore_errors=True)
+
+    def write_journal(self, entries):
+        """ Write a journal (matching the test project file) """
+        journal = ProjectJournal()
+        with open(journal.get_path(self.project_path), "w", encoding="utf-8") as f:
+            header = {"journal": JOURNAL_VERSION, "snapshot": journal.get_signature(self.project_path)}
+            f.write(json.dumps(header) + "\n")
+            for entry in entries:
+                f.write(json.dumps(entry) + "\n")
+
+    def test_replay(self):
+        """ Test replaying a journal """
+        self.write_journal([
+            {"type": "update", "key": ["clips", {"id": "C1"}], "value": {"position": 2.0}},
+            {"type": "update", "key": ["history"], "value": {"undo": [], "redo": []}},
+        ])
+        project = RecordingProject()
+        self.assertEqual(ProjectJournal().replay(self.project_path, project), 1)
+        self.assertEqual(len(project.changes), 2)
+
+    def test_replay_fps_change(self):
+        """ Test replaying a journal which contains an FPS change (which can't be replayed) """
+        self.write_journal([
+            {"type": "update", "key": ["clips", {"id": "C1"}], "value": {"position": 2.0}},
+            {"type": "update", "key": ["fps"], "value": {"num": 60, "den": 1}},
+            {"type": "update", "key": ["clips", {"id": "C1"}], "value": {"position": 4.0}},
+        ])
+        project = RecordingProject()
+        journal = ProjectJournal()
+        self.assertEqual(journal.replay(self.project_path, project), 1)
+        self.assertEqual(project.changes, [(["clips", {"id": "C1"}], {"position": 2.0})])
+
+        # Rest of the journal is removed (so actions appended later are replayed)
+        project = RecordingProject()
+        self.assertEqual(journal.replay(self.project_path, project), 1)
+        with open(journal.get_path(self.project_path), encoding="utf-8") as f:
+            self.assertEqual(len(f.readlines()), 2)
+
+    def test_fps_change_requires_snapshot(self):
+        """ Test that an FPS or profile change is saved as a snapshot (not journaled) """
+        for key in (["fps"], ["profile"]):
+            journal = ProjectJournal()
+            journal.start(self.project_path)
+            journal.commit(self.project_path)
+            journal.changed(UpdateAction("update", ["clips", {"id": "C1"}], {"position": 2.0}))
+            self.assertFalse(journal.needs_snapshot(100))
+            journal.changed(UpdateAction("update", key, {"num": 60, "den": 1}))
+            self.assertTrue(journal.needs_snapshot(100))
+            self.assertEqual(journal.write(), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,135 @@
+"""
+ @file
+ @brief This file contains benchmarks for loading and saving project files
+ @author Jonathan Thomas <jonathan@openshot.org>
+
+ @section LICENSE
+
+ Copyright (c) 2008-2018 OpenShot Studios, LLC
+ (http://www.openshotstudios.com). This file is part of
+ OpenShot Video Editor (http://www.openshot.org), an open-source project
+ dedicated to delivering high quality video editing and animation solutions
+ to the world.
+
+ OpenShot Video Editor is free software: you can redistribute it and/or modify
+ it under the terms of the GNU General Public License as published by
+ the Free Software Foundation, either version 3 of the License, or
+ (at your option) any later version.
+
+ OpenShot Video Editor is distributed in the hope that it will be useful,
+ but WITHOUT ANY WARRANTY; without even the implied warranty of
+ MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+ GNU General Public License for more details.
+
+ You should have received a copy of the GNU General Public License
+ along with OpenShot Library.  If not, see <http://www.gnu.org/licenses/>.
+ """
+
+import sys
+import os
+import re
+import json
+import time
+import shutil
+import tempfile
+
+# Import parent folder (so it can find other imports)
+PATH = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+if PATH not in sys.path:
+    sys.path.append(PATH)
+
+from classes.json_data import JsonDataStore
+from classes import info
+
+# Number of clips and files in the synthetic project
+NUM_CLIPS = 10000
+NUM_FILES = 1000
+
+# Previous path conversion: regex over the entire serialized project
+path_regex = re.compile(r'"(image|path|protobuf_data_path|lut_path)"\s*:\s*"(.*?)"')
+
+
+def create_project(project_folder):
+    """ Create synthetic project data, with absolute paths """
+    files = []
+    for num in range(NUM_FILES):
+        folder = os.path.join(project_folder, "media", "folder%d" % (num % 20))
+        files.append({
+            "id": "F%d" % num,
+            "path": os.path.join(folder, "video%d.mp4" % num),
+            "image": os.path.join(info.THUMBNAIL_PATH, "F%d.png" % num),
+            "media_type": "video",
+        })
+    clips = []
+    for num in range(NUM_CLIPS):
+        file_data = files[num % NUM_FILES]
+        clips.append({
+            "id": "C%d" % num,
+            "file_id": file_data["id"],
+            "layer": num % 5,
+            "position": num * 5.0,
+            "image": file_data["image"],
+            "reader": {"path": file_data["path"], "has_video": True},
+            "effects": [{"type": "Mask", "reader": {"path": os.path.join(info.PATH, "transitions", "common", "fade.svg")}}],
+            "alpha": {"Points": [{"co": {"X": 1.0, "Y": 1.0}, "interpolation": 0}]},
+        })
+    return {"id": "T0", "files": files, "clips": clips, "effects": [], "history": {"undo": [], "redo": []}}
+
+
+def regex_to_relative(store, file_path, data):
+    """ Previous save behavior: serialize, then convert paths with a regex """
+    store.set_path_context(file_path)
+
+    def replace(match):
+        path = json.loads('"%s"' % match.group(2))
+        new_path = store.get_relative_path(path, {})
+        return '"%s": %s' % (match.group(1), json.dumps(new_path, ensure_ascii=False))
+    return path_regex.sub(replace, json.dumps(data, ensure_ascii=False, indent=1))
+
+
+def regex_to_absolute(store, file_path, contents):
+    """ Previous load behavior: convert paths with a regex, then parse """
+    store.set_path_context(file_path)
+
+    def replace(match):
+        path = json.loads('"%s"' % match.group(2))
+        new_path = store.get_absolute_path(path, {})
+        return '"%s": %s' % (match.group(1), json.dumps(new_path, ensure_ascii=False))
+    return json.loads(path_regex.sub(replace, contents))
+
+
+def measure(name, func):
+    """ Print the time of a function, and return its result """
+    start_time = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start_time
+    print("{:<40} {:>10.2f} ms".format(name, elapsed * 1000.0))
+    return result
+
+
+def main():
+    folder_path = tempfile.mkdtemp()
+    try:
+        file_path = os.path.join(folder_path, "benchmark.osp")
+        store = JsonDataStore()
+        store.data_type = "project"
+        data = create_project(folder_path)
+
+        print("{} clips, {} files".format(NUM_CLIPS, NUM_FILES))
+        regex_contents = measure("save (regex)", lambda: regex_to_relative(store, file_path, data))
+        contents = measure("save", lambda: json.dumps(
+            store.convert_paths_to_relative(file_path, None, data), ensure_ascii=False, indent=1))
+        print("Saved data identical: {}".format(regex_contents == contents))
+
+        regex_data = measure("load (regex)", lambda: regex_to_absolute(store, file_path, contents))
+        new_data = measure("load", lambda: store.convert_paths_to_absolute(file_path, json.loads(contents)))
+        print("Loaded data identical: {}".format(regex_data == new_data))
+
+        measure("write_to_file()", lambda: store.write_to_file(file_path, data, path_mode="relative"))
+        measure("read_from_file()", lambda: store.read_from_file(file_path, path_mode="absolute"))
+    finally:
+        shutil.rmtree(folder_path)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+"""
+ @file
+ @brief This file contains benchmarks for querying project data
+ @author Jonathan Thomas <jonathan@openshot.org>
+
+ @section LICENSE
+
+ Copyright (c) 2008-2018 OpenShot Studios, LLC
+ (http://www.openshotstudios.com). This file is part of
+ OpenShot Video Editor (http://www.openshot.org), an open-source project
+ dedicated to delivering high quality video editing and animation solutions
+ to the world.
+
+ OpenShot Video Editor is free software: you can redistribute it and/or modify
+ it under the terms of the GNU General Public License as published by
+ the Free Software Foundation, either version 3 of the License, or
+ (at your option) any later version.
+
+ OpenShot Video Editor is distributed in the hope that it will be useful,
+ but WITHOUT ANY WARRANTY; without even the implied warranty of
+ MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+ GNU General Public License for more details.
+
+ You should have received a copy of the GNU General Public License
+ along with OpenShot Library.  If not, see <http://www.gnu.org/licenses/>.
+ """
+
+import sys
+import os
+import json
+import time
+import tracemalloc
+
+import openshot
+
+try:
+    # QtWebEngineWidgets must be loaded prior to creating a QApplication
+    # But on systems with only WebKit, this will fail (and we ignore the failure)
+    from PyQt5.QtWebEngineWidgets import QWebEngineView  # noqa
+except ImportError:
+    pass
+
+# Import parent folder (so it can find other imports)
+PATH = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+if PATH not in sys.path:
+    sys.path.append(PATH)
+
+from classes.app import OpenShotApp, get_app
+from classes.json_data import copy_data
+from classes.query import Clip, File
+from classes import info
+
+# Number of clips and files to insert into the project
+NUM_CLIPS = 5000
+NUM_FILES = 500
+
+
+def populate_project():
+    """ Insert clips and files into the project data """
+    c = openshot.Clip(os.path.join(info.IMAGES_PATH, "AboutLogo.png"))
+    clip_json = c.Json()
+    r = openshot.DummyReader(openshot.Fraction(24, 1), 640, 480, 44100, 2, 30.0)
+    file_json = r.Json()
+
+    get_app().updates.ignore_history = True
+    for num in range(NUM_CLIPS):
+        query_clip = Clip()
+        query_clip.data = json.loads(clip_json)
+        query_clip.data["position"] = num * 5.0
+        query_clip.data["layer"] = num % 5
+        query_clip.data["ui"] = {"audio_data": [0.5] * 200}
+        query_clip.save()
+    for num in range(NUM_FILES):
+        query_file = File()
+        query_file.data = json.loads(file_json)
+        query_file.data["path"] = os.path.join(info.IMAGES_PATH, "AboutLogo.png")
+        query_file.data["media_type"] = "image"
+        query_file.save()
+    get_app().updates.ignore_history = False
+
+
+def measure(name, func):
+    """ Print the time and peak memory allocations of a function """
+    tracemalloc.start()
+    start_time = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start_time
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print("{:<40} {:>10.2f} ms {:>12.1f} KiB peak".format(name, elapsed * 1000.0, peak / 1024.0))
+
+
+def legacy_filter(object_key):
+    """ Previous filter() behavior: copy every object with a JSON round-trip """
+    return [json.loads(json.dumps(child)) for child in get_app().project.get(object_key)]
+
+
+def main():
+    info.LOG_LEVEL_CONSOLE = "ERROR"
+    app = OpenShotApp(sys.argv, mode="unittest")
+    populate_project()
+
+    print("{} clips, {} files".format(NUM_CLIPS, NUM_FILES))
+    measure("get('clips') (json copy)", lambda: json.loads(json.dumps(get_app().project.get("clips"))))
+    measure("get('clips') + copy_data()", lambda: copy_data(get_app().project.get("clips")))
+    measure("get('clips')", lambda: get_app().project.get("clips"))
+    measure("Clip.filter() (json copy)", lambda: legacy_filter("clips"))
+    measure("Clip.filter()", lambda: Clip.filter())
+    measure("Clip.filter() + access data", lambda: [c.data for c in Clip.filter()])
+    measure("File.filter() (json copy)", lambda: legacy_filter("files"))
+    measure("File.filter()", lambda: File.filter())
+    app.quit()
+
+
+if __name__ == '__main__':
+    main()
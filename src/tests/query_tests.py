@@ -46,7 +46,7 @@ PATH = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
 if PATH not in sys.path:
     sys.path.append(PATH)
 
-from classes.app import OpenShotApp
+from classes.app import OpenShotApp, get_app
 from classes.query import Clip, File, Transition
 from classes import info
 
@@ -153,6 +153,44 @@ class QueryTests(unittest.TestCase):
         query_clip.save()
         self.assertEqual(len(Clip.filter()), num_clips + 1)
 
+    def test_batch_add_clips(self):
+        """ Test saving clips in a batch of updates """
+
+        num_clips = len(Clip.filter())
+        num_history = len(get_app().updates.actionHistory)
+        c = openshot.Clip(os.path.join(info.IMAGES_PATH, "AboutLogo.png"))
+
+        # Insert clips in a single batch
+        with get_app().updates.batch():
+            for num in range(3):
+                query_clip = Clip()
+                query_clip.data = json.loads(c.Json())
+                query_clip.save()
+
+            # Project data is not changed until the batch ends
+            self.assertEqual(len(Clip.filter()), num_clips)
+
+        self.assertEqual(len(Clip.filter()), num_clips + 3)
+        self.assertEqual(len(get_app().updates.actionHistory), num_history + 1)
+        self.assertEqual(get_app().updates.actionHistory[-1][-1].type, "batch")
+
+    def test_update_clip_history(self):
+        """ Test the undo history of a clip update (which only contains the changed values) """
+
+        c = openshot.Clip(os.path.join(info.IMAGES_PATH, "AboutLogo.png"))
+        query_clip = Clip()
+        query_clip.data = json.loads(c.Json())
+        query_clip.save()
+
+        # Update clip
+        query_clip.data["title"] = "History Title"
+        query_clip.save()
+
+        # Verify history action
+        action = get_app().updates.actionHistory[-1][-1]
+        self.assertEqual(action.type, "delta")
+        self.assertEqual([(change["path"], change["new"]) for change in action.values], [(["title"], "History Title")])
+
     def test_update_clip(self):
         """ Test the Clip.save method """
 
@@ -191,6 +229,27 @@ class QueryTests(unittest.TestCase):
         deleted_clip = Clip.get(id=delete_id)
         self.assertFalse(deleted_clip)
 
+    def test_get_clip_key_after_delete(self):
+        """ Test resolving id keys in the project data, after a delete """
+
+        # Insert a few clips into the project data
+        clip_ids = []
+        for num in range(3):
+            c = openshot.Clip(os.path.join(info.IMAGES_PATH, "AboutLogo.png"))
+            query_clip = Clip()
+            query_clip.data = json.loads(c.Json())
+            query_clip.save()
+            clip_ids.append(query_clip.id)
+
+        # Delete the middle clip
+        Clip.get(id=clip_ids[1]).delete()
+        self.assertEqual(get_app().project.get(["clips", {"id": clip_ids[1]}]), None)
+
+        # Other clips are still found by id
+        for clip_id in [clip_ids[0], clip_ids[2]]:
+            clip_data = get_app().project.get(["clips", {"id": clip_id}])
+            self.assertEqual(clip_data.get("id"), clip_id)
+
     def test_filter_clip(self):
         """ Test the Clip.filter method """
 
@@ -252,6 +311,33 @@ class QueryTests(unittest.TestCase):
             if end > time:
                 self.assertTrue(pos >= time)
 
+    def test_filter_range(self):
+        """ Test the Clip.filter_range method (interval index) """
+
+        # Clips are 5 seconds long, positioned every 10 seconds
+        c_ids = [c.id for c in Clip.filter_range(16.0, 21.0) if c.id in self.clip_ids]
+        self.assertEqual(c_ids, [self.clip_ids[2]])
+        c_ids = [c.id for c in Clip.filter_range(4.0, 10.0) if c.id in self.clip_ids]
+        self.assertEqual(c_ids, self.clip_ids[0:2])
+
+        # Move a clip, and verify the index is updated
+        clip = Clip.get(id=self.clip_ids[3])
+        clip.data["position"] = 15.0
+        clip.save()
+        c_ids = [c.id for c in Clip.filter_range(16.0, 19.0) if c.id in self.clip_ids]
+        self.assertEqual(c_ids, [self.clip_ids[3]])
+        c_ids = [c.id for c in Clip.filter(intersect=32.0) if c.id in self.clip_ids]
+        self.assertEqual(c_ids, [])
+
+        # Filter by layer
+        layer = clip.data.get("layer")
+        c_ids = [c.id for c in Clip.filter_range(16.0, 19.0, layer=layer + 1) if c.id in self.clip_ids]
+        self.assertEqual(c_ids, [])
+
+        # Restore clip position
+        clip.data["position"] = 30.0
+        clip.save()
+
     def test_update_File(self):
         """ Test the File.save method """
 
@@ -297,6 +383,25 @@ class QueryTests(unittest.TestCase):
         files = File.filter(id="invalidID")
         self.assertEqual(len(files), 0)
 
+    def test_filter_File_path(self):
+        """ Test the File.filter method with an indexed attribute """
+
+        file = File.get(id=self.file_ids[2])
+        old_path = file.data["path"]
+        self.assertIn(file.id, [f.id for f in File.filter(path=old_path)])
+
+        # Update path, and verify the index is updated
+        new_path = os.path.join(info.IMAGES_PATH, "AboutLogo-indexed.png")
+        file.data["path"] = new_path
+        file.save()
+        self.assertEqual([f.id for f in File.filter(path=new_path)], [file.id])
+        self.assertNotIn(file.id, [f.id for f in File.filter(path=old_path)])
+
+        # Restore path
+        file.data["path"] = old_path
+        file.save()
+        self.assertEqual(File.filter(path=new_path), [])
+
     def test_get_File(self):
         """ Test the File.get method """
 
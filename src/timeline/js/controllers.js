@@ -28,7 +28,7 @@
 
 
 // Initialize the main controller module
-/*global App, timeline, bounding_box, setBoundingBox, moveBoundingBox, findElement, findTrackAtLocation, snapToFPSGridTime, pixelToTime*/
+/*global App, timeline, bounding_box, setBoundingBox, moveBoundingBox, findElement, findTrackAtLocation, snapToFPSGridTime, pixelToTime, hasWaveform, hasFilmstrip, drawFilmstrip, clearFilmstrip, FILMSTRIP_OFFSET*/
 App.controller("TimelineCtrl", function ($scope) {
 
   // DEMO DATA (used when debugging outside of Qt using Chrome)
@@ -69,6 +69,7 @@ App.controller("TimelineCtrl", function ($scope) {
   $scope.track_label = "Track %s";
   $scope.enable_sorting = true;
   $scope.ThumbServer = "http://127.0.0.1/";
+  $scope.WaveformServer = "http://127.0.0.1/";
   $scope.ThemeCSS = "";
   $scope.dragging = false;
 
@@ -83,6 +84,8 @@ App.controller("TimelineCtrl", function ($scope) {
 
   $scope.setThumbAddress = function (url) {
     $scope.ThumbServer = url;
+    $scope.WaveformServer = url.replace(/thumbnails\/$/, "waveforms/");
+    $scope.FilmstripServer = url.replace(/thumbnails\/$/, "filmstrips/");
     timeline.qt_log("DEBUG", "setThumbAddress: " + url);
   };
 
@@ -422,16 +425,22 @@ App.controller("TimelineCtrl", function ($scope) {
 
     timeline.qt_log("DEBUG", existing_thumb_path);
     clip_selector.attr("src", existing_thumb_path);
+
+    // Fetch the filmstrip again (the file may have changed)
+    clearFilmstrip(clip_id);
+    drawFilmstrip($scope, clip_id);
   };
 
-  // Redraw all audio waveforms on the timeline (for example, if the screen is resized)
+  // Redraw all audio waveforms (and filmstrips) on the timeline (for example, if the screen is resized)
   $scope.reDrawAllAudioData = function () {
     // Loop through all clips (and look for audio data)
     for (var clip_index = 0; clip_index < $scope.project.clips.length; clip_index++) {
-      if ("ui" in $scope.project.clips[clip_index] && "audio_data" in $scope.project.clips[clip_index].ui
-        && $scope.project.clips[clip_index].ui.audio_data.length > 1) {
+      if (hasWaveform($scope.project.clips[clip_index])) {
         // Redraw audio data
         drawAudio($scope, $scope.project.clips[clip_index].id);
+      } else if (hasFilmstrip($scope.project.clips[clip_index])) {
+        // Redraw filmstrip (fetched again, once zooming stops, if the clip is visible)
+        drawFilmstrip($scope, $scope.project.clips[clip_index].id);
       }
     }
   };
@@ -463,6 +472,21 @@ App.controller("TimelineCtrl", function ($scope) {
     });
   };
 
+  // Does a clip have a waveform (used by the clip template)
+  $scope.hasWaveform = function (clip) {
+    return hasWaveform(clip);
+  };
+
+  // Does a clip show a filmstrip (used by the clip template)
+  $scope.hasFilmstrip = function (clip) {
+    return hasFilmstrip(clip);
+  };
+
+  // Width of a clip's filmstrip canvas (the clip width, after the start thumbnail)
+  $scope.filmstripWidth = function (clip) {
+    return $scope.canvasMaxWidth(Math.max(0, ((clip.end - clip.start) * $scope.pixelsPerSecond) - FILMSTRIP_OFFSET));
+  };
+
   // Get the color of an effect
   $scope.getEffectColor = function (effect_type) {
     switch (effect_type) {
@@ -549,38 +573,85 @@ App.controller("TimelineCtrl", function ($scope) {
     });
   };
 
-  // Update cache json
-  $scope.renderCache = function (cache_json) {
-    $scope.project.progress = cache_json;
+  // Apply the added and removed ranges of cached frames (from Qt), and redraw only the changed pixels
+  $scope.renderCacheDelta = function (delta) {
+    var ranges = $scope.cache_ranges || [];
+    var dirty_ranges = delta.removed.concat(delta.added);
+
+    // Remove ranges
+    for (var r = 0; r < delta.removed.length; r++) {
+      var removed = delta.removed[r];
+      var remaining = [];
+      for (var i = 0; i < ranges.length; i++) {
+        var range = ranges[i];
+        if (range[1] < removed[0] || range[0] > removed[1]) {
+          remaining.push(range);
+          continue;
+        }
+        if (range[0] < removed[0]) {
+          remaining.push([range[0], removed[0] - 1]);
+        }
+        if (range[1] > removed[1]) {
+          remaining.push([removed[1] + 1, range[1]]);
+        }
+      }
+      ranges = remaining;
+    }
 
-    //clear the canvas first
+    // Add ranges (and merge adjacent ranges)
+    ranges = ranges.concat(delta.added).sort(function (a, b) { return a[0] - b[0]; });
+    var merged = [];
+    for (var m = 0; m < ranges.length; m++) {
+      if (merged.length && ranges[m][0] <= merged[merged.length - 1][1] + 1) {
+        merged[merged.length - 1][1] = Math.max(merged[merged.length - 1][1], ranges[m][1]);
+      } else {
+        merged.push([ranges[m][0], ranges[m][1]]);
+      }
+    }
+    $scope.cache_ranges = merged;
+
+    // Redraw everything if the zoom changed since the last render
+    $scope.drawCacheRanges($scope.cache_pixels_per_second === $scope.pixelsPerSecond ? dirty_ranges : null);
+  };
+
+  // Draw the cached frame ranges on the progress canvas (only inside the dirty frame ranges, if any)
+  $scope.drawCacheRanges = function (dirty_ranges) {
     var ruler = $("#progress");
     var ctx = ruler[0].getContext("2d");
-    ctx.clearRect(0, 0, ruler.width(), ruler.height());
-
-    // Determine fps & and get cached ranges
     var fps = $scope.project.fps.num / $scope.project.fps.den;
-    if ($scope.project.progress && $scope.project.progress.hasOwnProperty('ranges')) {
-        // Loop through each cached range of frames, and draw rect
-        let progress = $scope.project.progress.ranges;
-        for (var p = 0; p < progress.length; p++) {
-          //get the progress item details
-          var start_second = parseFloat(progress[p]["start"]) / fps;
-          var stop_second = parseFloat(progress[p]["end"]) / fps;
-
-          //figure out the actual pixel position, constrained by max width
-          var start_pixel = $scope.canvasMaxWidth(start_second * $scope.pixelsPerSecond);
-          var stop_pixel = $scope.canvasMaxWidth(stop_second * $scope.pixelsPerSecond);
-          var rect_length = stop_pixel - start_pixel;
-          if (rect_length < 1) {
-            continue;
-          }
-          //get the element and draw the rects
-          ctx.beginPath();
-          ctx.rect(start_pixel, 0, rect_length, 5);
-          ctx.fillStyle = "#4B92AD";
-          ctx.fill();
+    var frameToPixel = function (frame) {
+      return $scope.canvasMaxWidth((frame / fps) * $scope.pixelsPerSecond);
+    };
+    $scope.cache_pixels_per_second = $scope.pixelsPerSecond;
+
+    // Get the dirty pixel spans (1 pixel of padding on each side, for rounding)
+    var spans = [];
+    if (dirty_ranges === null) {
+      spans.push([0, ruler.width()]);
+    } else {
+      for (var d = 0; d < dirty_ranges.length; d++) {
+        spans.push([Math.floor(frameToPixel(dirty_ranges[d][0])) - 1, Math.ceil(frameToPixel(dirty_ranges[d][1])) + 1]);
+      }
+    }
+
+    ctx.fillStyle = "#4B92AD";
+    for (var s = 0; s < spans.length; s++) {
+      var span_start = spans[s][0];
+      var span_end = spans[s][1];
+      ctx.clearRect(span_start, 0, span_end - span_start, ruler.height());
+
+      // Redraw the cached ranges which overlap this span
+      var ranges = $scope.cache_ranges || [];
+      for (var p = 0; p < ranges.length; p++) {
+        var start_pixel = frameToPixel(ranges[p][0]);
+        var stop_pixel = frameToPixel(ranges[p][1]);
+        if (stop_pixel - start_pixel < 1 || stop_pixel < span_start || start_pixel > span_end) {
+          continue;
         }
+        start_pixel = Math.max(start_pixel, span_start);
+        stop_pixel = Math.min(stop_pixel, span_end);
+        ctx.fillRect(start_pixel, 0, stop_pixel - start_pixel, 5);
+      }
     }
   };
 
@@ -1802,6 +1873,49 @@ $scope.updateLayerIndex = function () {
     return true;
   };
 
+  // Merge heavy clip data (waveforms, reader, effects) into the clips of a project skeleton
+  // (sent in chunks by Qt after loadJson). Clips which no longer exist are skipped.
+  /**
+   * @return {boolean}
+   */
+  $scope.loadClipData = function (clipsData) {
+    // Index clips by id
+    var clips_by_id = {};
+    for (var clip_index = 0; clip_index < $scope.project.clips.length; clip_index++) {
+      clips_by_id[$scope.project.clips[clip_index].id] = $scope.project.clips[clip_index];
+    }
+
+    $scope.$apply(function () {
+      for (var data_index = 0; data_index < clipsData.length; data_index++) {
+        var clip_data = clipsData[data_index];
+        var clip = clips_by_id[clip_data.id];
+        if (!clip) {
+          continue;
+        }
+
+        // Keep effect selections
+        var selected_effects = {};
+        for (var effect_index = 0; effect_index < clip.effects.length; effect_index++) {
+          if (clip.effects[effect_index].selected) {
+            selected_effects[clip.effects[effect_index].id] = true;
+          }
+        }
+        for (effect_index = 0; effect_index < clip_data.effects.length; effect_index++) {
+          clip_data.effects[effect_index].selected = clip_data.effects[effect_index].id in selected_effects;
+        }
+
+        for (var data_key in clip_data) {
+          if (clip_data.hasOwnProperty(data_key)) {
+            clip[data_key] = clip_data[data_key];
+          }
+        }
+      }
+    });
+
+    // return true
+    return true;
+  };
+
   // Force Angular to refresh (i.e. when selections change outside)
   $scope.refreshTimeline = function () {
     $scope.$apply();
@@ -1826,6 +1940,10 @@ $scope.updateLayerIndex = function () {
     // Re-index Layer Y values
     $scope.updateLayerIndex();
 
+    // Clear cached ranges (of the previous project)
+    $scope.cache_ranges = [];
+    $scope.drawCacheRanges(null);
+
     // Force a scroll event (from 1 to 0, to send the geometry to zoom slider)
     $("#scrolling_tracks").scrollLeft(1);
 
@@ -27,7 +27,7 @@
  */
 
 
-/*global setSelections, setBoundingBox, moveBoundingBox, bounding_box, drawAudio, updateDraggables */
+/*global setSelections, setBoundingBox, moveBoundingBox, bounding_box, drawAudio, hasWaveform, drawFilmstrip, hasFilmstrip, updateDraggables */
 // Init variables
 var dragging = false;
 var resize_disabled = false;
@@ -179,9 +179,12 @@ App.directive("tlClip", function ($timeout) {
           }
 
           //resize the audio canvas to match the new clip width
-          if (scope.clip.ui && scope.clip.ui.audio_data) {
+          if (hasWaveform(scope.clip)) {
             //redraw audio as the resize cleared the canvas
             drawAudio(scope, scope.clip.id);
+          } else if (hasFilmstrip(scope.clip)) {
+            //redraw filmstrip (for the new start and width)
+            drawFilmstrip(scope, scope.clip.id);
           }
           dragLoc = null;
         },
@@ -477,3 +480,16 @@ App.directive("tlAudio",  function ($timeout) {
     }
   };
 });
+
+// Handle filmstrip drawing (when a tl-filmstrip directive is found)
+App.directive("tlFilmstrip",  function ($timeout) {
+  return {
+    link: function (scope, element, attrs) {
+      $timeout(function () {
+        // Use timeout to wait until after the DOM is manipulated
+        let clip_id = attrs.id.replace("filmstrip_clip_", "");
+        drawFilmstrip(scope, clip_id);
+      }, 0);
+    }
+  };
+});
@@ -27,7 +27,7 @@
  */
 
 
-/*global App, timeline, secondsToTime, setSelections, setBoundingBox, moveBoundingBox, bounding_box */
+/*global App, timeline, secondsToTime, setSelections, setBoundingBox, moveBoundingBox, bounding_box, scheduleFilmstripFetch */
 // Variables for panning by middle click
 var is_scrolling = false;
 var starting_scrollbar = {x: 0, y: 0};
@@ -92,6 +92,9 @@ App.directive("tlScrollableTracks", function () {
 
         // Update scrollLeft in scope
         scope.$apply(() => scope.scrollLeft = scrollLeft);
+
+        // Fetch the filmstrips of clips scrolled into view (once scrolling stops)
+        scheduleFilmstripFetch(scope);
       });
 
       // Pans the timeline (on middle mouse click and drag)
@@ -71,23 +71,31 @@ function drawBar(ctx, startX, endX, maxHeight, avgHeight, transpColor, fillColor
   ctx.fillRect(startX, bottom_edge - avgHeight, endX - startX, avgHeight);
 }
 
-// Draw audio waveform from audio samples
-function drawWaveform(ctx, audio_data, start_sample, end_sample, sample_divisor, block_width, scale, color, color_transp, bottom_edge) {
+// Draw audio waveform from audio samples. Samples are either interleaved (max, RMS) pairs
+// (stride of 2), or legacy max values (stride of 1, the average is used as the inner bar).
+function drawWaveform(ctx, audio_data, stride, start_sample, end_sample, sample_divisor, block_width, scale, color, color_transp, bottom_edge) {
   var last_x = 0;
   var avg = 0;
   var avg_cnt = 0;
   var max = 0;
+  end_sample = Math.min(end_sample, Math.floor(audio_data.length / stride));
 
   // Loop through audio samples (calculate average and max amplitude)
   for (var i = start_sample; i < end_sample; i++) {
-    var sample = Math.abs(audio_data[i]);
+    var sample = Math.abs(audio_data[i * stride]);
     var x = Math.floor((i + 1 - start_sample) / sample_divisor);
-    avg += sample;
+    if (stride === 2) {
+      // Combine the RMS values of the bar
+      avg += audio_data[i * stride + 1] * audio_data[i * stride + 1];
+    } else {
+      avg += sample;
+    }
     avg_cnt++;
     max = Math.max(max, sample);
 
     if (x >= last_x + block_width || i === end_sample - 1) {
-      drawBar(ctx, last_x, x, max * scale, avg / avg_cnt * scale, color_transp, color, bottom_edge);
+      var avg_height = (stride === 2 ? Math.sqrt(avg / avg_cnt) : avg / avg_cnt) * scale;
+      drawBar(ctx, last_x, x, max * scale, avg_height, color_transp, color, bottom_edge);
 
       // Reset for the next bar
       last_x = x;
@@ -99,11 +107,77 @@ function drawWaveform(ctx, audio_data, start_sample, end_sample, sample_divisor,
 }
 
 
+// Waveform levels fetched from the waveform server: {level id: {version, samples}}
+var waveformCache = {};
+
+// Resolution of legacy waveforms (audio_data saved in older projects)
+var LEGACY_SAMPLES_PER_SECOND = 20;
+
+// Does a clip have a waveform (stored on the waveform server, or legacy audio_data)
+function hasWaveform(clip) {
+  return Boolean(clip && clip.ui && (clip.ui.waveform || (clip.ui.audio_data && clip.ui.audio_data.length > 1)));
+}
+
+// Get the level of a waveform pyramid (samples per second) which matches the zoom: the coarsest
+// level with at least one sample per bar (or the finest level, when zoomed in further)
+function getWaveformLevel(waveform, pixels_per_second, block_width) {
+  var levels = Object.keys(waveform.levels).map(Number).sort(function (a, b) { return a - b; });
+  var samples_per_bar = pixels_per_second / block_width;
+  for (var l = 0; l < levels.length; l++) {
+    if (levels[l] >= samples_per_bar) {
+      return levels[l];
+    }
+  }
+  return levels[levels.length - 1];
+}
+
+// Get the waveform samples of a clip (for one level). Stored waveforms are fetched (as an ArrayBuffer)
+// the first time, in which case null is returned, and the clip is drawn again once the samples arrive.
+function getWaveformSamples(scope, clip, samples_per_second) {
+  var waveform = clip.ui.waveform;
+  var level_id = waveform.id + "-" + samples_per_second;
+  var cached = waveformCache[level_id];
+  if (cached && cached.version === waveform.version) {
+    return cached.samples;
+  }
+
+  // Fetch samples (once per version)
+  waveformCache[level_id] = {version: waveform.version, samples: null};
+  var request = new XMLHttpRequest();
+  request.open("GET", scope.WaveformServer + level_id + "?v=" + waveform.version);
+  request.responseType = "arraybuffer";
+  request.onload = function () {
+    if (request.status === 200 && waveformCache[level_id].version === waveform.version) {
+      waveformCache[level_id].samples = new Float32Array(request.response);
+      drawAudio(scope, clip.id);
+    }
+  };
+  request.onerror = function () {
+    delete waveformCache[level_id];
+  };
+  request.send();
+  return null;
+}
+
 // Draw the audio waveform for a clip
 function drawAudio(scope, clip_id) {
   // Find clip in scope
   var clip = findElement(scope.project.clips, "id", clip_id);
-  if (!clip.ui || !clip.ui.audio_data) {
+  if (!hasWaveform(clip)) {
+    return;
+  }
+
+  // Get the samples of the level which matches the zoom
+  var block_width = 2;
+  var samples_per_second = LEGACY_SAMPLES_PER_SECOND;
+  var audio_data = clip.ui.audio_data;
+  var stride = 1;
+  if (clip.ui.waveform) {
+    samples_per_second = getWaveformLevel(clip.ui.waveform, scope.pixelsPerSecond, block_width);
+    audio_data = getWaveformSamples(scope, clip, samples_per_second);
+    stride = 2;
+  }
+  if (!audio_data) {
     return;
   }
 
@@ -116,11 +190,9 @@ function drawAudio(scope, clip_id) {
 
   // Init canvas and init variables
   var ctx = audio_canvas[0].getContext("2d");
-  var samples_per_second = 20;
   var start_sample = Math.round(clip.start * samples_per_second);
   var end_sample = Math.round(clip.end * samples_per_second);
   var sample_divisor = samples_per_second / scope.pixelsPerSecond;
-  var block_width = 2;
   var color = "#2a82da"; // rgb(42,130,218)
   var color_transp = "rgba(42,130,218,0.5)";
   ctx.strokeStyle = color;
@@ -129,7 +201,201 @@ function drawAudio(scope, clip_id) {
   var bottom_edge = audio_canvas.height();
   var scale = bottom_edge * 0.85;
 
-  drawWaveform(ctx, clip.ui.audio_data, start_sample, end_sample, sample_divisor, block_width, scale, color, color_transp, bottom_edge);
+  drawWaveform(ctx, audio_data, stride, start_sample, end_sample, sample_divisor, block_width, scale, color, color_transp, bottom_edge);
+}
+
+// Filmstrips fetched from the thumbnail server: {clip id: {key, image, index, request}}
+var filmstripCache = {};
+
+// Horizontal position of the filmstrip in a clip (after the start thumbnail), and maximum number of tiles
+var FILMSTRIP_OFFSET = 76;
+var FILMSTRIP_MAX_FRAMES = 240;
+
+// Delay before fetching filmstrips (restarted by each zoom, scroll, or redraw), in milliseconds
+var FILMSTRIP_FETCH_DELAY = 250;
+var filmstripFetchTimer = null;
+
+// Does a clip show a filmstrip (video clips without a waveform)
+function hasFilmstrip(clip) {
+  return Boolean(clip && clip.reader && clip.reader.has_video && clip.reader.fps && !hasWaveform(clip));
+}
+
+// Get the key (URL path) of the sprite sheet of a clip's filmstrip, or null if there is nothing to draw.
+// Tiles are on a grid of frames, with a power of two frames per tile (rounded down, so tiles never leave
+// gaps), which is the same for nearby zoom levels (so they share a sprite sheet).
+function getFilmstripKey(scope, clip, canvas) {
+  var tile_height = canvas.height;
+  var tile_width = Math.round(tile_height * 16 / 9);
+  if (canvas.width < 1 || tile_width < 1) {
+    return null;
+  }
+  var fps = clip.reader.fps.num / clip.reader.fps.den;
+  var step = Math.max(1, Math.pow(2, Math.floor(Math.log2(tile_width / scope.pixelsPerSecond * fps))));
+  var first = Math.floor(clip.start * fps / step) * step;
+  var count = Math.ceil((clip.end * fps - first) / step);
+  while (count > FILMSTRIP_MAX_FRAMES) {
+    step *= 2;
+    first = Math.floor(clip.start * fps / step) * step;
+    count = Math.ceil((clip.end * fps - first) / step);
+  }
+  if (count < 1) {
+    return null;
+  }
+  var ratio = window.devicePixelRatio || 1;
+  return clip.file_id + "/?start=" + (first + 1) + "&step=" + step + "&count=" + count + "&tile=" +
+    Math.round(tile_width * ratio) + "x" + Math.round(tile_height * ratio);
+}
+
+// Draw the filmstrip of a clip: one tile per frame of its sprite sheet, at the position of the frame.
+// If the sprite sheet for the current zoom level isn't fetched yet, the previous one (if any) is drawn,
+// and a fetch is scheduled.
+function drawFilmstrip(scope, clip_id) {
+  // Find clip in scope
+  var clip = findElement(scope.project.clips, "id", clip_id);
+  if (!hasFilmstrip(clip)) {
+    return;
+  }
+
+  // Find filmstrip canvas
+  var filmstrip_canvas = $("#clip_" + clip_id).find(".filmstrip");
+  if (filmstrip_canvas.length === 0) {
+    return;
+  }
+  var canvas = filmstrip_canvas[0];
+  var key = getFilmstripKey(scope, clip, canvas);
+  if (!key) {
+    return;
+  }
+
+  var cached = filmstripCache[clip_id];
+  if (!cached || cached.key !== key) {
+    scheduleFilmstripFetch(scope);
+  }
+  if (!cached || !cached.image) {
+    return;
+  }
+
+  // Draw each tile of the sprite sheet (at the time of its frame)
+  var ctx = canvas.getContext("2d");
+  var index = cached.index;
+  var fps = clip.reader.fps.num / clip.reader.fps.den;
+  var tile_height = canvas.height;
+  var tile_width = Math.round(tile_height * 16 / 9);
+  ctx.clearRect(0, 0, canvas.width, canvas.height);
+  for (var i = 0; i < index.frames.length; i++) {
+    var x = Math.round((((index.frames[i] - 1) / fps) - clip.start) * scope.pixelsPerSecond) - FILMSTRIP_OFFSET;
+    if (x + tile_width <= 0 || x >= canvas.width) {
+      continue;
+    }
+    var sx = (i % index.columns) * index.tile_width;
+    var sy = Math.floor(i / index.columns) * index.tile_height;
+    ctx.drawImage(cached.image, sx, sy, index.tile_width, index.tile_height,
+      x, 0, tile_width, tile_height);
+  }
+}
+
+// Fetch the filmstrips of the visible clips, once zooming and scrolling stop
+function scheduleFilmstripFetch(scope) {
+  clearTimeout(filmstripFetchTimer);
+  filmstripFetchTimer = setTimeout(function () {
+    filmstripFetchTimer = null;
+    fetchVisibleFilmstrips(scope);
+  }, FILMSTRIP_FETCH_DELAY);
+}
+
+// Fetch the sprite sheets of the clips in the viewport (which don't match the current zoom level)
+function fetchVisibleFilmstrips(scope) {
+  var scrolling_tracks = $("#scrolling_tracks");
+  var view_left = scrolling_tracks.scrollLeft();
+  var view_right = view_left + scrolling_tracks.width();
+  for (var clip_index = 0; clip_index < scope.project.clips.length; clip_index++) {
+    var clip = scope.project.clips[clip_index];
+    if (!hasFilmstrip(clip)) {
+      continue;
+    }
+    var clip_left = clip.position * scope.pixelsPerSecond;
+    var clip_right = clip_left + ((clip.end - clip.start) * scope.pixelsPerSecond);
+    if (clip_right < view_left || clip_left > view_right) {
+      continue;
+    }
+    var filmstrip_canvas = $("#clip_" + clip.id).find(".filmstrip");
+    if (filmstrip_canvas.length === 0) {
+      continue;
+    }
+    var key = getFilmstripKey(scope, clip, filmstrip_canvas[0]);
+    var cached = filmstripCache[clip.id];
+    if (key && (!cached || cached.key !== key)) {
+      fetchFilmstrip(scope, clip.id, key);
+    }
+  }
+}
+
+// Fetch the sprite sheet of a clip's filmstrip (and its index). A pending fetch of the clip is aborted,
+// and its previous sprite sheet is kept (and drawn) until the new one arrives.
+function fetchFilmstrip(scope, clip_id, key) {
+  var previous = filmstripCache[clip_id];
+  if (previous && previous.request) {
+    previous.request.abort();
+  }
+  var entry = {
+    key: key,
+    image: previous ? previous.image : null,
+    index: previous ? previous.index : null,
+    request: new XMLHttpRequest()
+  };
+  filmstripCache[clip_id] = entry;
+
+  var request = entry.request;
+  request.open("GET", scope.FilmstripServer + key);
+  request.responseType = "blob";
+  request.onload = function () {
+    entry.request = null;
+    var header = request.getResponseHeader("X-Filmstrip-Index");
+    if (request.status !== 200 || !header || filmstripCache[clip_id] !== entry) {
+      return;
+    }
+    var index;
+    try {
+      index = JSON.parse(header);
+    } catch (e) {
+      return;
+    }
+    var image = new Image();
+    image.onload = function () {
+      if (filmstripCache[clip_id] !== entry) {
+        URL.revokeObjectURL(image.src);
+        return;
+      }
+      if (entry.image) {
+        URL.revokeObjectURL(entry.image.src);
+      }
+      entry.image = image;
+      entry.index = index;
+      drawFilmstrip(scope, clip_id);
+    };
+    image.src = URL.createObjectURL(request.response);
+  };
+  request.onerror = function () {
+    // Fetched again on the next redraw
+    entry.request = null;
+    entry.key = null;
+  };
+  request.send();
+}
+
+// Remove the filmstrip of a clip (i.e. when its file changed), aborting any pending fetch
+function clearFilmstrip(clip_id) {
+  var cached = filmstripCache[clip_id];
+  if (!cached) {
+    return;
+  }
+  if (cached.request) {
+    cached.request.abort();
+  }
+  if (cached.image) {
+    URL.revokeObjectURL(cached.image.src);
+  }
+  delete filmstripCache[clip_id];
 }
 
 function padNumber(value, pad_length) {
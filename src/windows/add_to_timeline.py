@@ -186,200 +186,202 @@ class AddToTimeline(QDialog):
         fps = get_app().project.get("fps")
         fps_float = float(fps["num"]) / float(fps["den"])
 
-        # Loop through each file (in the current order)
-        for file in self.treeFiles.timeline_model.files:
-            # Create a clip
-            clip = Clip()
-            clip.data = {}
-
-            # Get file name
-            filename = os.path.basename(file.data["path"])
-
-            # Convert path to the correct relative path (based on this folder)
-            file_path = file.absolute_path()
-
-            # Create clip object for this file
-            c = openshot.Clip(file_path)
-
-            # Append missing attributes to Clip JSON
-            new_clip = json.loads(c.Json())
-            new_clip["position"] = position
-            new_clip["layer"] = track_num
-            new_clip["file_id"] = file.id
-            new_clip["title"] = file.data.get("name", filename)
-            new_clip["reader"] = file.data
-
-            # Skip any clips that are missing a 'reader' attribute
-            # TODO: Determine why this even happens, as it shouldn't be possible
-            if not new_clip.get("reader"):
-                continue  # Skip to next file
-
-            # Check for optional start and end attributes
-            start_time = 0
-            end_time = new_clip["reader"]["duration"]
-
-            if 'start' in file.data:
-                start_time = file.data['start']
-                new_clip["start"] = start_time
-            if 'end' in file.data:
-                end_time = file.data['end']
-                new_clip["end"] = end_time
+        # Add all clips and transitions (as a single batch of inserts)
+        with get_app().updates.batch():
+            # Loop through each file (in the current order)
+            for file in self.treeFiles.timeline_model.files:
+                # Create a clip
+                clip = Clip()
+                clip.data = {}
 
-            # Adjust clip duration, start, and end
-            new_clip["duration"] = new_clip["reader"]["duration"]
-            if file.data["media_type"] == "image":
-                end_time = image_length
-                new_clip["end"] = end_time
-            else:
-                new_clip["end"] = end_time
-
-            # Adjust Fade of Clips (if no transition is chosen)
-            if not transition_path:
-                if fade_value is not None:
-                    # Overlap this clip with the previous one (if any)
-                    position = max(start_position, new_clip["position"] - fade_length)
-                    new_clip["position"] = position
+                # Get file name
+                filename = os.path.basename(file.data["path"])
+
+                # Convert path to the correct relative path (based on this folder)
+                file_path = file.absolute_path()
+
+                # Create clip object for this file
+                c = openshot.Clip(file_path)
+
+                # Append missing attributes to Clip JSON
+                new_clip = json.loads(c.Json())
+                new_clip["position"] = position
+                new_clip["layer"] = track_num
+                new_clip["file_id"] = file.id
+                new_clip["title"] = file.data.get("name", filename)
+                new_clip["reader"] = file.data
+
+                # Skip any clips that are missing a 'reader' attribute
+                # TODO: Determine why this even happens, as it shouldn't be possible
+                if not new_clip.get("reader"):
+                    continue  # Skip to next file
+
+                # Check for optional start and end attributes
+                start_time = 0
+                end_time = new_clip["reader"]["duration"]
+
+                if 'start' in file.data:
+                    start_time = file.data['start']
+                    new_clip["start"] = start_time
+                if 'end' in file.data:
+                    end_time = file.data['end']
+                    new_clip["end"] = end_time
+
+                # Adjust clip duration, start, and end
+                new_clip["duration"] = new_clip["reader"]["duration"]
+                if file.data["media_type"] == "image":
+                    end_time = image_length
+                    new_clip["end"] = end_time
+                else:
+                    new_clip["end"] = end_time
 
-                if fade_value in ['Fade In', 'Fade In & Out']:
-                    start = openshot.Point(round(start_time * fps_float) + 1, 0.0, openshot.BEZIER)
+                # Adjust Fade of Clips (if no transition is chosen)
+                if not transition_path:
+                    if fade_value is not None:
+                        # Overlap this clip with the previous one (if any)
+                        position = max(start_position, new_clip["position"] - fade_length)
+                        new_clip["position"] = position
+
+                    if fade_value in ['Fade In', 'Fade In & Out']:
+                        start = openshot.Point(round(start_time * fps_float) + 1, 0.0, openshot.BEZIER)
+                        start_object = json.loads(start.Json())
+                        end = openshot.Point(
+                            min(
+                                round((start_time + fade_length) * fps_float) + 1,
+                                round(end_time * fps_float) + 1
+                                ),
+                            1.0,
+                            openshot.BEZIER)
+                        end_object = json.loads(end.Json())
+                        new_clip['alpha']["Points"].append(start_object)
+                        new_clip['alpha']["Points"].append(end_object)
+
+                    if fade_value in ['Fade Out', 'Fade In & Out']:
+                        start = openshot.Point(
+                            max(
+                                round((end_time * fps_float) + 1) - (round(fade_length * fps_float) + 1),
+                                round(start_time * fps_float) + 1
+                                ),
+                            1.0,
+                            openshot.BEZIER)
+                        start_object = json.loads(start.Json())
+                        end = openshot.Point(
+                            round(end_time * fps_float) + 1,
+                            0.0,
+                            openshot.BEZIER)
+                        end_object = json.loads(end.Json())
+                        new_clip['alpha']["Points"].append(start_object)
+                        new_clip['alpha']["Points"].append(end_object)
+
+                # Adjust zoom amount
+                if zoom_value is not None:
+                    # Location animation
+                    if zoom_value == "Random":
+                        animate_start_x = uniform(-0.5, 0.5)
+                        animate_end_x = uniform(-0.15, 0.15)
+                        animate_start_y = uniform(-0.5, 0.5)
+                        animate_end_y = uniform(-0.15, 0.15)
+
+                        # Scale animation
+                        start_scale = uniform(0.5, 1.5)
+                        end_scale = uniform(0.85, 1.15)
+
+                    elif zoom_value == "Zoom In":
+                        animate_start_x = 0.0
+                        animate_end_x = 0.0
+                        animate_start_y = 0.0
+                        animate_end_y = 0.0
+
+                        # Scale animation
+                        start_scale = 1.0
+                        end_scale = 1.25
+
+                    elif zoom_value == "Zoom Out":
+                        animate_start_x = 0.0
+                        animate_end_x = 0.0
+                        animate_start_y = 0.0
+                        animate_end_y = 0.0
+
+                        # Scale animation
+                        start_scale = 1.25
+                        end_scale = 1.0
+
+                    # Add keyframes
+                    start = openshot.Point(round(start_time * fps_float) + 1, start_scale, openshot.BEZIER)
                     start_object = json.loads(start.Json())
-                    end = openshot.Point(
-                        min(
-                            round((start_time + fade_length) * fps_float) + 1,
-                            round(end_time * fps_float) + 1
-                            ),
-                        1.0,
-                        openshot.BEZIER)
+                    end = openshot.Point(round(end_time * fps_float) + 1, end_scale, openshot.BEZIER)
                     end_object = json.loads(end.Json())
-                    new_clip['alpha']["Points"].append(start_object)
-                    new_clip['alpha']["Points"].append(end_object)
-
-                if fade_value in ['Fade Out', 'Fade In & Out']:
-                    start = openshot.Point(
-                        max(
-                            round((end_time * fps_float) + 1) - (round(fade_length * fps_float) + 1),
-                            round(start_time * fps_float) + 1
-                            ),
-                        1.0,
-                        openshot.BEZIER)
-                    start_object = json.loads(start.Json())
-                    end = openshot.Point(
-                        round(end_time * fps_float) + 1,
-                        0.0,
+                    new_clip["gravity"] = openshot.GRAVITY_CENTER
+                    new_clip["scale_x"]["Points"].append(start_object)
+                    new_clip["scale_x"]["Points"].append(end_object)
+                    new_clip["scale_y"]["Points"].append(start_object)
+                    new_clip["scale_y"]["Points"].append(end_object)
+
+                    # Add keyframes
+                    start_x = openshot.Point(round(start_time * fps_float) + 1, animate_start_x, openshot.BEZIER)
+                    start_x_object = json.loads(start_x.Json())
+                    end_x = openshot.Point(round(end_time * fps_float) + 1, animate_end_x, openshot.BEZIER)
+                    end_x_object = json.loads(end_x.Json())
+                    start_y = openshot.Point(round(start_time * fps_float) + 1, animate_start_y, openshot.BEZIER)
+                    start_y_object = json.loads(start_y.Json())
+                    end_y = openshot.Point(round(end_time * fps_float) + 1, animate_end_y, openshot.BEZIER)
+                    end_y_object = json.loads(end_y.Json())
+                    new_clip["gravity"] = openshot.GRAVITY_CENTER
+                    new_clip["location_x"]["Points"].append(start_x_object)
+                    new_clip["location_x"]["Points"].append(end_x_object)
+                    new_clip["location_y"]["Points"].append(start_y_object)
+                    new_clip["location_y"]["Points"].append(end_y_object)
+
+                if transition_path:
+                    # Add transition for this clip (if any)
+                    # Open up QtImageReader for transition Image
+                    if random_transition:
+                        random_index = randint(0, len(self.transitions) - 1)
+                        transition_path = self.transitions[random_index]
+
+                    # Get reader for transition
+                    transition_reader = openshot.QtImageReader(transition_path)
+
+                    brightness = openshot.Keyframe()
+                    brightness.AddPoint(1, 1.0, openshot.BEZIER)
+                    brightness.AddPoint(
+                        round(
+                            min(transition_length, end_time - start_time)
+                            * fps_float
+                            ) + 1,
+                        -1.0,
                         openshot.BEZIER)
-                    end_object = json.loads(end.Json())
-                    new_clip['alpha']["Points"].append(start_object)
-                    new_clip['alpha']["Points"].append(end_object)
-
-            # Adjust zoom amount
-            if zoom_value is not None:
-                # Location animation
-                if zoom_value == "Random":
-                    animate_start_x = uniform(-0.5, 0.5)
-                    animate_end_x = uniform(-0.15, 0.15)
-                    animate_start_y = uniform(-0.5, 0.5)
-                    animate_end_y = uniform(-0.15, 0.15)
-
-                    # Scale animation
-                    start_scale = uniform(0.5, 1.5)
-                    end_scale = uniform(0.85, 1.15)
-
-                elif zoom_value == "Zoom In":
-                    animate_start_x = 0.0
-                    animate_end_x = 0.0
-                    animate_start_y = 0.0
-                    animate_end_y = 0.0
-
-                    # Scale animation
-                    start_scale = 1.0
-                    end_scale = 1.25
-
-                elif zoom_value == "Zoom Out":
-                    animate_start_x = 0.0
-                    animate_end_x = 0.0
-                    animate_start_y = 0.0
-                    animate_end_y = 0.0
-
-                    # Scale animation
-                    start_scale = 1.25
-                    end_scale = 1.0
-
-                # Add keyframes
-                start = openshot.Point(round(start_time * fps_float) + 1, start_scale, openshot.BEZIER)
-                start_object = json.loads(start.Json())
-                end = openshot.Point(round(end_time * fps_float) + 1, end_scale, openshot.BEZIER)
-                end_object = json.loads(end.Json())
-                new_clip["gravity"] = openshot.GRAVITY_CENTER
-                new_clip["scale_x"]["Points"].append(start_object)
-                new_clip["scale_x"]["Points"].append(end_object)
-                new_clip["scale_y"]["Points"].append(start_object)
-                new_clip["scale_y"]["Points"].append(end_object)
-
-                # Add keyframes
-                start_x = openshot.Point(round(start_time * fps_float) + 1, animate_start_x, openshot.BEZIER)
-                start_x_object = json.loads(start_x.Json())
-                end_x = openshot.Point(round(end_time * fps_float) + 1, animate_end_x, openshot.BEZIER)
-                end_x_object = json.loads(end_x.Json())
-                start_y = openshot.Point(round(start_time * fps_float) + 1, animate_start_y, openshot.BEZIER)
-                start_y_object = json.loads(start_y.Json())
-                end_y = openshot.Point(round(end_time * fps_float) + 1, animate_end_y, openshot.BEZIER)
-                end_y_object = json.loads(end_y.Json())
-                new_clip["gravity"] = openshot.GRAVITY_CENTER
-                new_clip["location_x"]["Points"].append(start_x_object)
-                new_clip["location_x"]["Points"].append(end_x_object)
-                new_clip["location_y"]["Points"].append(start_y_object)
-                new_clip["location_y"]["Points"].append(end_y_object)
-
-            if transition_path:
-                # Add transition for this clip (if any)
-                # Open up QtImageReader for transition Image
-                if random_transition:
-                    random_index = randint(0, len(self.transitions) - 1)
-                    transition_path = self.transitions[random_index]
-
-                # Get reader for transition
-                transition_reader = openshot.QtImageReader(transition_path)
-
-                brightness = openshot.Keyframe()
-                brightness.AddPoint(1, 1.0, openshot.BEZIER)
-                brightness.AddPoint(
-                    round(
-                        min(transition_length, end_time - start_time)
-                        * fps_float
-                        ) + 1,
-                    -1.0,
-                    openshot.BEZIER)
-                contrast = openshot.Keyframe(3.0)
-
-                # Create transition dictionary
-                transitions_data = {
-                    "layer": track_num,
-                    "title": "Transition",
-                    "type": "Mask",
-                    "start": 0,
-                    "end": min(transition_length, end_time - start_time),
-                    "brightness": json.loads(brightness.Json()),
-                    "contrast": json.loads(contrast.Json()),
-                    "reader": json.loads(transition_reader.Json()),
-                    "replace_image": False
-                }
-
-                # Overlap this clip with the previous one (if any)
-                position = max(start_position, position - transition_length)
-                transitions_data["position"] = position
-                new_clip["position"] = position
+                    contrast = openshot.Keyframe(3.0)
+
+                    # Create transition dictionary
+                    transitions_data = {
+                        "layer": track_num,
+                        "title": "Transition",
+                        "type": "Mask",
+                        "start": 0,
+                        "end": min(transition_length, end_time - start_time),
+                        "brightness": json.loads(brightness.Json()),
+                        "contrast": json.loads(contrast.Json()),
+                        "reader": json.loads(transition_reader.Json()),
+                        "replace_image": False
+                    }
+
+                    # Overlap this clip with the previous one (if any)
+                    position = max(start_position, position - transition_length)
+                    transitions_data["position"] = position
+                    new_clip["position"] = position
 
-                # Create transition
-                tran = Transition()
-                tran.data = transitions_data
-                tran.save()
+                    # Create transition
+                    tran = Transition()
+                    tran.data = transitions_data
+                    tran.save()
 
-            # Save Clip
-            clip.data = new_clip
-            clip.save()
+                # Save Clip
+                clip.data = new_clip
+                clip.save()
 
-            # Increment position by length of clip
-            position += (end_time - start_time)
+                # Increment position by length of clip
+                position += (end_time - start_time)
 
         # Clear transaction
         get_app().updates.transaction_id = None
@@ -62,7 +62,7 @@ from classes.importers.final_cut_pro import import_xml
 from classes.logger import log
 from classes.metrics import track_metric_session, track_metric_screen
 from classes.query import File, Clip, Transition, Marker, Track, Effect
-from classes.thumbnail import httpThumbnailServerThread, httpThumbnailException
+from classes.thumbnail import httpThumbnailServerThread, httpThumbnailException, ThumbnailRequests
 from classes.time_parts import secondsToTimecode
 from classes.timeline import TimelineSync
 from classes.title_bar import HiddenTitleBar
@@ -129,6 +129,9 @@ class MainWindow(updates.UpdateWatcher, QMainWindow):
     SelectionChanged = pyqtSignal()      # Signal after selections have been changed (added/removed)
     SetKeyframeFilter = pyqtSignal(str)     # Signal to only show keyframes for the selected property
     IgnoreUpdates = pyqtSignal(bool, bool)     # Signal to let widgets know to ignore updates (i.e. batch updates)
+    ProjectSaveProgress = pyqtSignal(str, int)  # Signal with the percent complete of a project save
+    ProjectSaved = pyqtSignal(str)  # Signal after a project has been saved
+    ProjectSaveFailed = pyqtSignal(str, str)  # Signal after a project failed to save (with error message)
     ThemeChangedSignal = pyqtSignal(object)     # Signal when theme is changed
 
     # Docks are closable, movable and floatable
@@ -189,6 +192,10 @@ class MainWindow(updates.UpdateWatcher, QMainWindow):
         # Stop threads
         self.StopSignal.emit()
 
+        # Stop thumbnail worker threads (if any)
+        if self.thumbnail_requests:
+            self.thumbnail_requests.shutdown()
+
         # Stop thumbnail server thread (if any)
         if self.http_server_thread:
             self.http_server_thread.kill()
@@ -455,17 +462,19 @@ class MainWindow(updates.UpdateWatcher, QMainWindow):
         get_app().updates.transaction_id = str(uuid.uuid4())
 
         for file in files:
-            if "audio_data" in file.data.get("ui", {}):
+            ui = file.data.get("ui", {})
+            if "audio_data" in ui or "waveform" in ui:
                 file_path = file.data.get("path")
                 log.debug("File %s has audio data. Deleting it." % os.path.split(file_path)[1])
-                del file.data["ui"]["audio_data"]
+                file.data["ui"] = {key: value for key, value in ui.items() if key not in ("audio_data", "waveform")}
                 file.save()
 
         clips = Clip.filter()
         for clip in clips:
-            if "audio_data" in clip.data.get("ui", {}):
+            ui = clip.data.get("ui", {})
+            if "audio_data" in ui or "waveform" in ui:
                 log.debug("Clip %s has audio data. Deleting it." % clip.id)
-                del clip.data["ui"]["audio_data"]
+                clip.data["ui"] = {key: value for key, value in ui.items() if key not in ("audio_data", "waveform")}
                 clip.save()
 
         # Clear transaction id
@@ -480,34 +489,111 @@ class MainWindow(updates.UpdateWatcher, QMainWindow):
         get_app().updates.reset()
         log.info('History cleared')
 
-    def save_project(self, file_path):
-        """ Save a project to a file path, and refresh the screen """
-        with self.lock:
-            app = get_app()
-            _ = app._tr  # Get translation function
+    def save_project(self, file_path, background=False):
+        """ Save a project to a file path, and refresh the screen. A consistent snapshot of the project
+        is taken on the main thread. When background is True, the snapshot is serialized and written
+        on a worker thread (and ProjectSaveProgress, ProjectSaved, or ProjectSaveFailed are emitted). """
+        if background:
+            if not self.lock.acquire(blocking=False):
+                log.info("Skipping save of project %s, a save is already in progress", file_path)
+                return
+        else:
+            self.wait_for_save_lock()
 
-            try:
-                # Update history in project data
-                s = app.get_settings()
-                app.updates.save_history(app.project, s.get("history-limit"))
+        app = get_app()
+        try:
+            # Update history in project data
+            s = app.get_settings()
+            app.updates.save_history(app.project, s.get("history-limit"))
 
-                # Save recovery file
-                self.save_recovery(file_path)
+            # Take snapshot of project data
+            previous_path = app.project.current_filepath
+            snapshot = app.project.prepare_save(file_path)
+        except Exception as ex:
+            log.error("Couldn't save project %s", file_path, exc_info=1)
+            self.ProjectSaveFailed.emit(file_path, str(ex))
+            return
 
-                # Save project to file
-                app.project.save(file_path)
+        if background:
+            threading.Thread(target=self.write_project,
+                             args=(file_path, snapshot, previous_path), daemon=True).start()
+        else:
+            self.write_project(file_path, snapshot, previous_path)
 
-                # Set Window title
-                self.SetWindowTitle()
+    def wait_for_save_lock(self):
+        """ Acquire the save lock, processing events while a background save finishes
+        (the lock is released by its ProjectSaved or ProjectSaveFailed callback) """
+        while not self.lock.acquire(timeout=0.05):
+            QCoreApplication.processEvents()
 
-                # Load recent projects again
-                self.load_recent_menu()
+    def write_project(self, file_path, snapshot, previous_path):
+        """ Write a snapshot of the project to a file path (can be called on a worker thread) """
+        app = get_app()
+        try:
+            # Save recovery file
+            self.save_recovery(file_path)
 
-                log.info("Saved project %s", file_path)
+            # Save project to file
+            app.project.write_snapshot(
+                file_path, snapshot, previous_path=previous_path,
+                progress=lambda percent: self.ProjectSaveProgress.emit(file_path, percent))
+        except Exception as ex:
+            log.error("Couldn't save project %s", file_path, exc_info=1)
+            self.ProjectSaveFailed.emit(file_path, str(ex))
+        else:
+            self.ProjectSaved.emit(file_path)
 
-            except Exception as ex:
-                log.error("Couldn't save project %s", file_path, exc_info=1)
-                QMessageBox.warning(self, _("Error Saving Project"), str(ex))
+    def project_save_progress(self, file_path, percent):
+        """ Callback for save progress of a project """
+        _ = get_app()._tr
+        self.statusBar.showMessage(_("Saving project... %(percent)s%%") % {"percent": percent}, 2000)
+
+    def project_saved(self, file_path):
+        """ Callback for a successfully saved project (on the main thread) """
+        try:
+            get_app().project.finish_save(file_path)
+
+            # Set Window title
+            self.SetWindowTitle()
+
+            # Load recent projects again
+            self.load_recent_menu()
+
+            log.info("Saved project %s", file_path)
+        finally:
+            self.lock.release()
+
+    def project_save_failed(self, file_path, error):
+        """ Callback for a failed project save (on the main thread) """
+        _ = get_app()._tr
+        try:
+            QMessageBox.warning(self, _("Error Saving Project"), error)
+        finally:
+            self.lock.release()
+
+    def save_project_journal(self):
+        """ Append all unsaved changes to the project journal (incremental save) """
+        if not self.lock.acquire(blocking=False):
+            log.info("Skipping save of project journal, a save is already in progress")
+            return
+
+        app = get_app()
+        try:
+            # Update history in project data (this is journaled as well)
+            s = app.get_settings()
+            app.updates.save_history(app.project, s.get("history-limit"))
+
+            # Append changes to journal
+            app.project.journal.write()
+            app.project.has_unsaved_changes = False
+
+            # Set Window title
+            self.SetWindowTitle()
+
+        except Exception:
+            log.error("Couldn't save project journal", exc_info=1)
+        finally:
+            self.lock.release()
 
     def save_recovery(self, file_path):
         """Saves the project and manages recovery files based on configured limits."""
@@ -665,6 +751,7 @@ class MainWindow(updates.UpdateWatcher, QMainWindow):
         """Clear all user thumbnails"""
         for temp_dir in [
                 info.get_default_path("THUMBNAIL_PATH"),
+                info.get_default_path("WAVEFORM_PATH"),
                 info.get_default_path("BLENDER_PATH"),
                 info.get_default_path("TITLE_PATH"),
                 ]:
@@ -763,9 +850,17 @@ class MainWindow(updates.UpdateWatcher, QMainWindow):
             if not file_path.endswith(".osp"):
                     file_path = "%s.osp" % file_path
 
-            # Save project
-            log.info("Auto save project file: %s", file_path)
-            threading.Thread(target=self.save_project, args=(file_path,), daemon=True).start()
+            s = app.get_settings()
+            journal = app.project.journal
+            if s.get("enable-project-journal") and journal.is_active(file_path) \
+                    and not journal.needs_snapshot(s.get("journal-compact-limit")):
+                # Append changes to project journal (instead of saving the entire project)
+                log.info("Auto save project journal: %s", file_path)
+                self.save_project_journal()
+            else:
+                # Save project
+                log.info("Auto save project file: %s", file_path)
+                self.save_project(file_path, background=True)
 
             # Remove backup.osp (if any)
             if os.path.exists(info.BACKUP_FILE):
@@ -810,7 +905,7 @@ class MainWindow(updates.UpdateWatcher, QMainWindow):
                 file_path = "%s.osp" % file_path
 
             # Save new project
-            threading.Thread(target=self.save_project, args=(file_path,), daemon=True).start()
+            self.save_project(file_path, background=True)
 
     def actionImportFiles_trigger(self):
         app = get_app()
@@ -1078,6 +1173,7 @@ class MainWindow(updates.UpdateWatcher, QMainWindow):
         # Get max frame (based on last clip) and current frame
         timeline_sync = get_app().window.timeline_sync
         if timeline_sync and timeline_sync.timeline:
+            timeline_sync.flush()
             max_frame = timeline_sync.timeline.GetMaxFrame()
             current_frame = self.preview_thread.current_frame
             if current_frame is not None:
@@ -1182,6 +1278,7 @@ class MainWindow(updates.UpdateWatcher, QMainWindow):
         log.debug("actionJumpEnd_trigger")
 
         # Determine last frame (based on clips) & seek there
+        get_app().window.timeline_sync.flush()
         max_frame = get_app().window.timeline_sync.timeline.GetMaxFrame()
         self.SeekSignal.emit(max_frame)
         QTimer.singleShot(50, self.actionCenterOnPlayhead_trigger)
@@ -1263,6 +1360,7 @@ class MainWindow(updates.UpdateWatcher, QMainWindow):
         # Get and Save the frame
         # (return is void, so we cannot check for success/fail here
         # - must use file modification timestamp)
+        self.timeline_sync.flush()
         openshot.Timeline.GetFrame(
             self.timeline_sync.timeline, self.preview_thread.current_frame).Save(framePath, 1.0)
 
@@ -1332,19 +1430,20 @@ class MainWindow(updates.UpdateWatcher, QMainWindow):
                 "trans": cur_trans,
             })
 
-        # Renumber everything
-        for layer in targets:
-            try:
-                num = layer["number"]
-                layer["track"].data["number"] = num
-                layer["track"].save()
-
-                for item in layer["clips"] + layer["trans"]:
-                    item.data["layer"] = num
-                    item.save()
-            except (AttributeError, IndexError, ValueError):
-                # Ignore references to deleted objects
-                continue
+        # Renumber everything (as a single batch of updates)
+        with app.updates.batch():
+            for layer in targets:
+                try:
+                    num = layer["number"]
+                    layer["track"].data["number"] = num
+                    layer["track"].save()
+
+                    for item in layer["clips"] + layer["trans"]:
+                        item.data["layer"] = num
+                        item.save()
+                except (AttributeError, IndexError, ValueError):
+                    # Ignore references to deleted objects
+                    continue
 
         # Re-enable undo tracking for new track insertion
         app.updates.ignore_history = False
@@ -1588,6 +1687,7 @@ class MainWindow(updates.UpdateWatcher, QMainWindow):
 
         # If nothing is selected, also add the end of the last clip
         if not self.selected_clips + self.selected_transitions:
+            get_app().window.timeline_sync.flush()
             all_marker_positions.append(
                 # last frame is -1 frame's duration
                 get_app().window.timeline_sync.timeline.GetMaxTime() - frame_duration)
@@ -2018,8 +2118,10 @@ class MainWindow(updates.UpdateWatcher, QMainWindow):
 
     def ripple_delete_gap(self, ripple_start, layer, total_gap):
         """Remove the ripple gap and adjust subsequent items on the same layer"""
-        clips = [clip for clip in Clip.filter(layer=layer) if clip.data.get("position", 0.0) > ripple_start]
-        transitions = [tran for tran in Transition.filter(layer=layer) if tran.data.get("position", 0.0) > ripple_start]
+        clips = [clip for clip in Clip.filter_range(ripple_start, float("inf"), layer=layer)
+                 if clip.data.get("position", 0.0) > ripple_start]
+        transitions = [tran for tran in Transition.filter_range(ripple_start, float("inf"), layer=layer)
+                       if tran.data.get("position", 0.0) > ripple_start]
 
         for clip in clips:
             clip.data["position"] -= total_gap
@@ -2914,7 +3016,8 @@ class MainWindow(updates.UpdateWatcher, QMainWindow):
 
     def restore_version_clicked(self, file_path):
         """Restore a previous project file from the recovery folder"""
-        with self.lock:
+        self.wait_for_save_lock()
+        try:
             app = get_app()
             current_filepath = app.project.current_filepath if app.project else None
             _ = get_app()._tr
@@ -2945,6 +3048,8 @@ class MainWindow(updates.UpdateWatcher, QMainWindow):
 
             except Exception as ex:
                 log.error(f"Error recovering project from `{file_path}` to `{current_filepath}`: {ex}", exc_info=True)
+        finally:
+            self.lock.release()
 
     def remove_recent_project(self, file_path):
         """Remove a project from the Recent menu if OpenShot can't find it"""
@@ -3555,6 +3660,7 @@ class MainWindow(updates.UpdateWatcher, QMainWindow):
 
         # Initialize a few things needed to exist
         self.http_server_thread = None
+        self.thumbnail_requests = None
         self.preview_thread = None
         self.timeline_sync = None
 
@@ -3611,6 +3717,9 @@ class MainWindow(updates.UpdateWatcher, QMainWindow):
             self.http_server_thread = httpThumbnailServerThread()
             self.http_server_thread.start()
 
+            # Thumbnails for Qt views are generated without the HTTP server
+            self.thumbnail_requests = ThumbnailRequests(self)
+
         except httpThumbnailException as ex:
             # Show error message to user
             msg = QMessageBox()
@@ -3792,6 +3901,11 @@ class MainWindow(updates.UpdateWatcher, QMainWindow):
         # Connect OpenProject Signal
         self.OpenProjectSignal.connect(self.open_project)
 
+        # Connect project save signals (emitted from background save threads)
+        self.ProjectSaveProgress.connect(self.project_save_progress)
+        self.ProjectSaved.connect(self.project_saved)
+        self.ProjectSaveFailed.connect(self.project_save_failed)
+
         # Connect Selection signals
         self.SelectionAdded.connect(self.addSelection)
         self.SelectionRemoved.connect(self.removeSelection)
@@ -28,12 +28,12 @@
 import os
 
 from PyQt5.QtCore import Qt
-from PyQt5.QtGui import QStandardItem, QStandardItemModel, QIcon
+from PyQt5.QtGui import QStandardItem, QStandardItemModel, QIcon, QPixmap
 
 from classes import info
 from classes.logger import log
 from classes.app import get_app
-from classes.thumbnail import GetThumbPath
+from classes.thumbnail import FindThumbnail
 
 
 class TimelineModel():
@@ -52,6 +52,7 @@ class TimelineModel():
         # Clear all items
         if clear:
             self.model.clear()
+            self.thumbnail_items.clear()
 
         # Add Headers
         self.model.setHorizontalHeaderLabels([_("Thumb"), _("Name")])
@@ -72,8 +73,8 @@ class TimelineModel():
                     fps_float = float(fps["num"]) / float(fps["den"])
                     thumbnail_frame = round(float(file.data['start']) * fps_float) + 1
 
-                # Get thumb path
-                thumb_icon = QIcon(GetThumbPath(file.id, thumbnail_frame))
+                # Get thumb icon (or a placeholder, until the thumbnail is generated)
+                thumb_icon = self.get_thumbnail_icon(file, thumbnail_frame)
             else:
                 # Audio file
                 thumb_icon = QIcon(os.path.join(info.PATH, "images", "AudioThumbnail.svg"))
@@ -89,6 +90,7 @@ class TimelineModel():
             col.setToolTip(filename)
             col.setFlags(Qt.ItemIsSelectable | Qt.ItemIsEnabled | Qt.ItemIsUserCheckable)
             row.append(col)
+            self.thumbnail_items[file.id] = col
 
             # Append Name
             col = QStandardItem("Name")
@@ -103,6 +105,29 @@ class TimelineModel():
             # Process events in QT (to keep the interface responsive)
             app.processEvents()
 
+    def get_thumbnail_icon(self, file, thumbnail_frame):
+        """Get the icon of an existing thumbnail, or request the thumbnail (which is generated in
+        a worker thread) and get a placeholder icon, replaced when the thumbnail is ready"""
+        thumb_path = FindThumbnail(file.id, thumbnail_frame, file.absolute_path())
+        if thumb_path:
+            self.pending_thumbnails.pop(file.id, None)
+            return QIcon(thumb_path)
+
+        self.pending_thumbnails[file.id] = thumbnail_frame
+        self.app.window.thumbnail_requests.request(file.id, thumbnail_frame)
+        return self.placeholder_icon
+
+    def thumbnail_ready(self, file_id, thumbnail_frame, thumb_path):
+        """Replace the placeholder icon of a file, when its thumbnail is ready"""
+        if self.pending_thumbnails.get(file_id) != thumbnail_frame:
+            # Not requested by this model (or a different frame was requested since)
+            return
+        self.pending_thumbnails.pop(file_id)
+
+        item = self.thumbnail_items.get(file_id)
+        if thumb_path and item:
+            item.setIcon(QIcon(thumb_path))
+
     def __init__(self, *args):
 
         # Create standard model
@@ -111,3 +136,14 @@ class TimelineModel():
         self.model.setColumnCount(2)
         self.model_paths = {}
         self.files = []
+
+        # Thumbnails being generated: {file_id: thumbnail frame}, and the item of each thumbnail
+        self.pending_thumbnails = {}
+        self.thumbnail_items = {}
+
+        # Transparent icon shown until a thumbnail is generated
+        placeholder = QPixmap(98, 64)
+        placeholder.fill(Qt.transparent)
+        self.placeholder_icon = QIcon(placeholder)
+
+        self.app.window.thumbnail_requests.ThumbnailReady.connect(self.thumbnail_ready)
@@ -38,7 +38,7 @@ from PyQt5.QtCore import (
     QSortFilterProxyModel, QItemSelectionModel, QPersistentModelIndex, QModelIndex
 )
 from PyQt5.QtGui import (
-    QIcon, QStandardItem, QStandardItemModel
+    QIcon, QPixmap, QStandardItem, QStandardItemModel
 )
 from PyQt5.QtWidgets import QAbstractItemView
 from classes import updates
@@ -47,7 +47,7 @@ from classes.image_types import get_media_type
 from classes.query import File
 from classes.logger import log
 from classes.app import get_app
-from classes.thumbnail import GetThumbPath
+from classes.thumbnail import FindThumbnail
 
 import openshot
 
@@ -114,6 +114,7 @@ class FileFilterProxyModel(QSortFilterProxyModel):
 
 class FilesModel(QObject, updates.UpdateInterface):
     ModelRefreshed = pyqtSignal()
+    key_prefixes = ("files",)  # Only file changes (and 'load' actions) are received
 
     # This method is invoked by the UpdateManager each time a change happens (i.e UpdateInterface)
     def changed(self, action):
@@ -210,8 +211,8 @@ class FilesModel(QObject, updates.UpdateInterface):
                     fps_float = float(fps["num"]) / float(fps["den"])
                     thumbnail_frame = round(float(file.data['start']) * fps_float) + 1
 
-                # Get thumb path
-                thumb_icon = QIcon(GetThumbPath(file.id, thumbnail_frame))
+                # Get thumb icon (or a placeholder, until the thumbnail is generated)
+                thumb_icon = self.get_thumbnail_icon(file, thumbnail_frame)
             else:
                 # Audio file
                 thumb_icon = QIcon(os.path.join(info.PATH, "images", "AudioThumbnail.svg"))
@@ -544,8 +545,8 @@ class FilesModel(QObject, updates.UpdateInterface):
                 if 'start' in file.data:
                     thumbnail_frame = round(float(file.data['start']) * fps_float) + 1
 
-                # Get thumb path
-                thumb_icon = QIcon(GetThumbPath(file.id, thumbnail_frame, clear_cache=True))
+                # Get placeholder icon (until the thumbnail is re-generated)
+                thumb_icon = self.get_thumbnail_icon(file, thumbnail_frame, clear_cache=True)
             else:
                 # Audio file
                 thumb_icon = QIcon(os.path.join(info.PATH, "images", "AudioThumbnail.svg"))
@@ -566,6 +567,34 @@ class FilesModel(QObject, updates.UpdateInterface):
 
         self.ignore_updates = False
 
+    def get_thumbnail_icon(self, file, thumbnail_frame, clear_cache=False):
+        """Get the icon of an existing thumbnail, or request the thumbnail (which is generated in
+        a worker thread) and get a placeholder icon, replaced when the thumbnail is ready"""
+        if not clear_cache:
+            thumb_path = FindThumbnail(file.id, thumbnail_frame, file.absolute_path())
+            if thumb_path:
+                self.pending_thumbnails.pop(file.id, None)
+                return QIcon(thumb_path)
+
+        self.pending_thumbnails[file.id] = thumbnail_frame
+        get_app().window.thumbnail_requests.request(file.id, thumbnail_frame, clear_cache)
+        return self.placeholder_icon
+
+    def thumbnail_ready(self, file_id, thumbnail_frame, thumb_path):
+        """Replace the placeholder icon of a file, when its thumbnail is ready"""
+        if self.pending_thumbnails.get(file_id) != thumbnail_frame:
+            # Not requested by this model (or a different frame was requested since)
+            return
+        self.pending_thumbnails.pop(file_id)
+
+        id_index = self.model_ids.get(file_id)
+        if not thumb_path or not id_index or not id_index.isValid():
+            return
+
+        # Update thumb for file
+        thumb_index = id_index.sibling(id_index.row(), 0)
+        self.model.itemFromIndex(thumb_index).setIcon(QIcon(thumb_path))
+
     def selected_file_ids(self):
         """ Get a list of file IDs for all selected files """
         # Get the indexes for column 5 of all selected rows
@@ -623,6 +652,14 @@ class FilesModel(QObject, updates.UpdateInterface):
         self.ignore_updates = False
         self.ignore_image_sequence_paths = []
 
+        # Thumbnails being generated: {file_id: thumbnail frame}
+        self.pending_thumbnails = {}
+
+        # Transparent icon shown until a thumbnail is generated
+        placeholder = QPixmap(98, 64)
+        placeholder.fill(Qt.transparent)
+        self.placeholder_icon = QIcon(placeholder)
+
         # Create proxy model (for sorting and filtering)
         self.proxy_model = FileFilterProxyModel(parent=self)
         self.proxy_model.setDynamicSortFilter(True)
@@ -639,6 +676,7 @@ class FilesModel(QObject, updates.UpdateInterface):
 
         # Connect signal
         app.window.FileUpdated.connect(self.update_file_thumbnail)
+        app.window.thumbnail_requests.ThumbnailReady.connect(self.thumbnail_ready)
         app.window.refreshFilesSignal.connect(
             functools.partial(self.update_model, clear=False))
 
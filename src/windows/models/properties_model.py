@@ -36,7 +36,7 @@ from PyQt5.QtGui import (
     )
 
 from classes.waveform import get_audio_data
-from classes import info, updates
+from classes import info, updates, waveform_store
 from classes import openshot_rc  # noqa
 from classes.query import Clip, Transition, Effect
 from classes.logger import log
@@ -66,14 +66,15 @@ class ClipStandardItemModel(QStandardItemModel):
 
 
 class PropertiesModel(updates.UpdateInterface):
+    supports_batch = True  # Model is only updated once per batch
+    key_prefixes = ("clips", "effects")
+    action_types = ("update", "insert")
+
     # This method is invoked by the UpdateManager each time a change happens (i.e UpdateInterface)
     def changed(self, action):
-
-        # Handle change
-        if action and len(action.key) >= 1 and action.key[0] in ["clips", "effects"] and action.type in ["update", "insert"]:
-            log.debug(action.values)
-            # Update the model data
-            self.update_model(get_app().window.txtPropertyFilter.text())
+        # Update the model data (for clip and effect changes)
+        log.debug(action.values)
+        self.update_model(get_app().window.txtPropertyFilter.text())
 
     # Update the selected item (which drives what properties show up)
     def update_item(self, selection):
@@ -95,6 +96,7 @@ class PropertiesModel(updates.UpdateInterface):
         self.filter_base_properties = []
 
         if selection:
+            get_app().window.timeline_sync.flush()
             timeline = get_app().window.timeline_sync.timeline
             for sel in selection:
                 item_id = sel.get("id")
@@ -275,7 +277,7 @@ class PropertiesModel(updates.UpdateInterface):
                 has_waveform = False
                 waveform_file_id = None
                 if property_key == "volume":
-                    if clip_data.get("ui", {}).get("audio_data", []):
+                    if waveform_store.has_waveform(clip_data):
                         waveform_file_id = c.data.get("file_id")
                         has_waveform = True
 
@@ -669,7 +671,7 @@ class PropertiesModel(updates.UpdateInterface):
                 has_waveform = False
                 waveform_file_id = None
                 if property_key == "volume":
-                    if clip_data.get("ui", {}).get("audio_data", []):
+                    if waveform_store.has_waveform(clip_data):
                         waveform_file_id = c.data.get("file_id")
                         has_waveform = True
 
@@ -43,9 +43,11 @@ from PyQt5.QtGui import QKeySequence, QIcon
 from classes import info, ui_util
 from classes import openshot_rc  # noqa
 from classes.app import get_app
+from classes.dispatch_profiler import profiler
 from classes.language import get_all_languages
 from classes.logger import log
 from classes.metrics import track_metric_screen
+from classes.thumbnail import GetWritableFormats
 
 import openshot
 
@@ -366,6 +368,12 @@ class Preferences(QDialog):
                             extraWidget.clicked.connect(functools.partial(self.testHardwareDecode, widget,
                                                                           param, extraWidget))
 
+                    # Remove thumbnail formats which can't be written (i.e. webp, without the Qt plugin)
+                    if param["setting"] == "thumbnail-format":
+                        writable_formats = GetWritableFormats()
+                        value_list = [value_item for value_item in value_list
+                                      if value_item["value"] in writable_formats]
+
                     # Replace %s dropdown values for hardware acceleration
                     if param["setting"] in ("graca_number_en", "graca_number_de"):
                         value_list = []
@@ -502,6 +510,15 @@ class Preferences(QDialog):
             # Enable / Disable logger
             openshot.ZmqLogger.Instance().Enable(debug_enabled)
 
+        elif param["setting"] == "enable-dispatch-profiler":
+            # Start / Stop profiling project updates (and save the profile when stopped)
+            if state == Qt.Checked:
+                profiler.enable(True, self.s.get("dispatch-warning-threshold"))
+            else:
+                profiler.dump()
+                profiler.enable(False)
+                profiler.reset()
+
         elif param["setting"] == "enable-auto-save":
             # Toggle autosave
             if (state == Qt.Checked):
@@ -523,6 +540,15 @@ class Preferences(QDialog):
             # Update autosave interval (# of minutes)
             get_app().window.auto_save_timer.setInterval(int(value * 1000 * 60))
 
+        elif param["setting"] == "history-memory-limit":
+            # Update size of undo/redo history kept in memory (# of MB)
+            get_app().updates.history_byte_limit = int(value) * 1024 * 1024
+            get_app().updates.limit_history_size()
+
+        elif param["setting"] == "dispatch-warning-threshold":
+            # Update threshold of slow project update warnings (# of ms)
+            profiler.warning_threshold = float(value) / 1000.0
+
         elif param["setting"] == "omp_threads_number":
             openshot.Settings.Instance().OMP_THREADS = max(2, int(str(value)))
 
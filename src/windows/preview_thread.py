@@ -40,21 +40,31 @@ from classes.updates import UpdateInterface
 
 class PreviewParent(QObject, UpdateInterface):
     """ Class which communicates with the PlayerWorker Class (running on a separate thread) """
+    supports_batch = True  # Max frame is only checked once per batch (or event loop iteration)
+
+    # Ignore changes that don't affect libopenshot
+    ignored_key_prefixes = (
+        "files", "history", "markers", "layers", "scale", "profile", "sample_rate", "export_settings")
 
     def changed(self, action):
         """ This method is invoked by the UpdateManager each time a change happens (i.e UpdateInterface) """
 
-        # Ignore changes that don't affect libopenshot
-        if action and len(action.key) >= 1 and action.key[0].lower() in ["files", "history", "markers", "layers", "scale", "profile", "sample_rate", "export_settings"]:
-            return
+        # Changes are applied to libopenshot on the next event loop iteration (see TimelineSync),
+        # so the max frame is checked once they are applied
+        if not self.max_length_timer.isActive():
+            self.max_length_timer.start()
 
+    def update_max_length(self):
+        """ Keep track of max timeline frame # on any updates to the timeline """
         try:
-            # Keep track of max timeline frame # on any updates to the timeline
+            # Apply any queued changes to the timeline
+            self.parent.timeline_sync.flush()
+
             self.timeline_max_length = self.timeline.GetMaxFrame()
             log.debug(f"Max timeline length/frames detected: {self.timeline_max_length}")
 
         except Exception as e:
-            log.info("Error calculating max timeline length on PreviewParent: %s. %s" % (e, action.json(is_array=True)))
+            log.info("Error calculating max timeline length on PreviewParent: %s" % e)
 
     # Signal when the frame position changes in the preview player
     def onPositionChanged(self, current_frame):
@@ -110,6 +120,12 @@ class PreviewParent(QObject, UpdateInterface):
         self.timeline = timeline
         self.timeline_max_length = max_length
 
+        # Timer to check the max frame once per event loop iteration
+        self.max_length_timer = QTimer(self)
+        self.max_length_timer.setSingleShot(True)
+        self.max_length_timer.setInterval(0)
+        self.max_length_timer.timeout.connect(self.update_max_length)
+
         # Background Worker Thread (for preview video process)
         self.background = QThread(self)
         self.worker = PlayerWorker()  # no parent!
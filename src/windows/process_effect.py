@@ -90,6 +90,7 @@ class ProcessEffect(QDialog):
                 break
 
         # Access C++ timeline and find the Clip instance which this effect should be applied to
+        get_app().window.timeline_sync.flush()
         timeline_instance = get_app().window.timeline_sync.timeline
         for clip_instance in timeline_instance.Clips():
             if clip_instance.Id() == self.clip_id:
@@ -49,6 +49,7 @@ from classes.query import Clip, Effect
 
 class VideoWidget(QWidget, updates.UpdateInterface):
     """ A QWidget used on the video display widget """
+    key_prefixes = ("display_ratio", "pixel_ratio")  # Only ratio changes (and 'load' actions) are received
 
     # This method is invoked by the UpdateManager each time a change happens (i.e UpdateInterface)
     def changed(self, action):
@@ -1353,6 +1354,7 @@ class VideoWidget(QWidget, updates.UpdateInterface):
         else:
             self.transforming_clips = []
             self.transforming_clip_objects = []
+            win.timeline_sync.flush()
             for cid in clip_ids:
                 c = Clip.get(id=cid)
                 co = win.timeline_sync.timeline.GetClip(cid)
@@ -1389,6 +1391,7 @@ class VideoWidget(QWidget, updates.UpdateInterface):
         # Get new clip for transform
         if effect_id and clip_id:
             self.transforming_clip = Clip.get(id=clip_id)
+            win.timeline_sync.flush()
             self.transforming_clip_object = win.timeline_sync.timeline.GetClip(clip_id)
             self.transforming_effect = Effect.get(id=effect_id)
             self.transforming_effect_object = win.timeline_sync.timeline.GetClipEffect(effect_id)
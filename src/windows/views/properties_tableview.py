@@ -47,7 +47,7 @@ from classes.logger import log
 from classes.app import get_app
 from classes import info
 from classes.query import Clip, Effect, Transition, File
-from classes.thumbnail import GetThumbPath
+from classes.thumbnail import FindThumbnail
 
 from windows.models.properties_model import PropertiesModel
 from windows.color_picker import ColorPicker
@@ -653,6 +653,7 @@ class PropertiesTableView(QTableView):
                         tracked_object_menu_name = _("Tracked Objects")
 
                     # Get all visible object's indexes
+                    get_app().window.timeline_sync.flush()
                     timeline_instance = get_app().window.timeline_sync.timeline
                     # Instantiate the effect
                     effect = timeline_instance.GetClipEffect(item_id)
@@ -688,6 +689,7 @@ class PropertiesTableView(QTableView):
                     tracked_choices = []
                     clip_choices = []
                     # Instantiate the timeline
+                    get_app().window.timeline_sync.flush()
                     timeline_instance = get_app().window.timeline_sync.timeline
                     # Loop through timeline's clips
                     for clip in Clip.filter():
@@ -1203,12 +1205,18 @@ class SelectionLabel(QFrame):
 
                     # Generate thumbnail for file (if needed)
                     media_type = file.data.get("media_type")
+                    pending_thumbnail = None
                     if media_type in ["video", "image"]:
-                        # Video thumbnail
+                        # Video thumbnail (or a placeholder, until the thumbnail is generated)
                         fps = file.data["fps"]
                         fps_float = float(fps["num"]) / float(fps["den"])
                         thumbnail_frame = round(float(clip.data['start']) * fps_float) + 1
-                        thumb_icon = QIcon(GetThumbPath(file.id, thumbnail_frame))
+                        thumb_path = FindThumbnail(file.id, thumbnail_frame, file.absolute_path())
+                        if thumb_path:
+                            thumb_icon = QIcon(thumb_path)
+                        else:
+                            thumb_icon = self.placeholder_icon
+                            pending_thumbnail = (file.id, thumbnail_frame)
                     else:
                         # Audio thumbnail
                         thumb_icon = QIcon(os.path.join(info.PATH, "images", "AudioThumbnail.svg"))
@@ -1216,6 +1224,8 @@ class SelectionLabel(QFrame):
                     action = menu.addAction(thumb_icon, item_name)
                     action.setData({'item_id': item_id, 'item_type': 'clip'})
                     action.triggered.connect(self.Action_Triggered)
+                    if pending_thumbnail:
+                        self.request_thumbnail(action, *pending_thumbnail)
 
                     for effect_info in clip.data.get('effects', []):
                         effect = Effect.get(id=effect_info.get('id'))
@@ -1261,6 +1271,23 @@ class SelectionLabel(QFrame):
         # Return the menu object
         return menu
 
+    def request_thumbnail(self, action, file_id, thumbnail_frame):
+        """Request the thumbnail of a menu action (which is generated in a worker thread)"""
+        actions = self.pending_thumbnails.setdefault((file_id, thumbnail_frame), [])
+        actions.append(action)
+        if len(actions) == 1:
+            get_app().window.thumbnail_requests.request(file_id, thumbnail_frame)
+
+    def thumbnail_ready(self, file_id, thumbnail_frame, thumb_path):
+        """Replace the placeholder icons of menu actions, when their thumbnail is ready"""
+        actions = self.pending_thumbnails.pop((file_id, thumbnail_frame), None)
+        if not actions or not thumb_path:
+            return
+        thumb_icon = QIcon(thumb_path)
+        for action in actions:
+            if not sip.isdeleted(action):
+                action.setIcon(thumb_icon)
+
     def _selections_equal(self, first, second):
         def norm(s):
             return sorted([(i['id'], i['type']) for i in s])
@@ -1370,6 +1397,14 @@ class SelectionLabel(QFrame):
         self.item_icon = None
         self.all_selection = []
 
+        # Menu actions waiting for a thumbnail: {(file_id, thumbnail frame): [actions]}
+        self.pending_thumbnails = {}
+
+        # Transparent icon shown until a thumbnail is generated
+        placeholder = QPixmap(98, 64)
+        placeholder.fill(Qt.transparent)
+        self.placeholder_icon = QIcon(placeholder)
+
         # Get translation object
         _ = get_app()._tr
 
@@ -1396,3 +1431,4 @@ class SelectionLabel(QFrame):
 
         # Connect signals
         get_app().window.propertyTableView.loadProperties.connect(self.select_item)
+        get_app().window.thumbnail_requests.ThumbnailReady.connect(self.thumbnail_ready)
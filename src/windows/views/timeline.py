@@ -32,6 +32,7 @@ import logging
 import os
 import time
 import uuid
+from contextlib import nullcontext
 from functools import partial
 from operator import itemgetter
 from random import uniform
@@ -46,9 +47,10 @@ from classes.app import get_app
 from classes.effect_init import effect_options
 from classes.logger import log
 from classes.query import File, Clip, Transition, Track, Effect
+from classes.timeline import TimelineSync
 from classes.clipboard import ClipboardManager
-from classes.thumbnail import GetThumbPath
 from classes.waveform import get_audio_data
+from classes.waveform_store import has_waveform
 from .timeline_backend.enums import (
     MenuFade, MenuRotate, MenuLayout, MenuAlign, MenuAnimate, MenuVolume,
     MenuTransform, MenuTime, MenuCopy, MenuSlice, MenuSplitAudio
@@ -58,6 +60,7 @@ from .menu import StyledContextMenu
 
 # Constants used by this file
 JS_SCOPE_SELECTOR = "$('body').scope()"
+CLIP_DATA_CHUNK_SIZE = 50  # Number of clips per chunk of heavy clip data (sent after a project is loaded)
 ViewClass = None
 
 # Setup timeline
@@ -84,6 +87,13 @@ else:
 
 class TimelineView(updates.UpdateInterface, ViewClass):
     """ A Web(Engine/Kit)View QWidget used to load the Timeline """
+    supports_batch = True  # A batch is sent to the webview with a single applyJsonDiff() call
+
+    # Only changes related to the webview are received (the qwidget backend handles its own changes)
+    if ViewClass == TimelineWidget:
+        ignored_key_prefixes = TimelineWidget.ignored_key_prefixes
+    else:
+        key_prefixes = ("clips", "effects", "duration", "layers", "markers")
 
     # Path to html file
     html_path = os.path.join(info.PATH, 'timeline', 'index.html')
@@ -103,6 +113,10 @@ class TimelineView(updates.UpdateInterface, ViewClass):
         """Document.Ready event has fired, and is initialized"""
         self.document_is_ready = True
 
+        # Run all scripts queued while loading
+        if hasattr(self, "script_queue"):
+            self.script_queue.set_ready()
+
     @pyqtSlot(result=str)
     def get_uuid(self):
         """Get a unique id (used for generating a transaction id for the undo/redo system)"""
@@ -168,17 +182,13 @@ class TimelineView(updates.UpdateInterface, ViewClass):
             # Propagate to timeline qwidget
             TimelineWidget.changed(self, action)
 
-        try:
-            # Duplicate UpdateAction, and remove unused action attribute (old_values)
-            action = action.copy()
-            action.old_values = {}
-        except:
-            log.error("Error duplicating UpdateAction", exc_info=1)
-            return
+        # Project changes invalidate cached frames
+        self.wake_cache_renderer()
 
-        # Bail out if change unrelated to webview
-        if action and len(action.key) >= 1 and action.key[0] not in ["clips", "effects", "duration", "layers", "markers"]:
-            log.debug(f"Skipping unneeded webview update for '{action.key[0]}'")
+        if action.type == "batch":
+            # Send all actions of the batch in a single JSON diff (without old_values)
+            diffs = [dict(a.get_dict(), old_values={}) for a in action.values]
+            self.run_js(JS_SCOPE_SELECTOR + ".applyJsonDiff(" + json.dumps(diffs) + ");")
             return
 
         # Send a JSON version of the UpdateAction to the timeline webview method: applyJsonDiff()
@@ -190,12 +200,21 @@ class TimelineView(updates.UpdateInterface, ViewClass):
             # Initialize translated track name
             self.run_js(JS_SCOPE_SELECTOR + ".setTrackLabel('" + _("Track %s") + "');")
 
-            # Load entire project data
-            self.run_js(JS_SCOPE_SELECTOR + ".loadJson(" + action.json() + ");")
+            # The cached ranges of the previous project are removed with it
+            self.cache_ranges = []
+            self.cache_renderer_version = None
+
+            # Load a slim version of the project data (heavy clip data is sent later in chunks)
+            self.clip_data_timer.stop()
+            project_skeleton, self.pending_clip_ids = self.get_project_skeleton(action.values)
+            self.run_js(JS_SCOPE_SELECTOR + ".loadJson(" + json.dumps({"value": project_skeleton}) + ");")
+            if self.pending_clip_ids:
+                self.clip_data_timer.start()
 
-        elif action.key[0] != "files":
-            # Apply diff to part of project data
-            self.run_js(JS_SCOPE_SELECTOR + ".applyJsonDiff([" + action.json() + "]);")
+        else:
+            # Apply diff to part of project data (without the unused old_values)
+            diff = dict(action.get_dict(), old_values={})
+            self.run_js(JS_SCOPE_SELECTOR + ".applyJsonDiff([" + json.dumps(diff) + "]);")
 
         # Reset the scale when loading new JSON
         if action.type == "load":
@@ -203,6 +222,76 @@ class TimelineView(updates.UpdateInterface, ViewClass):
             initial_scale = float(get_app().project.get("scale") or 15.0)
             self.window.sliderZoomWidget.setZoomFactor(initial_scale)
 
+    @staticmethod
+    def get_project_skeleton(project):
+        """Get a slim copy of the project data for the webview (without files, history,
+        waveforms, reader metadata and effect properties), and the set of clip ids
+        which are missing their heavy data. Project data is not modified."""
+        skeleton = {key: value for key, value in project.items() if key not in ("files", "history")}
+        skeleton["clips"] = []
+        pending_clip_ids = set()
+        for clip in project.get("clips", []):
+            clip_skeleton = dict(clip)
+            reader = clip.get("reader")
+            if isinstance(reader, dict):
+                # Only keep the reader properties needed for thumbnails
+                clip_skeleton["reader"] = {key: reader[key] for key in ("has_video", "has_audio", "fps")
+                                           if key in reader}
+            ui = clip.get("ui")
+            if isinstance(ui, dict) and "audio_data" in ui:
+                clip_skeleton["ui"] = {key: value for key, value in ui.items() if key != "audio_data"}
+            clip_skeleton["effects"] = [{"id": effect.get("id"), "type": effect.get("type")}
+                                        for effect in clip.get("effects", [])]
+            skeleton["clips"].append(clip_skeleton)
+            pending_clip_ids.add(clip.get("id"))
+        return skeleton, pending_clip_ids
+
+    def get_visible_range(self):
+        """Get the approximate range of visible seconds on the timeline (from the zoom slider)"""
+        duration = float(get_app().project.get("duration") or 0.0)
+        scrollbar_position = self.window.sliderZoomWidget.scrollbar_position
+        left, right = scrollbar_position[0], scrollbar_position[1]
+        return left * duration, max(left, right) * duration
+
+    def send_clip_data_chunk(self):
+        """Timer callback to send the heavy data (waveforms, reader, effects) of the next
+        chunk of clips to the webview. Clips closest to the visible range are sent first."""
+        if not self.pending_clip_ids:
+            self.clip_data_timer.stop()
+            return
+        if not getattr(self, "document_is_ready", True):
+            # Wait for the webview (and the project skeleton) to load
+            return
+
+        # Sort pending clips by distance to the visible range
+        visible_start, visible_end = self.get_visible_range()
+        pending_clips = []
+        for clip in get_app().project.get("clips") or []:
+            if clip.get("id") not in self.pending_clip_ids:
+                continue
+            clip_start = clip.get("position", 0.0)
+            clip_end = clip_start + clip.get("end", 0.0) - clip.get("start", 0.0)
+            distance = max(0.0, visible_start - clip_end, clip_start - visible_end)
+            pending_clips.append((distance, clip_start, clip))
+        pending_clips.sort(key=itemgetter(0, 1))
+
+        # Send the current project data of the closest clips (deleted clips are skipped)
+        chunk = []
+        for _, _, clip in pending_clips[:CLIP_DATA_CHUNK_SIZE]:
+            clip_data = {"id": clip.get("id"), "effects": clip.get("effects", [])}
+            for key in ("reader", "ui"):
+                if key in clip:
+                    clip_data[key] = clip[key]
+            chunk.append(clip_data)
+        if chunk:
+            self.run_js(JS_SCOPE_SELECTOR + ".loadClipData(" + json.dumps(chunk) + ");")
+
+        if len(pending_clips) <= CLIP_DATA_CHUNK_SIZE:
+            self.pending_clip_ids.clear()
+            self.clip_data_timer.stop()
+        else:
+            self.pending_clip_ids.difference_update(clip_data["id"] for clip_data in chunk)
+
     def delete_invalid_timeline_item(self, item):
         """Delete an invalid timeline item (clip or transitions) if the basic
            data does not make sense - i.e. negative duration"""
@@ -238,6 +327,11 @@ class TimelineView(updates.UpdateInterface, ViewClass):
             log.warning('Failed to parse clip JSON data', exc_info=1)
             return
 
+        # Don't overwrite heavy clip data which has not been sent to the webview yet
+        if not only_basic_props and clip_data.get("id") in self.pending_clip_ids:
+            clip_data = {key: value for key, value in clip_data.items()
+                         if key not in ("reader", "ui", "effects")}
+
         # Search for matching clip in project data (if any)
         existing_clip = Clip.get(id=clip_data.get("id"))
         if not existing_clip:
@@ -1139,9 +1233,16 @@ class TimelineView(updates.UpdateInterface, ViewClass):
         """Callback when thumbnail needs to be updated"""
         clips = Clip.filter(id=clip_id)
         for clip in clips:
-            # Force thumbnail image to be refreshed (for a particular frame #)
-            GetThumbPath(clip.data.get("file_id"), thumbnail_frame, clear_cache=True)
+            # Force thumbnail image to be refreshed (for a particular frame #), in a worker thread.
+            # The timeline shows the previous thumbnail until the new one is ready.
+            file_id = clip.data.get("file_id")
+            self.pending_thumbnails.setdefault((file_id, thumbnail_frame), set()).add(clip_id)
+            get_app().window.thumbnail_requests.request(file_id, thumbnail_frame, clear_cache=True)
 
+    def thumbnail_ready(self, file_id, thumbnail_frame, thumb_path):
+        """Callback when a requested thumbnail is ready"""
+        clip_ids = self.pending_thumbnails.pop((file_id, thumbnail_frame), ())
+        for clip_id in clip_ids:
             # Pass to javascript timeline (and render)
             self.run_js(JS_SCOPE_SELECTOR + ".updateThumbnail('" + clip_id + "');")
 
@@ -1678,7 +1779,9 @@ class TimelineView(updates.UpdateInterface, ViewClass):
         get_app().updates.transaction_id = tid
 
         gap_size = found_end - found_start
-        for clip in Clip.filter(layer=layer_number) + Transition.filter(layer=layer_number):
+        # Only objects which end after the gap can be moved (using the interval index)
+        for clip in Clip.filter_range(found_start, float("inf"), layer=layer_number) \
+                + Transition.filter_range(found_start, float("inf"), layer=layer_number):
             if clip.data.get("position", 0.0) > found_start:
                 clip.data["position"] -= gap_size
                 clip.save()
@@ -1791,6 +1894,8 @@ class TimelineView(updates.UpdateInterface, ViewClass):
                         effect_map = {effect['class_name']: effect for effect in existing_effects}
 
                         for effect in v:
+                            # Copy effect (the same clipboard effect is pasted onto each target clip)
+                            effect = dict(effect)
                             effect_type = effect.get('class_name')
                             effect['id'] = get_app().project.generate_id()
                             if effect_type in effect_map:
@@ -1803,27 +1908,29 @@ class TimelineView(updates.UpdateInterface, ViewClass):
                         target_obj.data[k] = v
                 target_obj.save()
 
-            # If a single clip/transition is copied with no target, add to a list (for inserting)
-            if len(clip_ids + tran_ids) == 0 and \
-                (isinstance(copied_object, Clip) or isinstance(copied_object, Transition)):
-                copied_object = [copied_object]
-
-            # Handle list of objects (adjust positions and layers)
-            if isinstance(copied_object, list):
-                adjust_positions_and_layers(copied_object, position, layer_id)
-
-            # Handle individual objects (Clip, Transition, Effect)
-            for clip_id in clip_ids:
-                clip = Clip.get(id=clip_id)
-                if clip and isinstance(copied_object, Clip):
-                    apply_clipboard_data(clip, copied_object.data, excluded_keys=['id', 'position', 'layer', 'start', 'end'])
-                if clip and isinstance(copied_object, Effect):
-                    apply_clipboard_data(clip, {"effects": [copied_object.data]}, excluded_keys=['id'])
-
-            for tran_id in tran_ids:
-                tran = Transition.get(id=tran_id)
-                if tran and isinstance(copied_object, Transition):
-                    apply_clipboard_data(tran, copied_object.data, excluded_keys=['id', 'position', 'layer', 'start', 'end'])
+            # Apply all pasted changes (as a single batch)
+            with get_app().updates.batch():
+                # If a single clip/transition is copied with no target, add to a list (for inserting)
+                if len(clip_ids + tran_ids) == 0 and \
+                    (isinstance(copied_object, Clip) or isinstance(copied_object, Transition)):
+                    copied_object = [copied_object]
+
+                # Handle list of objects (adjust positions and layers)
+                if isinstance(copied_object, list):
+                    adjust_positions_and_layers(copied_object, position, layer_id)
+
+                # Handle individual objects (Clip, Transition, Effect)
+                for clip_id in clip_ids:
+                    clip = Clip.get(id=clip_id)
+                    if clip and isinstance(copied_object, Clip):
+                        apply_clipboard_data(clip, copied_object.data, excluded_keys=['id', 'position', 'layer', 'start', 'end'])
+                    if clip and isinstance(copied_object, Effect):
+                        apply_clipboard_data(clip, {"effects": [copied_object.data]}, excluded_keys=['id'])
+
+                for tran_id in tran_ids:
+                    tran = Transition.get(id=tran_id)
+                    if tran and isinstance(copied_object, Transition):
+                        apply_clipboard_data(tran, copied_object.data, excluded_keys=['id', 'position', 'layer', 'start', 'end'])
 
             # End transaction
             get_app().updates.transaction_id = None
@@ -2071,61 +2178,64 @@ class TimelineView(updates.UpdateInterface, ViewClass):
             # Get the nearest starting frame position to the playhead (snap to frame boundaries)
             playhead_position = float(round((playhead_position * fps_num) / fps_den) * fps_den) / fps_num
 
-            # Loop through each clip (using the list of ids)
-            for clip_id in clip_ids:
+            # Slice all clips as a single batch of changes. Ripple edits read the changes
+            # of each previous clip, so they are applied one at a time.
+            with get_app().updates.batch() if not ripple else nullcontext():
+                # Loop through each clip (using the list of ids)
+                for clip_id in clip_ids:
 
-                # Get existing clip object
-                clip = Clip.get(id=clip_id)
-                if not clip or clip.data.get("layer") in locked_layers:
-                    continue
+                    # Get existing clip object
+                    clip = Clip.get(id=clip_id)
+                    if not clip or clip.data.get("layer") in locked_layers:
+                        continue
 
-                original_position = float(clip.data["position"])  # Original position in timeline seconds
-                start_of_clip = float(clip.data["start"])  # Trim start time in clip seconds
-                end_of_clip = float(clip.data["end"])  # Trim end time in clip seconds
-                original_duration = end_of_clip - start_of_clip  # Duration in media seconds
+                    original_position = float(clip.data["position"])  # Original position in timeline seconds
+                    start_of_clip = float(clip.data["start"])  # Trim start time in clip seconds
+                    end_of_clip = float(clip.data["end"])  # Trim end time in clip seconds
+                    original_duration = end_of_clip - start_of_clip  # Duration in media seconds
 
-                if action == MenuSlice.KEEP_LEFT:
-                    # Keep the left side of the clip, adjust the "end" of the clip
-                    clip.data["end"] = start_of_clip + (playhead_position - original_position)
+                    if action == MenuSlice.KEEP_LEFT:
+                        # Keep the left side of the clip, adjust the "end" of the clip
+                        clip.data["end"] = start_of_clip + (playhead_position - original_position)
 
-                    if ripple:
-                        removed_duration = original_duration - (clip.data["end"] - start_of_clip)
-                        self.ripple_delete_gap(playhead_position, clip.data["layer"], removed_duration)
+                        if ripple:
+                            removed_duration = original_duration - (clip.data["end"] - start_of_clip)
+                            self.ripple_delete_gap(playhead_position, clip.data["layer"], removed_duration)
 
-                elif action == MenuSlice.KEEP_RIGHT:
-                    # Keep the right side of the clip, adjust the "start" and "position"
-                    new_start = start_of_clip + (playhead_position - original_position)
-                    clip.data["position"] = playhead_position  # Set new timeline position
-                    clip.data["start"] = new_start
+                    elif action == MenuSlice.KEEP_RIGHT:
+                        # Keep the right side of the clip, adjust the "start" and "position"
+                        new_start = start_of_clip + (playhead_position - original_position)
+                        clip.data["position"] = playhead_position  # Set new timeline position
+                        clip.data["start"] = new_start
 
-                    if ripple:
-                        removed_duration = original_duration - (end_of_clip - new_start)
-                        clip.data["position"] = original_position  # Move right side back to original position
-                        self.ripple_delete_gap(playhead_position, clip.data["layer"], removed_duration)
+                        if ripple:
+                            removed_duration = original_duration - (end_of_clip - new_start)
+                            clip.data["position"] = original_position  # Move right side back to original position
+                            self.ripple_delete_gap(playhead_position, clip.data["layer"], removed_duration)
 
-                        # Seek to new starting frame
-                        new_starting_frame = original_position * (fps_num / fps_den) + 1
+                            # Seek to new starting frame
+                            new_starting_frame = original_position * (fps_num / fps_den) + 1
 
-                elif action == MenuSlice.KEEP_BOTH:
-                    # Update clip data for the left clip
-                    clip.data["end"] = start_of_clip + (playhead_position - original_position)
+                    elif action == MenuSlice.KEEP_BOTH:
+                        # Update clip data for the left clip
+                        clip.data["end"] = start_of_clip + (playhead_position - original_position)
 
-                    # Split into two clips (left and right side)
-                    right_clip = Clip.get(id=clip_id)
-                    if not right_clip:
-                        continue
+                        # Split into two clips (left and right side)
+                        right_clip = Clip.get(id=clip_id)
+                        if not right_clip:
+                            continue
 
-                    # Create right side clip
-                    right_clip.id = None
-                    right_clip.type = 'insert'
-                    right_clip.data.pop('id')
-                    right_clip.key.pop(1)
-                    right_clip.data["position"] = playhead_position
-                    right_clip.data["start"] = clip.data["end"]
-                    right_clip.save()
+                        # Create right side clip
+                        right_clip.id = None
+                        right_clip.type = 'insert'
+                        right_clip.data.pop('id')
+                        right_clip.key.pop(1)
+                        right_clip.data["position"] = playhead_position
+                        right_clip.data["start"] = clip.data["end"]
+                        right_clip.save()
 
-                # Save changes for the left or right slice
-                self.update_clip_data(clip.data, only_basic_props=True, ignore_reader=True)
+                    # Save changes for the left or right slice
+                    self.update_clip_data(clip.data, only_basic_props=True, ignore_reader=True)
 
             # Redraw audio waveforms
             self.redraw_audio_timer.start()
@@ -2195,8 +2305,10 @@ class TimelineView(updates.UpdateInterface, ViewClass):
     def ripple_delete_gap(self, ripple_start, layer, ripple_gap):
         """Remove the ripple gap and adjust subsequent items"""
         # Get all clips and transitions right of ripple_start in the given layer
-        clips = [clip for clip in Clip.filter(layer=layer) if clip.data.get("position", 0.0) >= ripple_start]
-        transitions = [tran for tran in Transition.filter(layer=layer) if tran.data.get("position", 0.0) >= ripple_start]
+        clips = [clip for clip in Clip.filter_range(ripple_start, float("inf"), layer=layer)
+                 if clip.data.get("position", 0.0) >= ripple_start]
+        transitions = [tran for tran in Transition.filter_range(ripple_start, float("inf"), layer=layer)
+                       if tran.data.get("position", 0.0) >= ripple_start]
 
         # Adjust all subsequent items by the ripple gap
         for clip in clips:
@@ -2329,7 +2441,7 @@ class TimelineView(updates.UpdateInterface, ViewClass):
                 self.update_clip_data(clip.data, only_basic_props=False, ignore_reader=True, transaction_id=tid)
 
                 # Add any clips with waveforms to a list
-                if clip.data.get("ui", {}).get("audio_data", []):
+                if has_waveform(clip.data):
                     clips_with_waveforms.append(clip.id)
 
             # Update waveforms of all clips that have them
@@ -2398,7 +2510,7 @@ class TimelineView(updates.UpdateInterface, ViewClass):
                 continue
 
             # Add any clips with waveforms to a list
-            if clip.data.get("ui", {}).get("audio_data", []):
+            if has_waveform(clip.data):
                 clips_with_waveforms.append(clip.id)
 
             # Keep original 'end' and 'duration'
@@ -2453,6 +2565,7 @@ class TimelineView(updates.UpdateInterface, ViewClass):
                     del clip.data["time"]["Points"][-1]
 
                     # Find actual clip object from libopenshot
+                    self.window.timeline_sync.flush()
                     c = self.window.timeline_sync.timeline.GetClip(clip_id)
                     if c:
                         # Look up correct position from time curve
@@ -2461,6 +2574,7 @@ class TimelineView(updates.UpdateInterface, ViewClass):
                 # Do we already have a volume curve? Look up intersecting frame # from volume curve
                 if len(clip.data["volume"]["Points"]) > 1:
                     # Find actual clip object from libopenshot
+                    self.window.timeline_sync.flush()
                     c = self.window.timeline_sync.timeline.GetClip(clip_id)
                     if c:
                         # Look up correct volume from time curve
@@ -3457,7 +3571,8 @@ class TimelineView(updates.UpdateInterface, ViewClass):
         self.run_js(JS_SCOPE_SELECTOR + ".selectAll();")
 
     def render_cache_json(self):
-        """Render the cached frames to the timeline (called every X seconds), and only if changed"""
+        """Send the changes of cached frame ranges to the timeline (called every X milliseconds while
+        the cache is changing). Polling stops when the cache is idle (see wake_cache_renderer)."""
 
         # Get final cache object from timeline
         try:
@@ -3466,20 +3581,46 @@ class TimelineView(updates.UpdateInterface, ViewClass):
                 if not cache_object:
                     return
                 # Get the JSON from the cache object (i.e. which frames are cached)
-                cache_json = cache_object.Json()
-                cache_dict = json.loads(cache_json)
+                cache_dict = json.loads(cache_object.Json())
                 cache_version = cache_dict["version"]
 
                 if self.cache_renderer_version == cache_version:
-                    # Nothing has changed, ignore
+                    # Nothing has changed, stop polling once playback and caching are idle
+                    self.cache_renderer_idle += 1
+                    if self.cache_renderer_idle >= 5 and not self.is_playing():
+                        self.cache_renderer.stop()
                     return
-                # Cache has changed, re-render it
                 self.cache_renderer_version = cache_version
-                self.run_js(JS_SCOPE_SELECTOR + ".renderCache({});".format(cache_json))
+                self.cache_renderer_idle = 0
+
+                # Send only the added and removed frame ranges
+                cache_ranges = TimelineSync.merge_frame_ranges(
+                    (int(float(r["start"])), int(float(r["end"]))) for r in cache_dict.get("ranges", []))
+                delta = {
+                    "added": TimelineSync.subtract_frame_ranges(cache_ranges, self.cache_ranges),
+                    "removed": TimelineSync.subtract_frame_ranges(self.cache_ranges, cache_ranges),
+                }
+                self.cache_ranges = cache_ranges
+                if delta["added"] or delta["removed"]:
+                    self.run_js(JS_SCOPE_SELECTOR + ".renderCacheDelta({});".format(json.dumps(delta)))
         except Exception as ex:
             # Log the exception and ignore
             log.warning("Exception processing timeline cache: %s", ex)
 
+    def wake_cache_renderer(self, *args):
+        """Start polling the cache (i.e. when playback starts, or the timeline changes)"""
+        self.cache_renderer_idle = 0
+        if not self.cache_renderer.isActive():
+            self.cache_renderer.start()
+
+    def is_playing(self):
+        """Is the preview player playing (at any speed)"""
+        preview_thread = getattr(self.window, "preview_thread", None)
+        try:
+            return bool(preview_thread and preview_thread.player.Speed() != 0)
+        except Exception:
+            return False
+
     def handle_selection(self):
         # Force recalculation of clips and repaint
         self.run_js(JS_SCOPE_SELECTOR + ".refreshTimeline();")
@@ -3509,6 +3650,10 @@ class TimelineView(updates.UpdateInterface, ViewClass):
         # Connect update thumbnail signal
         window.ThumbnailUpdated.connect(self.Thumbnail_Updated)
 
+        # Clips waiting for a regenerated thumbnail: {(file_id, thumbnail frame): {clip ids}}
+        self.pending_thumbnails = {}
+        window.thumbnail_requests.ThumbnailReady.connect(self.thumbnail_ready)
+
         # Init New clip
         self.new_item = False
         self.item_type = None
@@ -3520,19 +3665,30 @@ class TimelineView(updates.UpdateInterface, ViewClass):
         self.redraw_audio_timer.setSingleShot(True)
         self.redraw_audio_timer.timeout.connect(self.redraw_audio_onTimeout)
 
+        # Send heavy clip data in chunks (after a project is loaded)
+        self.pending_clip_ids = set()
+        self.clip_data_timer = QTimer(self)
+        self.clip_data_timer.setInterval(10)
+        self.clip_data_timer.timeout.connect(self.send_clip_data_chunk)
+
         # QTimer for cache rendering
         self.cache_renderer_version = None
+        self.cache_renderer_idle = 0  # Number of polls without cache changes
+        self.cache_ranges = []  # Cached frame ranges sent to the timeline
         self.cache_renderer = QTimer(self)
         self.cache_renderer.setInterval(300)
         self.cache_renderer.timeout.connect(self.render_cache_json)
+        for signal in (window.PlaySignal, window.SpeedSignal, window.SeekSignal, window.refreshFrameSignal):
+            signal.connect(self.wake_cache_renderer)
 
         # Connect shutdown signals
         app.aboutToQuit.connect(self.redraw_audio_timer.stop)
         app.aboutToQuit.connect(self.cache_renderer.stop)
+        app.aboutToQuit.connect(self.clip_data_timer.stop)
         app.lastWindowClosed.connect(self.deleteLater)
 
         # Delay the start of cache rendering
-        QTimer.singleShot(1500, self.cache_renderer.start)
+        QTimer.singleShot(1500, self.wake_cache_renderer)
 
         # connect signal to receive waveform data
         self.clipAudioDataReady.connect(self.clipAudioDataReady_Triggered)
@@ -38,6 +38,8 @@ from classes.query import Clip, Track, Transition, Marker
 
 
 class TimelineWidget(QWidget):
+    ignored_key_prefixes = ("files", "history", "profile")  # Ignore changes that don't affect this
+
     def __init__(self, parent=None):
         super(TimelineWidget, self).__init__(parent)
 
@@ -107,7 +109,7 @@ class TimelineWidget(QWidget):
         self.delayed_resize_timer.setSingleShot(True)
         self.delayed_resize_timer.timeout.connect(self.delayed_resize_callback)
 
-    def run_js(self, code, callback=None, retries=0):
+    def run_js(self, code, callback=None):
         """Placeholder due to webview compatibility"""
 
     def apply_theme(self, css):
@@ -122,10 +124,6 @@ class TimelineWidget(QWidget):
 
     # This method is invoked by the UpdateManager each time a change happens (i.e UpdateInterface)
     def changed(self, action):
-        # Ignore changes that don't affect this
-        if action and len(action.key) >= 1 and action.key[0].lower() in ["files", "history", "profile"]:
-            return
-
         # Clear previous rects
         self.clip_rects.clear()
         self.clip_rects_selected.clear()
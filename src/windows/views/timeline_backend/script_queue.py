@@ -0,0 +1,120 @@
+"""
+ @file
+ @brief This file contains an ordered queue of JavaScript calls (shared by the timeline web backends)
+ @author Jonathan Thomas <jonathan@openshot.org>
+
+ @section LICENSE
+
+ Copyright (c) 2008-2024 OpenShot Studios, LLC
+ (http://www.openshotstudios.com). This file is part of
+ OpenShot Video Editor (http://www.openshot.org), an open-source project
+ dedicated to delivering high quality video editing and animation solutions
+ to the world.
+
+ OpenShot Video Editor is free software: you can redistribute it and/or modify
+ it under the terms of the GNU General Public License as published by
+ the Free Software Foundation, either version 3 of the License, or
+ (at your option) any later version.
+
+ OpenShot Video Editor is distributed in the hope that it will be useful,
+ but WITHOUT ANY WARRANTY; without even the implied warranty of
+ MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+ GNU General Public License for more details.
+
+ You should have received a copy of the GNU General Public License
+ along with OpenShot Library.  If not, see <http://www.gnu.org/licenses/>.
+ """
+
+import time
+
+from classes.dispatch_profiler import profiler
+from classes.logger import log
+
+from PyQt5.QtCore import QTimer
+
+
+class ScriptQueue:
+    """ Ordered queue of JavaScript calls for a timeline web view. Scripts queued before the
+    document is ready are held until it is, and scripts queued during the same event loop
+    turn are merged into a single payload (one IPC round-trip). Scripts with a callback are
+    executed on their own, in order. """
+
+    def __init__(self, parent, execute):
+        self.execute = execute  # Function which runs a script: execute(code, callback)
+        self.ready = False
+        self.scripts = []  # Queued scripts: (code, callback)
+        self.queued_time = None  # Time of the oldest queued script
+
+        # Counters of queue usage
+        self.stats = {
+            "scripts": 0,  # Number of scripts queued
+            "payloads": 0,  # Number of scripts executed (after merging)
+            "flushes": 0,
+            "depth": 0,  # Number of scripts in the queue
+            "max_depth": 0,
+            "last_latency_ms": 0.0,  # Time between queuing the oldest script and the flush
+            "max_latency_ms": 0.0,
+        }
+
+        # Flush on the next event loop turn
+        self.flush_timer = QTimer(parent)
+        self.flush_timer.setInterval(0)
+        self.flush_timer.setSingleShot(True)
+        self.flush_timer.timeout.connect(self.flush)
+
+    def add(self, code, callback=None):
+        """ Queue a script (and optional callback, which receives the result) """
+        if not self.scripts:
+            self.queued_time = time.perf_counter()
+        self.scripts.append((code, callback))
+        self.stats["scripts"] += 1
+        self.stats["depth"] = len(self.scripts)
+        self.stats["max_depth"] = max(self.stats["max_depth"], len(self.scripts))
+
+        if not self.ready:
+            if len(self.scripts) == 1:
+                log.debug("Script queued before document ready event: %s", code)
+        elif not self.flush_timer.isActive():
+            self.flush_timer.start()
+
+    def set_ready(self):
+        """ The document is ready, run all queued scripts """
+        self.ready = True
+        self.flush()
+
+    def flush(self):
+        """ Run all queued scripts, merging consecutive scripts without callbacks """
+        self.flush_timer.stop()
+        if not self.ready or not self.scripts:
+            return
+
+        scripts, self.scripts = self.scripts, []
+        latency = time.perf_counter() - self.queued_time
+        latency_ms = latency * 1000.0
+        self.stats["flushes"] += 1
+        self.stats["depth"] = 0
+        self.stats["last_latency_ms"] = round(latency_ms, 3)
+        self.stats["max_latency_ms"] = max(self.stats["max_latency_ms"], round(latency_ms, 3))
+        if profiler.enabled:
+            profiler.record("script_queue", "flush_latency", latency)
+
+        merged = []
+        for code, callback in scripts:
+            if callback:
+                self.run_merged(merged)
+                merged = []
+                self.stats["payloads"] += 1
+                self.execute(code, callback)
+            else:
+                merged.append(code)
+        self.run_merged(merged)
+
+    def run_merged(self, scripts):
+        """ Run a list of scripts as one payload (an error in one script doesn't stop the others) """
+        if not scripts:
+            return
+        self.stats["payloads"] += 1
+        if len(scripts) == 1:
+            self.execute(scripts[0], None)
+            return
+        self.execute("\n".join("try {\n%s\n} catch (e) { console.error(e); }" % code for code in scripts), None)
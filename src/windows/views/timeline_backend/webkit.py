@@ -27,12 +27,12 @@
  """
 
 import os
-from functools import partial
 
 from classes import info
 from classes.logger import log
+from .script_queue import ScriptQueue
 
-from PyQt5.QtCore import QFileInfo, QUrl, Qt, QTimer
+from PyQt5.QtCore import QFileInfo, QUrl, Qt
 from PyQt5.QtWebKitWidgets import QWebView, QWebPage
 
 
@@ -56,6 +56,7 @@ class TimelineWebKitView(QWebView):
         self.setObjectName("TimeWebKitView")
 
         self.document_is_ready = False
+        self.script_queue = ScriptQueue(self, self.execute_js)
         self.html_path = os.path.join(info.PATH, 'timeline', 'index.html')
 
         # Delete the webview when closed
@@ -75,29 +76,18 @@ class TimelineWebKitView(QWebView):
         log.info("WebKit backend initializing")
         self.page().mainFrame().javaScriptWindowObjectCleared.connect(self.setup_js_data)
 
-    def run_js(self, code, callback=None, retries=0):
-        """Run JS code async and optionally have a callback for response"""
-        # Check if document.Ready has fired in JS
-        if not self.document_is_ready:
-            # Not ready, try again in a few moments
-            if retries == 0:
-                # Log the script contents, the first time
-                log.debug(
-                    "run_js() called before document ready event. Script queued: %s",
-                    code)
-            elif retries % 5 == 0:
-                log.warning(
-                    "WebKit backend still not ready after %d retries.", retries)
-            else:
-                log.debug("Script queued, %d retries so far", retries)
-            QTimer.singleShot(200, partial(self.run_js, code, callback, retries + 1))
-            return None
-        # Execute JS code
+    def run_js(self, code, callback=None):
+        """Queue JS code to run async (in order), and optionally have a callback for response.
+        Scripts are held until the document is ready, and scripts queued during the same
+        event loop turn are run as a single payload."""
+        self.script_queue.add(code, callback)
+
+    def execute_js(self, code, callback=None):
+        """Execute JS code (used by the script queue)"""
+        result = self.page().mainFrame().evaluateJavaScript(code)
         if callback:
             # Pass output to callback
-            callback(self.page().mainFrame().evaluateJavaScript(code))
-        else:
-            return self.page().mainFrame().evaluateJavaScript(code)
+            callback(result)
 
     def apply_theme(self, css):
         """Apply additional theme to web-view"""
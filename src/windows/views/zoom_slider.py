@@ -45,11 +45,12 @@ from classes.logger import log
 
 class ZoomSlider(QWidget, updates.UpdateInterface):
     """ A QWidget used to zoom and pan around a Timeline"""
+    supports_batch = True  # Redraw once per batch
+    ignored_key_prefixes = ("files", "history", "profile")  # Ignore changes that don't affect this
 
     # This method is invoked by the UpdateManager each time a change happens (i.e UpdateInterface)
     def changed(self, action):
-        # Ignore changes that don't affect this
-        if (action and len(action.key) >= 1 and action.key[0].lower() in ["files", "history", "profile"]) or self.ignore_updates:
+        if self.ignore_updates:
             return
 
         # Clear previous rects